@@ -51,10 +51,15 @@ AUTH_USER_MODEL = 'Thoneti.User'
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'Thoneti.middleware.ProfilingMiddleware',
+    'Thoneti.middleware.MetricsMiddleware',
+    'Thoneti.middleware.QueryBudgetMiddleware',
+    'Thoneti.middleware.SlowQueryMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'Thoneti.middleware.IdempotencyMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -97,6 +102,25 @@ DATABASES = {
     }
 }
 
+# DB_ENGINE=sqlite runs everything, including generate_farm_data and the
+# endpoint benchmarks, against a local file instead of Postgres. The test
+# database is a file too: the concurrency tests cannot share an in-memory one.
+if os.environ.get('DB_ENGINE', 'postgresql') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', str(BASE_DIR / 'db.sqlite3')),
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 20},
+            'TEST': {'NAME': os.environ.get('SQLITE_TEST_PATH', str(BASE_DIR / 'test_db.sqlite3'))},
+        }
+    }
+
+# On Postgres, DB_PARTITIONING=True range-partitions sale, milkreceived and
+# notification by month (see Thoneti/partitioning.py). Run
+# `manage.py manage_partitions` at least monthly to create upcoming months.
+DB_PARTITIONING = os.environ.get('DB_PARTITIONING', 'False') == 'True'
+PARTITION_MONTHS_AHEAD = int(os.environ.get('PARTITION_MONTHS_AHEAD', '3'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -136,6 +160,20 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Content-hashed filenames let the service worker cache static assets forever.
+# Hashing needs collectstatic, so development keeps the plain storage.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -155,6 +193,79 @@ SESSION_COOKIE_AGE = 86400  # 24 hours
 SESSION_SAVE_EVERY_REQUEST = True
 
 
+# Pending milk requests older than this leave the incoming feed. Run
+# `manage.py expire_milk_requests` hourly to expire them and notify senders.
+MILK_REQUEST_EXPIRY_HOURS = int(os.environ.get('MILK_REQUEST_EXPIRY_HOURS', '24'))
+
+# Deletions are kept this long for delta sync; older cursors get a full resync.
+# Run `manage.py purge_tombstones` daily to delete older tombstones.
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', '30'))
+
+# POSTs repeated with the same Idempotency-Key within this window replay the stored response.
+# Run `manage.py purge_idempotency_keys` daily to delete expired keys.
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.environ.get('IDEMPOTENCY_KEY_TTL_HOURS', '24'))
+
+# Maximum queries per request, keyed by URL name from Thoneti/urls.py. The
+# counts include the session load and save. Requests over budget are logged
+# with their repeated queries. With QUERY_BUDGET_STRICT they raise instead;
+# the test runner (Thoneti/test_runner.py) always turns it on.
+QUERY_BUDGET_DEFAULT = 25
+QUERY_BUDGETS = {
+    'seller-bootstrap': 20,
+    'manager-bootstrap': 22,
+    'sync-changes': 20,
+    'list-my-requests': 10,
+    'list-incoming-requests': 15,
+    'borrow-lend-history': 10,
+    'list-pending-distributions': 10,
+    'list-manager-pending-distributions': 10,
+    'list-notifications': 10,
+    # Dates in archived months also read and serialize the archives.
+    'get-datewise-data': 35,
+    # Each queued operation is applied with its own queries.
+    'replay-outbox': 60,
+    # Up to 50 sub-requests, each counted here.
+    'batch-requests': 400,
+}
+QUERY_BUDGET_STRICT = os.environ.get('QUERY_BUDGET_STRICT', 'False') == 'True'
+TEST_RUNNER = 'Thoneti.test_runner.StrictQueryBudgetRunner'
+
+# Prometheus metrics at /internal/metrics/. Workers share counters through
+# snapshot files in METRICS_DIR; without it each process reports only itself.
+# Scrapers send "Authorization: Bearer <METRICS_TOKEN>"; METRICS_ALLOWED_IPS
+# is only trusted with DEBUG on, since a local proxy makes every client local.
+METRICS_DIR = os.environ.get('METRICS_DIR')
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', '5'))
+METRICS_ALLOWED_IPS = os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Request profiling is off unless PROFILING_DIR is set. Profiled requests are
+# a random PROFILING_SAMPLE_RATE share plus any carrying a signed X-Profile
+# header (shown on /dj-admin/profiles/). PROFILING_MODE 'cprofile' writes
+# pstats files, 'sampler' writes collapsed stacks for flame graphs.
+PROFILING_DIR = os.environ.get('PROFILING_DIR')
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_MODE = os.environ.get('PROFILING_MODE', 'cprofile')
+PROFILING_SAMPLE_INTERVAL = float(os.environ.get('PROFILING_SAMPLE_INTERVAL', '0.005'))
+PROFILING_TOKEN_MAX_AGE = int(os.environ.get('PROFILING_TOKEN_MAX_AGE', '3600'))
+PROFILING_KEEP_PER_VIEW = int(os.environ.get('PROFILING_KEEP_PER_VIEW', '50'))
+
+# Queries slower than this are logged with their EXPLAIN plan, and appended to
+# SLOW_QUERY_LOG for `manage.py slow_query_report`. An empty value disables it.
+SLOW_QUERY_THRESHOLD_MS = os.environ.get('SLOW_QUERY_THRESHOLD_MS', '200')
+SLOW_QUERY_THRESHOLD_MS = float(SLOW_QUERY_THRESHOLD_MS) if SLOW_QUERY_THRESHOLD_MS else None
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG')
+
+# `manage.py archive_closed_months` compresses the sales, milk receipts, daily
+# totals and attendance of months older than this into archived_month,
+# keeping monthly summaries in their place.
+ARCHIVE_AFTER_MONTHS = int(os.environ.get('ARCHIVE_AFTER_MONTHS', '3'))
+
+# New rows of the high-insert tables get time-ordered version 7 UUID keys
+# instead of random version 4 ones (see Thoneti/ids.py).
+TIME_ORDERED_IDS = os.environ.get('TIME_ORDERED_IDS', 'False') == 'True'
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -18,9 +18,12 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from Thoneti.admin import profile_download, profile_list
 
 
 urlpatterns = [
+    path('dj-admin/profiles/', admin.site.admin_view(profile_list), name='profile-list'),
+    path('dj-admin/profiles/<str:view>/<str:name>/', admin.site.admin_view(profile_download), name='profile-download'),
     path('dj-admin/', admin.site.urls),
     path('', include('Thoneti.urls')),
 ]
@@ -1,11 +1,16 @@
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.http import FileResponse, Http404
+from django.template.response import TemplateResponse
 from .models import (
     User, Manager, Employee, Seller, Admin, Location,
     DailyOperations, FeedRecord, ExpenseRecord, MedicineRecord,
     MilkReceived, MilkDistribution, Attendance, Salary, Deduction,
-    DailyTotal, Sale, MilkRequest, BorrowLendRecord, Notification
+    DailyTotal, Sale, MilkRequest, BorrowLendRecord, Notification,
+    ArchivedMonth, SellerMonthlySummary, AttendanceMonthlySummary
 )
+from .profiling import list_profiles, profile_path, profile_token
 
 
 @admin.register(User)
@@ -162,4 +167,49 @@ class NotificationAdmin(admin.ModelAdmin):
     list_display = ('user', 'message', 'timestamp', 'is_read')
     list_filter = ('is_read',)
     search_fields = ('user__username', 'message')
-    ordering = ('-timestamp',)
\ No newline at end of file
+    ordering = ('-timestamp',)
+
+
+
+
+@admin.register(ArchivedMonth)
+class ArchivedMonthAdmin(admin.ModelAdmin):
+    list_display = ('model', 'month', 'row_count', 'archived_at')
+    list_filter = ('model',)
+    exclude = ('data',)
+    ordering = ('-month', 'model')
+
+
+@admin.register(SellerMonthlySummary)
+class SellerMonthlySummaryAdmin(admin.ModelAdmin):
+    list_display = ('seller', 'month', 'milk_received', 'milk_sold', 'revenue')
+    list_filter = ('month',)
+    search_fields = ('seller__name',)
+    ordering = ('-month',)
+
+
+@admin.register(AttendanceMonthlySummary)
+class AttendanceMonthlySummaryAdmin(admin.ModelAdmin):
+    list_display = ('employee', 'month', 'present', 'absent')
+    list_filter = ('month',)
+    search_fields = ('employee__name',)
+    ordering = ('-month',)
+
+
+def profile_list(request):
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Request profiles',
+        'profiling_enabled': bool(settings.PROFILING_DIR),
+        'token_max_age': settings.PROFILING_TOKEN_MAX_AGE,
+        'profiles': list_profiles(),
+        'token': profile_token(),
+    }
+    return TemplateResponse(request, 'admin/profiles.html', context)
+
+
+def profile_download(request, view, name):
+    path = profile_path(view, name)
+    if path is None:
+        raise Http404('No such profile.')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=f'{view}-{name}')
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ThonetiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Thoneti'
+
+    def ready(self):
+        from . import sync  # noqa: F401 - registers the tombstone signal handlers
@@ -0,0 +1,158 @@
+"""Moves the detail rows of closed months out of the hot tables.
+
+Each archived (model, month) is one ArchivedMonth row holding the serialized
+rows gzip-compressed. SellerMonthlySummary and AttendanceMonthlySummary
+hold the totals of exactly the archived rows, so an all-time figure is the
+hot rows plus the summaries. Closed months are read-only: writes dated
+before first_hot_month() are refused with MonthClosed, so a hot row never
+duplicates or contradicts an archived one.
+"""
+import gzip
+from collections import defaultdict
+
+from django.conf import settings
+from django.core import serializers
+from django.db import connection, transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+
+from .models import (
+    ArchivedMonth, Attendance, AttendanceMonthlySummary, DailyTotal, MilkReceived, Sale, SellerMonthlySummary
+)
+from .partitioning import add_months
+
+
+ARCHIVED_MODELS = [MilkReceived, Sale, DailyTotal, Attendance]
+DELETE_BATCH_SIZE = 500
+
+
+class MonthNotClosed(Exception):
+    pass
+
+
+class MonthClosed(ValueError):
+    pass
+
+
+def first_hot_month(today=None):
+    """Months before this one are closed and can be archived."""
+    today = today or timezone.localdate()
+    return add_months(today.replace(day=1), -settings.ARCHIVE_AFTER_MONTHS)
+
+
+def check_month_open(day):
+    if day < first_hot_month():
+        raise MonthClosed(f'{day:%Y-%m} is closed and archived; its records can no longer be changed.')
+
+
+def months_to_archive():
+    cutoff = first_hot_month()
+    months = set()
+    for model in ARCHIVED_MODELS:
+        months.update(model.objects.filter(date__lt=cutoff).dates('date', 'month'))
+    return sorted(months)
+
+
+def _in_month(queryset, month):
+    return queryset.filter(date__gte=month, date__lt=add_months(month, 1))
+
+
+def _add_to_summaries(row, sellers, employees):
+    if isinstance(row, MilkReceived):
+        if row.status in ('received', 'pending'):
+            sellers[row.seller_id]['milk_received'] += row.quantity
+    elif isinstance(row, Sale):
+        sellers[row.seller_id]['milk_sold'] += row.quantity
+        sellers[row.seller_id]['sales_amount'] += row.total_amount
+        sellers[row.seller_id]['sale_count'] += 1
+    elif isinstance(row, DailyTotal):
+        sellers[row.seller_id]['cash_sales'] += row.cash_sales
+        sellers[row.seller_id]['online_sales'] += row.online_sales
+        sellers[row.seller_id]['revenue'] += row.revenue
+    elif isinstance(row, Attendance) and row.status in ('present', 'absent'):
+        employees[row.employee_id][row.status] += 1
+
+
+def _add_totals(summary, totals):
+    for field, amount in totals.items():
+        setattr(summary, field, getattr(summary, field) + amount)
+    summary.save()
+
+
+def _delete_rows(model, pks):
+    # A plain DELETE: archiving should not send pre_delete, which would
+    # record sync tombstones and make clients drop their copies.
+    qn = connection.ops.quote_name
+    pk_field = model._meta.pk
+    with connection.cursor() as cursor:
+        for start in range(0, len(pks), DELETE_BATCH_SIZE):
+            batch = [pk_field.get_db_prep_value(pk, connection) for pk in pks[start:start + DELETE_BATCH_SIZE]]
+            cursor.execute(
+                f'DELETE FROM {qn(model._meta.db_table)} WHERE {qn(pk_field.column)} IN '
+                f'({", ".join(["%s"] * len(batch))})',
+                batch
+            )
+
+
+@transaction.atomic
+def archive_month(month):
+    """Archive the month's rows of ARCHIVED_MODELS. Returns {model name: rows archived}."""
+    month = month.replace(day=1)
+    if month >= first_hot_month():
+        raise MonthNotClosed(f'{month:%Y-%m} is within the last {settings.ARCHIVE_AFTER_MONTHS} months.')
+    if _in_month(MilkReceived.objects.filter(status='pending'), month).exists():
+        raise MonthNotClosed(f'{month:%Y-%m} still has pending milk receipts.')
+
+    sellers = defaultdict(lambda: defaultdict(int))
+    employees = defaultdict(lambda: defaultdict(int))
+    archived = {}
+    for model in ARCHIVED_MODELS:
+        rows = list(_in_month(model.objects.all(), month).order_by('pk'))
+        if not rows:
+            continue
+        for row in rows:
+            _add_to_summaries(row, sellers, employees)
+
+        archive, _ = ArchivedMonth.objects.select_for_update().get_or_create(
+            model=model._meta.model_name, month=month, defaults={'data': b''}
+        )
+        previous = gzip.decompress(bytes(archive.data)).decode() if archive.row_count else ''
+        archive.data = gzip.compress((previous + serializers.serialize('jsonl', rows)).encode())
+        archive.row_count += len(rows)
+        archive.save()
+        _delete_rows(model, [row.pk for row in rows])
+        archived[model._meta.model_name] = len(rows)
+
+    for seller_id, totals in sellers.items():
+        summary, _ = SellerMonthlySummary.objects.get_or_create(seller_id=seller_id, month=month)
+        _add_totals(summary, totals)
+    for employee_id, totals in employees.items():
+        summary, _ = AttendanceMonthlySummary.objects.get_or_create(employee_id=employee_id, month=month)
+        _add_totals(summary, totals)
+    return archived
+
+
+def archived_rows(model, start, end=None):
+    """Archived rows of model dated start to end inclusive, as unsaved instances.
+
+    This decompresses every archived month in the range, so it is only meant
+    for occasional lookups into closed months.
+    """
+    end = end or start
+    rows = []
+    for archive in ArchivedMonth.objects.filter(
+        model=model._meta.model_name, month__gte=start.replace(day=1), month__lte=end
+    ):
+        for deserialized in serializers.deserialize('jsonl', gzip.decompress(bytes(archive.data)).decode()):
+            if start <= deserialized.object.date <= end:
+                rows.append(deserialized.object)
+    return rows
+
+
+def archived_data(serializer_class, day, related=()):
+    """Serialized archived rows for day, or [] when its month is still hot."""
+    if day >= first_hot_month():
+        return []
+    rows = archived_rows(serializer_class.Meta.model, day)
+    prefetch_related_objects(rows, *related)
+    return serializer_class(rows, many=True).data
@@ -0,0 +1,131 @@
+import io
+import json
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.exception import convert_exception_to_response
+from django.db import transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from django.utils.module_loading import import_string
+
+from .middleware import IDEMPOTENCY_HEADER
+
+
+BATCH_PATH_PREFIX = '/api/'
+
+# Sub-requests run through this app's middleware (idempotency, query
+# budgets, metrics, profiling, slow query capture). Django's security,
+# session, CSRF and authentication middleware ran for the batch request
+# itself and are not repeated.
+SUB_REQUEST_MIDDLEWARE_PREFIX = 'Thoneti.middleware.'
+
+
+def _error(status_code, message):
+    return {'status': status_code, 'body': {'message': message}}
+
+
+def _call_view(sub_request):
+    match = sub_request.resolver_match
+    response = match.func(sub_request, *match.args, **match.kwargs)
+    if hasattr(response, 'render') and callable(response.render):
+        response = response.render()
+    return response
+
+
+def build_sub_request_handler():
+    """The resolved view wrapped in this app's middleware, as BaseHandler would.
+
+    Exceptions become responses at every layer, so Http404 is a 404 and a
+    crash is logged and returned as a 500.
+    """
+    handler = convert_exception_to_response(_call_view)
+    for middleware_path in reversed(settings.MIDDLEWARE):
+        if not middleware_path.startswith(SUB_REQUEST_MIDDLEWARE_PREFIX):
+            continue
+        try:
+            middleware = import_string(middleware_path)(handler)
+        except MiddlewareNotUsed:
+            continue
+        handler = convert_exception_to_response(middleware)
+    return handler
+
+
+def _build_sub_request(request, method, path, query, body, idempotency_key=None):
+    outer = request._request
+    sub_request = HttpRequest()
+    sub_request.method = method
+    sub_request.path = sub_request.path_info = path
+    # The batch's own Idempotency-Key covers the whole batch, not each item.
+    sub_request.META = {
+        key: value for key, value in outer.META.items()
+        if key not in ('CONTENT_LENGTH', 'QUERY_STRING', 'wsgi.input', IDEMPOTENCY_HEADER)
+    }
+    if idempotency_key:
+        sub_request.META[IDEMPOTENCY_HEADER] = idempotency_key
+    payload = json.dumps(body if body is not None else {}).encode()
+    sub_request.META.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(payload)),
+    })
+    sub_request.GET = QueryDict(query)
+    sub_request.COOKIES = outer.COOKIES
+    sub_request.session = outer.session
+    sub_request.user = request.user
+    sub_request._stream = io.BytesIO(payload)
+    sub_request._read_started = False
+    # The outer batch request already passed the CSRF check.
+    sub_request._dont_enforce_csrf_checks = True
+    return sub_request
+
+
+def _response_body(response):
+    if hasattr(response, 'data'):
+        return response.data
+    content = response.content.decode() if response.content else ''
+    if response.get('Content-Type', '').startswith('application/json') and content:
+        return json.loads(content)
+    if response.status_code >= 400:
+        # Django's HTML error pages
+        return {'message': response.reason_phrase}
+    return content
+
+
+def run_sub_request(request, item, handler):
+    target = urlsplit(item['path'])
+    if not target.path.startswith(BATCH_PATH_PREFIX):
+        return _error(400, 'Only API paths can be batched.')
+
+    try:
+        match = resolve(target.path)
+    except Resolver404:
+        return _error(404, 'Not found.')
+    if match.url_name == 'batch-requests':
+        return _error(400, 'Batch requests cannot be nested.')
+
+    sub_request = _build_sub_request(
+        request, item['method'], target.path, target.query, item.get('body'), item.get('idempotency_key')
+    )
+    sub_request.resolver_match = match
+    response = handler(sub_request)
+    return {'status': response.status_code, 'body': _response_body(response)}
+
+
+def dispatch_batch(request, items, atomic=False):
+    handler = build_sub_request_handler()
+    if not atomic:
+        return [run_sub_request(request, item, handler) for item in items], False
+
+    results = []
+    with transaction.atomic():
+        for item in items:
+            result = run_sub_request(request, item, handler)
+            results.append(result)
+            if result['status'] >= 400:
+                transaction.set_rollback(True)
+                return results, True
+    return results, False
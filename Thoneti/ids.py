@@ -0,0 +1,51 @@
+"""Primary key generators for the high-insert tables.
+
+Random version 4 UUIDs land anywhere in the primary key B-tree, so every
+insert touches a different leaf page and the pages split half full.
+Version 7 UUIDs (RFC 9562) start with a millisecond timestamp. New keys then
+append to the right edge of the index. With TIME_ORDERED_IDS on, the models
+that use time_ordered_id get version 7 keys. Existing version 4 keys need no
+migration: both are ordinary UUIDs, the old rows keep theirs, and clients
+treat ids as opaque.
+"""
+import secrets
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7():
+    """A version 7 UUID, strictly increasing within this process.
+
+    The 12 bits after the version are a counter that starts at a random
+    value each millisecond (RFC 9562 method 1). When it runs out, the next
+    millisecond is borrowed, and the same happens if the clock steps back.
+    """
+    global _last_ms, _counter
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            _last_ms, _counter = now_ms, secrets.randbits(11)
+        else:
+            _counter += 1
+            if _counter > 0xFFF:
+                _last_ms, _counter = _last_ms + 1, secrets.randbits(11)
+        timestamp, counter = _last_ms, _counter
+    return uuid.UUID(int=(timestamp << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | secrets.randbits(62))
+
+
+def uuid7_time(value):
+    """When a version 7 UUID was generated, to the millisecond."""
+    return datetime.fromtimestamp((value.int >> 80) / 1000, tz=timezone.utc)
+
+
+def time_ordered_id():
+    return uuid7() if settings.TIME_ORDERED_IDS else uuid.uuid4()
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Thoneti.archive import MonthNotClosed, archive_month, months_to_archive
+
+
+class Command(BaseCommand):
+    help = 'Move the detail rows of closed months into compressed archives, keeping monthly summaries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help='Archive only this month (YYYY-MM).')
+        parser.add_argument('--dry-run', action='store_true', help='List the months that would be archived.')
+
+    def handle(self, *args, **options):
+        if options['month']:
+            try:
+                months = [datetime.strptime(options['month'], '%Y-%m').date()]
+            except ValueError:
+                raise CommandError('--month must be in YYYY-MM format.')
+        else:
+            months = months_to_archive()
+
+        if not months:
+            self.stdout.write('Nothing to archive.')
+        for month in months:
+            if options['dry_run']:
+                self.stdout.write(f'{month:%Y-%m}: would be archived')
+                continue
+            try:
+                archived = archive_month(month)
+            except MonthNotClosed as error:
+                if options['month']:
+                    raise CommandError(str(error))
+                self.stdout.write(f'{error} Skipped.')
+                continue
+            counts = ', '.join(f'{count} {model}' for model, count in archived.items()) or 'no rows'
+            self.stdout.write(f'{month:%Y-%m}: archived {counts}')
@@ -0,0 +1,108 @@
+import queue
+import statistics
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from Thoneti.management.commands.benchmark_endpoints import percentile
+from Thoneti.models import Sale, Seller
+
+
+class Command(BaseCommand):
+    help = (
+        'Post small sales from many threads at once and report the aggregate sale throughput. '
+        'The same load is spread over each --sellers count, so a per-seller lock shows up as '
+        'throughput growing with the number of sellers. Run it after generate_farm_data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sellers', type=int, nargs='+', default=[1, 8])
+        parser.add_argument('--requests', type=int, default=200, help='Sales posted per run.')
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--quantity', default='0.01', help='Litres sold per sale.')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark sales instead of deleting them.')
+
+    def handle(self, *args, **options):
+        if min(options['sellers']) < 1 or options['requests'] < 1 or options['threads'] < 1:
+            raise CommandError('--sellers, --requests and --threads must be positive.')
+        sellers = list(
+            Seller.objects.filter(is_active=True).select_related('user').order_by('created_at')[:max(options['sellers'])]
+        )
+        if len(sellers) < max(options['sellers']):
+            raise CommandError(f'Only {len(sellers)} active sellers; run generate_farm_data first.')
+
+        self.stdout.write(
+            f'{connection.vendor} database, {options["requests"]} sales per run on {options["threads"]} threads'
+        )
+        self.stdout.write(
+            f'{"sellers":>7} {"req/s":>8} {"p50 ms":>9} {"p95 ms":>9} {"created":>8} {"refused":>8} {"failed":>7}'
+        )
+        # The test client's host, a failing budget and slow-query EXPLAINs of the
+        # waits on the seller lock should not get in the way of measuring.
+        with override_settings(ALLOWED_HOSTS=['testserver'], QUERY_BUDGET_STRICT=False, SLOW_QUERY_THRESHOLD_MS=None):
+            for seller_count in options['sellers']:
+                self.run(sellers[:seller_count], options)
+
+    def run(self, sellers, options):
+        # Sessions are created up front; each thread gets its own clients carrying them.
+        sessions = []
+        for seller in sellers:
+            client = Client()
+            client.force_login(seller.user)
+            sessions.append(client.cookies[settings.SESSION_COOKIE_NAME].value)
+
+        url = reverse('record-individual-sale')
+        today = timezone.localdate().isoformat()
+        client_ids = [uuid.uuid4() for _ in range(options['requests'])]
+        work = queue.Queue()
+        for index, client_id in enumerate(client_ids):
+            work.put((index % len(sellers), client_id))
+        statuses = []
+        timings = []
+
+        def sell():
+            clients = {}
+            try:
+                while True:
+                    try:
+                        seller_index, client_id = work.get_nowait()
+                    except queue.Empty:
+                        return
+                    client = clients.get(seller_index)
+                    if client is None:
+                        client = clients[seller_index] = Client()
+                        client.cookies[settings.SESSION_COOKIE_NAME] = sessions[seller_index]
+                    payload = {'quantity': options['quantity'], 'date': today, 'client_id': str(client_id)}
+                    started = time.perf_counter()
+                    try:
+                        status_code = client.post(url, payload, content_type='application/json').status_code
+                    except Exception:
+                        status_code = 500
+                    timings.append((time.perf_counter() - started) * 1000)
+                    statuses.append(status_code)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=sell) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        created = statuses.count(201)
+        refused = statuses.count(400)
+        self.stdout.write(
+            f'{len(sellers):>7} {len(statuses) / elapsed:>8.0f} {statistics.median(timings):>9.1f} '
+            f'{percentile(timings, 95):>9.1f} {created:>8} {refused:>8} {len(statuses) - created - refused:>7}'
+        )
+        if not options['keep']:
+            Sale.objects.filter(client_id__in=client_ids).delete()
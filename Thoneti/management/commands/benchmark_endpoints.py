@@ -0,0 +1,116 @@
+import json
+import math
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from Thoneti.models import User, Manager, Seller, Employee
+
+
+# (role, URL name, query parameters). Only side-effect free GETs, so runs can repeat.
+ENDPOINTS = [
+    ('seller', 'seller-bootstrap', {}),
+    ('seller', 'seller-daily-summary', {}),
+    ('seller', 'list-incoming-requests', {}),
+    ('seller', 'list-my-requests', {}),
+    ('seller', 'list-pending-distributions', {}),
+    ('seller', 'borrow-lend-history', {}),
+    ('seller', 'list-notifications', {}),
+    ('seller', 'sync-changes', {}),
+    ('manager', 'manager-bootstrap', {}),
+    ('manager', 'get-datewise-data', {}),
+    ('manager', 'get-daily-data', {}),
+    ('manager', 'list-employees', {}),
+    ('manager', 'list-locations', {}),
+    ('manager', 'list-sellers', {}),
+    ('manager', 'list-manager-pending-distributions', {}),
+    ('manager', 'get-sales-trend', {}),
+    ('manager', 'borrow-lend-settlement', {}),
+    ('employee', 'employee-dashboard', {}),
+    ('employee', 'get-employee-attendance', {}),
+    ('admin', 'list-managers', {}),
+]
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+class Command(BaseCommand):
+    help = 'Time the main read endpoints through the test client and report latency percentiles and query counts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--only', nargs='+', metavar='URL_NAME', help='Benchmark only these endpoints.')
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this file.')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1.')
+
+        users = {
+            'seller': User.objects.filter(
+                seller_profile__in=Seller.objects.filter(is_active=True).order_by('created_at')[:1]
+            ).first(),
+            'manager': User.objects.filter(manager_profile__in=Manager.objects.order_by('created_at')[:1]).first(),
+            'employee': User.objects.filter(
+                employee_profile__in=Employee.objects.filter(is_active=True).order_by('created_at')[:1]
+            ).first(),
+            'admin': User.objects.filter(role='admin').order_by('created_at').first(),
+        }
+        endpoints = [
+            endpoint for endpoint in ENDPOINTS if not options['only'] or endpoint[1] in options['only']
+        ]
+
+        self.stdout.write(f'{connection.vendor} database, {options["iterations"]} iterations per endpoint\n')
+        self.stdout.write(f'{"endpoint":<38} {"status":>6} {"p50 ms":>9} {"p95 ms":>9} {"max ms":>9} {"queries":>8}')
+
+        results = []
+        # The test client's host and a failing budget should not get in the way of measuring.
+        with override_settings(ALLOWED_HOSTS=['testserver'], QUERY_BUDGET_STRICT=False):
+            clients = {}
+            for role, url_name, params in endpoints:
+                if users[role] is None:
+                    self.stdout.write(f'{url_name:<38} skipped, no {role} user')
+                    continue
+                if role not in clients:
+                    clients[role] = Client()
+                    clients[role].force_login(users[role])
+                result = self.measure(clients[role], url_name, params, options['iterations'], options['warmup'])
+                results.append(result)
+                self.stdout.write(
+                    f'{url_name:<38} {result["status"]:>6} {result["p50_ms"]:>9.1f} {result["p95_ms"]:>9.1f} '
+                    f'{result["max_ms"]:>9.1f} {result["queries"]:>8}'
+                )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as output:
+                json.dump({'vendor': connection.vendor, 'results': results}, output, indent=2)
+
+    def measure(self, client, url_name, params, iterations, warmup):
+        url = reverse(url_name)
+        for _ in range(warmup):
+            client.get(url, params)
+
+        timings = []
+        queries = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            response = client.get(url, params)
+            timings.append((time.perf_counter() - started) * 1000)
+            queries.append(response.wsgi_request.query_stats.count)
+
+        return {
+            'endpoint': url_name,
+            'status': response.status_code,
+            'p50_ms': statistics.median(timings),
+            'p95_ms': percentile(timings, 95),
+            'max_ms': max(timings),
+            'queries': max(queries),
+        }
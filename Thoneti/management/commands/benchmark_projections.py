@@ -0,0 +1,52 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from Thoneti.models import MilkReceived
+from Thoneti.projections import MILK_RECEIVED_PROJECTION
+from Thoneti.serializers import MilkReceivedSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Time rendering the newest milk receipts through MilkReceivedSerializer and through its '
+        'values_list projection. Run it after generate_farm_data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+        parser.add_argument('--iterations', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1 or min(options['rows']) < 1:
+            raise CommandError('--rows and --iterations must be positive.')
+        if not MilkReceived.objects.exists():
+            raise CommandError('No milk receipts; run generate_farm_data first.')
+
+        self.stdout.write(f'{"rows":>7} {"serializer ms":>14} {"projection ms":>14} {"speedup":>8}')
+        for row_count in options['rows']:
+            queryset = MilkReceived.objects.order_by('-date', '-receipt_id')[:row_count]
+            serializer_ms, serializer_content = self.time_render(
+                lambda: MilkReceivedSerializer(queryset.select_related('seller__location', 'manager'), many=True).data,
+                options['iterations']
+            )
+            projection_ms, projection_content = self.time_render(
+                lambda: MILK_RECEIVED_PROJECTION.serialize_queryset(queryset), options['iterations']
+            )
+            if json.loads(projection_content) != json.loads(serializer_content):
+                raise CommandError(f'The projection output differs from the serializer for {row_count} rows.')
+            self.stdout.write(
+                f'{len(json.loads(projection_content)):>7} {serializer_ms:>14.1f} {projection_ms:>14.1f} '
+                f'{serializer_ms / projection_ms:>7.1f}x'
+            )
+
+    def time_render(self, serialize, iterations):
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            content = JSONRenderer().render(serialize())
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), content
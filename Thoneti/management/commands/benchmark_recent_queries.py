@@ -0,0 +1,61 @@
+import re
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from Thoneti.models import MilkReceived, Notification, Sale, Seller
+from Thoneti.partitioning import PARTITIONED_TABLES
+
+
+PARTITION_PATTERN = re.compile(rf"\b(?:{'|'.join(PARTITIONED_TABLES)})_(?:p\d{{4}}_\d{{2}}|default)\b")
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the queries that only need recent rows. Run it after generate_farm_data with '
+        'growing --years; the timings should stay flat while the history grows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1.')
+        seller = Seller.objects.filter(is_active=True).select_related('user').order_by('created_at').first()
+        if seller is None:
+            raise CommandError('No sellers; run generate_farm_data first.')
+
+        today = timezone.localdate()
+        # (label, queryset, how to run it)
+        queries = [
+            ("seller's sales today", Sale.objects.filter(seller=seller, date=today), list),
+            ('sales this month', Sale.objects.filter(date__gte=today.replace(day=1)),
+             lambda queryset: queryset.aggregate(total=Sum('quantity'))),
+            ('milk received, last 7 days', MilkReceived.objects.filter(
+                date__gte=today - timedelta(days=6)
+            ).values('date').annotate(total=Sum('quantity')).order_by(), list),
+            ('latest notifications', Notification.objects.filter(user=seller.user).order_by('-timestamp')[:20], list),
+        ]
+
+        self.stdout.write(
+            f'{connection.vendor} database: {Sale.objects.count()} sales, '
+            f'{MilkReceived.objects.count()} receipts, {Notification.objects.count()} notifications'
+        )
+        self.stdout.write(f'{"query":<30} {"p50 ms":>9} {"max ms":>9} {"partitions":>11}')
+        for label, queryset, run in queries:
+            timings = []
+            for _ in range(options['iterations']):
+                started = time.perf_counter()
+                run(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+
+            partitions = '-'
+            if connection.vendor == 'postgresql':
+                partitions = str(len(set(PARTITION_PATTERN.findall(queryset.explain()))))
+            self.stdout.write(f'{label:<30} {statistics.median(timings):>9.2f} {max(timings):>9.2f} {partitions:>11}')
@@ -0,0 +1,67 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+
+from Thoneti.ids import uuid7
+
+
+GENERATORS = [('uuid4', uuid.uuid4), ('uuid7', uuid7)]
+
+
+def primary_key_size(cursor, table):
+    """Bytes used by the primary key index of table, or None if the backend cannot tell."""
+    if connection.vendor == 'postgresql':
+        cursor.execute(
+            "SELECT pg_relation_size(indexrelid) FROM pg_index WHERE indrelid = to_regclass(%s) AND indisprimary",
+            [table]
+        )
+        return cursor.fetchone()[0]
+    if connection.vendor == 'sqlite':
+        try:
+            cursor.execute('SELECT sum(pgsize) FROM dbstat WHERE name = %s', [f'sqlite_autoindex_{table}_1'])
+        except Exception:
+            return None  # SQLite built without the dbstat table
+        return cursor.fetchone()[0]
+    return None
+
+
+class Command(BaseCommand):
+    help = 'Compare insert throughput and primary key index size of random (v4) and time-ordered (v7) UUID keys.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--rows and --batch-size must be positive.')
+
+        qn = connection.ops.quote_name
+        id_field = models.UUIDField()
+        id_type = id_field.db_type(connection)
+        self.stdout.write(f'{connection.vendor} database, {options["rows"]} rows in batches of {options["batch_size"]}')
+        self.stdout.write(f'{"key":<6} {"rows/s":>10} {"seconds":>9} {"pk index":>12}')
+
+        for name, generate in GENERATORS:
+            table = f'uuid_benchmark_{name}'
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE IF EXISTS {qn(table)}')
+                cursor.execute(f'CREATE TABLE {qn(table)} (id {id_type} PRIMARY KEY, payload varchar(64) NOT NULL)')
+                try:
+                    started = time.perf_counter()
+                    for start in range(0, options['rows'], options['batch_size']):
+                        count = min(options['batch_size'], options['rows'] - start)
+                        with transaction.atomic():
+                            cursor.executemany(
+                                f'INSERT INTO {qn(table)} (id, payload) VALUES (%s, %s)',
+                                [(id_field.get_db_prep_value(generate(), connection), 'sale') for _ in range(count)]
+                            )
+                    elapsed = time.perf_counter() - started
+                    size = primary_key_size(cursor, table)
+                finally:
+                    cursor.execute(f'DROP TABLE {qn(table)}')
+
+            size = f'{size / 1024 / 1024:.1f} MiB' if size is not None else '-'
+            self.stdout.write(f'{name:<6} {options["rows"] / elapsed:>10.0f} {elapsed:>9.2f} {size:>12}')
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from Thoneti.utils import expire_stale_milk_requests
+
+
+class Command(BaseCommand):
+    help = 'Expire pending milk requests older than MILK_REQUEST_EXPIRY_HOURS and notify their senders.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Expired {expire_stale_milk_requests()} milk requests.')
@@ -0,0 +1,338 @@
+import math
+import random
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from Thoneti.models import (
+    User, Manager, Location, Seller, Employee, DailyOperations, FeedRecord, ExpenseRecord,
+    MedicineRecord, MilkDistribution, SystemMilkDistribution, Attendance, Salary, MilkReceived,
+    DailyTotal, Sale, MilkRequest, BorrowLendRecord, Notification
+)
+
+
+CENT = Decimal('0.01')
+
+FEED_TYPES = ['Green fodder', 'Dry fodder', 'Cattle feed', 'Mineral mix']
+EXPENSE_CATEGORIES = ['Electricity', 'Transport', 'Repairs', 'Water', 'Labour']
+MEDICINES = ['Calcium supplement', 'Dewormer', 'Antibiotic', 'Vitamin mix']
+CUSTOMERS = ['Lakshmi', 'Ravi', 'Meena', 'Suresh', 'Kavya', 'Arjun', 'Priya', 'Gopal']
+
+# Parents come before children so every flush satisfies foreign keys.
+INSERT_ORDER = [
+    User, Manager, Location, Seller, Employee, DailyOperations, FeedRecord, ExpenseRecord,
+    MedicineRecord, MilkDistribution, Attendance, Salary, MilkReceived, Sale, DailyTotal,
+    MilkRequest, BorrowLendRecord, Notification
+]
+
+
+def money(value):
+    return Decimal(str(value)).quantize(CENT)
+
+
+@contextmanager
+def explicit_timestamps(models):
+    # auto_now/auto_now_add would stamp every historical row with the time of the run.
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class BulkWriter:
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.pending = defaultdict(list)
+        self.size = 0
+        self.counts = Counter()
+
+    def add(self, obj):
+        self.pending[type(obj)].append(obj)
+        self.size += 1
+        if self.size >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        with transaction.atomic():
+            for model in INSERT_ORDER:
+                rows = self.pending.pop(model, [])
+                if rows:
+                    model.objects.bulk_create(rows, batch_size=self.batch_size)
+                    self.counts[model.__name__] += len(rows)
+        self.size = 0
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic farm (people, locations and years of daily records) for load testing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--managers', type=int, default=2)
+        parser.add_argument('--employees', type=int, default=10, help='Employees per manager.')
+        parser.add_argument('--locations', type=int, default=6)
+        parser.add_argument('--sellers', type=int, default=8, help='Sellers per location.')
+        parser.add_argument('--years', type=float, default=1.0, help='Years of daily records ending today.')
+        parser.add_argument('--request-rate', type=float, default=0.04,
+                            help='Chance that a seller borrows milk from a neighbour on a given day.')
+        parser.add_argument('--prefix', default='farm', help='Username prefix for the generated users.')
+        parser.add_argument('--password', help='Password for every generated user (unusable if omitted).')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.prefix = options['prefix']
+        self.password = make_password(options['password'])
+        self.writer = BulkWriter(options['batch_size'])
+
+        if User.objects.filter(username__startswith=f'{self.prefix}-').exists():
+            raise CommandError(f"Users prefixed '{self.prefix}-' already exist; pass a different --prefix.")
+
+        self.today = timezone.localdate()
+        day_count = max(1, round(options['years'] * 365))
+        start = self.today - timedelta(days=day_count - 1)
+
+        started = time.perf_counter()
+        with explicit_timestamps(INSERT_ORDER):
+            self.create_people(options, start)
+            for offset in range(day_count):
+                self.create_day(start + timedelta(days=offset), options['request_rate'])
+            self.create_salaries()
+            self.writer.flush()
+        self.refresh_system_distribution(start)
+
+        for name, count in sorted(self.writer.counts.items()):
+            self.stdout.write(f'{name}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {day_count} days for {len(self.sellers)} sellers in {time.perf_counter() - started:.1f}s.'
+        ))
+
+    def stamp(self, day, hour, minute=0):
+        return timezone.make_aware(datetime(day.year, day.month, day.day, hour, minute))
+
+    def new_user(self, role, name, created_at):
+        user = User(
+            username=f'{self.prefix}-{name}', password=self.password, role=role, created_at=created_at
+        )
+        self.writer.add(user)
+        return user
+
+    def next_number(self, model, field, prefix):
+        last = model.objects.filter(**{f'{field}__startswith': prefix}).order_by(f'-{field}').values_list(
+            field, flat=True
+        ).first()
+        try:
+            return int(last[len(prefix):]) + 1 if last else 1
+        except ValueError:
+            return 1
+
+    def create_people(self, options, start):
+        rng = self.rng
+        joined = self.stamp(start - timedelta(days=1), 9)
+
+        manager_number = self.next_number(Manager, 'manager_id', 'manager')
+        employee_number = self.next_number(Employee, 'employee_id', 'EMP')
+        if manager_number + options['managers'] > 1000:
+            raise CommandError('Manager ids only go up to manager999.')
+        if employee_number + options['managers'] * options['employees'] > 1000:
+            raise CommandError('Employee ids only go up to EMP999.')
+
+        self.managers = []
+        self.employees = []
+        for index in range(options['managers']):
+            manager = Manager(
+                manager_id=f'manager{manager_number + index:03d}', name=f'Manager {index + 1}',
+                user=self.new_user('manager', f'manager{index + 1}', joined), created_at=joined
+            )
+            self.writer.add(manager)
+            self.managers.append(manager)
+            for _ in range(options['employees']):
+                number = employee_number + len(self.employees)
+                employee = Employee(
+                    employee_id=f'EMP{number:03d}', name=f'Employee {number}',
+                    base_salary=money(rng.uniform(400, 700)), manager=manager,
+                    user=self.new_user('employee', f'employee{number}', joined),
+                    created_at=joined, updated_at=joined
+                )
+                self.writer.add(employee)
+                self.employees.append(employee)
+
+        self.sellers = []
+        self.neighbours = defaultdict(list)
+        for index in range(options['locations']):
+            location = Location(
+                location_name=f'Village {index + 1}', address=f'{index + 1} Main Road', created_at=joined
+            )
+            self.writer.add(location)
+            price = rng.uniform(50, 60)
+            for _ in range(options['sellers']):
+                number = len(self.sellers) + 1
+                seller = Seller(
+                    name=f'Seller {number}', location=location,
+                    user=self.new_user('seller', f'seller{number}', joined), created_at=joined
+                )
+                # Daily volumes are skewed: a few large sellers, many small ones.
+                seller.base_litres = rng.lognormvariate(math.log(35), 0.35)
+                seller.price = price
+                seller.manager = self.managers[len(self.sellers) % len(self.managers)]
+                self.writer.add(seller)
+                self.sellers.append(seller)
+                self.neighbours[location.location_id].append(seller)
+
+        self.present_days = Counter()
+        # Employees get their auto-increment ids on insert, before attendance refers to them.
+        self.writer.flush()
+
+    def create_day(self, day, request_rate):
+        rng = self.rng
+        is_today = day == self.today
+        season = 1 + 0.15 * math.sin(2 * math.pi * day.timetuple().tm_yday / 365)
+        weekday = 1.1 if day.weekday() >= 5 else 1.0
+
+        distributed = defaultdict(Decimal)
+        for seller in self.sellers:
+            litres = seller.base_litres * season * weekday * rng.gauss(1, 0.08)
+            quantity = money(max(litres, 1))
+            distributed[seller.manager.manager_id] += quantity
+            status = 'pending' if is_today else ('received' if rng.random() < 0.98 else 'not_received')
+            self.writer.add(MilkReceived(
+                seller=seller, manager=seller.manager, quantity=quantity, date=day, source='From Farm',
+                status=status, created_at=self.stamp(day, 5, rng.randint(0, 59)),
+                updated_at=self.stamp(day, 6, rng.randint(0, 59))
+            ))
+            self.writer.add(Notification(
+                user=seller.user, is_read=not is_today,
+                message=f'You have a pending milk delivery of {quantity:.2f}L from your manager for {day}.',
+                timestamp=self.stamp(day, 5), updated_at=self.stamp(day, 5)
+            ))
+            if status == 'received':
+                self.create_sales(seller, day, quantity)
+            if rng.random() < request_rate and len(self.neighbours[seller.location.location_id]) > 1:
+                self.create_borrowing(seller, day)
+
+        for manager in self.managers:
+            self.create_operations(manager, day, distributed[manager.manager_id])
+        for employee in self.employees:
+            present = rng.random() < (0.7 if day.weekday() == 6 else 0.92)
+            if present:
+                self.present_days[(employee, day.strftime('%Y-%m'))] += 1
+            self.writer.add(Attendance(
+                employee=employee, date=day, status='present' if present else 'absent',
+                created_at=self.stamp(day, 8), updated_at=self.stamp(day, 8)
+            ))
+
+    def create_sales(self, seller, day, quantity):
+        rng = self.rng
+        sold = float(quantity) * rng.uniform(0.85, 1.0)
+        weights = [rng.random() for _ in range(rng.randint(3, 12))]
+        revenue = Decimal('0.00')
+        for weight in weights:
+            litres = money(sold * weight / sum(weights))
+            amount = money(float(litres) * seller.price)
+            revenue += amount
+            self.writer.add(Sale(
+                seller=seller, date=day, quantity=litres, total_amount=amount,
+                customer_name=rng.choice(CUSTOMERS) if rng.random() < 0.4 else None,
+                created_at=self.stamp(day, rng.randint(6, 20), rng.randint(0, 59))
+            ))
+        cash = money(float(revenue) * rng.uniform(0.5, 0.85))
+        self.writer.add(DailyTotal(
+            seller=seller, date=day, cash_sales=cash, online_sales=revenue - cash, revenue=revenue,
+            created_at=self.stamp(day, 21), updated_at=self.stamp(day, 21)
+        ))
+
+    def create_borrowing(self, borrower, day):
+        rng = self.rng
+        lender = rng.choice([s for s in self.neighbours[borrower.location.location_id] if s is not borrower])
+        quantity = money(rng.uniform(2, 10))
+        requested_at = self.stamp(day, rng.randint(7, 18), rng.randint(0, 59))
+        age = (self.today - day).days
+
+        if age == 0:
+            self.writer.add(MilkRequest(
+                from_seller=borrower, quantity=quantity, status='pending',
+                created_at=requested_at, updated_at=requested_at
+            ))
+            return
+
+        # Recent loans are still open; a tail of older ones was never marked received.
+        received = age > 2 and rng.random() < 0.9
+        milk_request = MilkRequest(
+            from_seller=borrower, to_seller=lender, quantity=quantity,
+            status='received' if received else 'on_hold', created_at=requested_at, updated_at=requested_at
+        )
+        self.writer.add(milk_request)
+        self.writer.add(BorrowLendRecord(
+            borrower_seller=borrower, lender_seller=lender, quantity=quantity, borrow_date=day,
+            settled=received, request=milk_request, created_at=requested_at, updated_at=requested_at
+        ))
+        if received:
+            self.writer.add(MilkReceived(
+                seller=borrower, quantity=quantity, date=day, source='Inter Seller', status='received',
+                created_at=requested_at, updated_at=requested_at
+            ))
+
+    def create_operations(self, manager, day, total_milk):
+        rng = self.rng
+        recorded_at = self.stamp(day, 19)
+        operations = DailyOperations(date=day, manager=manager, created_at=recorded_at)
+        self.writer.add(operations)
+        for feed_type in rng.sample(FEED_TYPES, rng.randint(1, 2)):
+            quantity = rng.uniform(50, 200)
+            self.writer.add(FeedRecord(
+                date=day, feed_type=feed_type, quantity=money(quantity), cost=money(quantity * rng.uniform(18, 25)),
+                record=operations, created_at=recorded_at, updated_at=recorded_at
+            ))
+        if rng.random() < 0.35:
+            self.writer.add(ExpenseRecord(
+                date=day, category=rng.choice(EXPENSE_CATEGORIES), amount=money(rng.uniform(200, 3000)),
+                record=operations, created_at=recorded_at, updated_at=recorded_at
+            ))
+        if rng.random() < 0.08:
+            self.writer.add(MedicineRecord(
+                date=day, medicine_name=rng.choice(MEDICINES), cost=money(rng.uniform(150, 1500)),
+                record=operations, created_at=recorded_at, updated_at=recorded_at
+            ))
+        leftover = money(float(total_milk) * rng.uniform(0, 0.03))
+        self.writer.add(MilkDistribution(
+            date=day, total_milk=total_milk, leftover_milk=leftover,
+            leftover_sales=money(float(leftover) * rng.uniform(30, 45)),
+            record=operations, created_at=recorded_at, updated_at=recorded_at
+        ))
+
+    def create_salaries(self):
+        months = sorted({month for _, month in self.present_days})
+        for employee in self.employees:
+            for month in months:
+                days_worked = self.present_days[(employee, month)]
+                paid_at = self.stamp(datetime.strptime(f'{month}-01', '%Y-%m-%d').date(), 10)
+                salary = Salary(
+                    employee=employee, month=month, base_salary=employee.base_salary, days_worked=days_worked,
+                    created_at=paid_at, updated_at=paid_at
+                )
+                salary.calculate_final_salary()
+                self.writer.add(salary)
+
+    def refresh_system_distribution(self, start):
+        # bulk_create skips the post_save signal that normally keeps these totals.
+        totals = MilkReceived.objects.filter(date__gte=start).values('date').annotate(total=Sum('quantity'))
+        with transaction.atomic():
+            SystemMilkDistribution.objects.filter(date__gte=start).delete()
+            SystemMilkDistribution.objects.bulk_create(
+                [SystemMilkDistribution(date=row['date'], total_milk=row['total']) for row in totals]
+            )
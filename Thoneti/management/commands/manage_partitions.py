@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from Thoneti.partitioning import PARTITIONED_TABLES, list_partitions, partition_all
+
+
+class Command(BaseCommand):
+    help = 'Create the coming monthly partitions of the time-keyed tables on Postgres.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead', type=int, default=settings.PARTITION_MONTHS_AHEAD,
+            help='Months after the current one to create partitions for.'
+        )
+        parser.add_argument('--status', action='store_true', help='List the partitions and their estimated rows.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(f'Partitioning needs Postgres; the {connection.vendor} tables stay unpartitioned.')
+            return
+        if options['ahead'] < 0:
+            raise CommandError('--ahead cannot be negative.')
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            created = partition_all(cursor, options['ahead'], convert=settings.DB_PARTITIONING)
+            for table in PARTITIONED_TABLES:
+                if table not in created:
+                    self.stdout.write(f'{table}: not partitioned, set DB_PARTITIONING=True to convert it')
+                    continue
+                names = ', '.join(created[table]) or 'none'
+                self.stdout.write(f'{table}: created {names}')
+                if options['status']:
+                    for name, bound, rows in list_partitions(cursor, table):
+                        self.stdout.write(f'    {name:<32} {bound:<60} ~{max(rows, 0)} rows')
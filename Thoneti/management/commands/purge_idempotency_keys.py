@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from Thoneti.middleware import purge_expired_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = 'Delete Idempotency-Key records older than IDEMPOTENCY_KEY_TTL_HOURS.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Deleted {purge_expired_idempotency_keys()} idempotency keys.')
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from Thoneti.sync import purge_expired_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Deleted {purge_expired_tombstones()} tombstones.')
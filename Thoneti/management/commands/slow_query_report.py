@@ -0,0 +1,68 @@
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+SORT_KEYS = {
+    'total': lambda group: group['total_ms'],
+    'max': lambda group: group['max_ms'],
+    'count': lambda group: group['count'],
+}
+
+
+class Command(BaseCommand):
+    help = 'Rank the slow queries captured in SLOW_QUERY_LOG by normalized SQL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', help='Capture file to read. Defaults to SLOW_QUERY_LOG.')
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--sort', choices=sorted(SORT_KEYS), default='total')
+        parser.add_argument('--view', help='Only queries run by this URL name.')
+        parser.add_argument('--no-plans', action='store_true', help='Leave out the EXPLAIN plans.')
+
+    def handle(self, *args, **options):
+        path = options['log'] or settings.SLOW_QUERY_LOG
+        if not path:
+            raise CommandError('Pass --log or set SLOW_QUERY_LOG.')
+
+        groups = defaultdict(lambda: {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'views': defaultdict(int)})
+        try:
+            with open(path) as log:
+                for line in log:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if options['view'] and entry['view'] != options['view']:
+                        continue
+                    group = groups[entry['sql']]
+                    group['count'] += 1
+                    group['total_ms'] += entry['duration_ms']
+                    group['views'][entry['view']] += 1
+                    if entry['duration_ms'] >= group['max_ms']:
+                        group['max_ms'] = entry['duration_ms']
+                        group['plan'] = entry['plan']
+        except FileNotFoundError:
+            raise CommandError(f'No capture file at {path}.')
+
+        ranked = sorted(groups.items(), key=lambda item: SORT_KEYS[options['sort']](item[1]), reverse=True)
+        if not ranked:
+            self.stdout.write('No slow queries captured.')
+            return
+
+        for rank, (sql, group) in enumerate(ranked[:options['limit']], start=1):
+            views = ', '.join(
+                f'{view} ({count})' for view, count in sorted(group['views'].items(), key=lambda item: -item[1])
+            )
+            self.stdout.write(
+                f"#{rank}  {group['count']} runs, {group['total_ms']:.1f}ms total, "
+                f"{group['total_ms'] / group['count']:.1f}ms mean, {group['max_ms']:.1f}ms max"
+            )
+            self.stdout.write(f'    views: {views}')
+            self.stdout.write(f'    {sql}')
+            if group.get('plan') and not options['no_plans']:
+                for line in group['plan'].splitlines():
+                    self.stdout.write(f'      | {line}')
+            self.stdout.write('')
@@ -0,0 +1,198 @@
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class MetricsRegistry:
+    """Per-process request metrics.
+
+    Recording only touches in-memory counters. With METRICS_DIR set, each
+    worker also writes a snapshot there at most every METRICS_FLUSH_SECONDS,
+    and rendering merges the snapshots of all workers, so any worker can
+    answer a scrape for the whole gunicorn server.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.durations = {}
+        self.db_queries = defaultdict(int)
+        self.db_seconds = defaultdict(float)
+        self.in_flight = 0
+        self.last_flush = 0.0
+
+    def request_started(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def request_finished(self, view, method, status_code, duration, db_queries=0, db_seconds=0.0):
+        with self.lock:
+            self.in_flight -= 1
+            self.requests[(view, method, str(status_code))] += 1
+            if status_code >= 500:
+                self.errors[view] += 1
+            histogram = self.durations.get(view)
+            if histogram is None:
+                histogram = self.durations[view] = [[0] * (len(DURATION_BUCKETS) + 1), 0.0]
+            histogram[0][bisect.bisect_left(DURATION_BUCKETS, duration)] += 1
+            histogram[1] += duration
+            self.db_queries[view] += db_queries
+            self.db_seconds[view] += db_seconds
+
+            # Decided under the lock so only one thread writes each snapshot.
+            directory = settings.METRICS_DIR
+            now = time.monotonic()
+            due = directory and now - self.last_flush >= settings.METRICS_FLUSH_SECONDS
+            if due:
+                self.last_flush = now
+
+        if due:
+            try:
+                self.flush(directory)
+            except OSError:
+                logger.exception('Could not write the metrics snapshot to %s', directory)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'pid': os.getpid(),
+                'requests': [[*key, count] for key, count in self.requests.items()],
+                'errors': [[view, count] for view, count in self.errors.items()],
+                'durations': [[view, list(buckets), total] for view, (buckets, total) in self.durations.items()],
+                'db': [[view, self.db_queries[view], self.db_seconds[view]] for view in self.db_queries],
+                'in_flight': self.in_flight,
+            }
+
+    def flush(self, directory):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        temporary = directory / f'.{os.getpid()}.{threading.get_ident()}.json.tmp'
+        temporary.write_text(json.dumps(self.snapshot()))
+        os.replace(temporary, directory / f'{os.getpid()}.json')
+
+    def collect(self):
+        snapshots = [self.snapshot()]
+        directory = settings.METRICS_DIR
+        if directory and os.path.isdir(directory):
+            for path in Path(directory).glob('*.json'):
+                try:
+                    snapshot = json.loads(path.read_text())
+                except (OSError, ValueError):
+                    continue
+                if snapshot.get('pid') != os.getpid():
+                    snapshots.append(snapshot)
+        return snapshots
+
+    def render(self):
+        requests = defaultdict(int)
+        errors = defaultdict(int)
+        durations = {}
+        db_queries = defaultdict(int)
+        db_seconds = defaultdict(float)
+        in_flight = 0
+
+        for snapshot in self.collect():
+            for view, method, status_code, count in snapshot['requests']:
+                requests[(view, method, status_code)] += count
+            for view, count in snapshot['errors']:
+                errors[view] += count
+            for view, buckets, total in snapshot['durations']:
+                merged = durations.setdefault(view, [[0] * (len(DURATION_BUCKETS) + 1), 0.0])
+                merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                merged[1] += total
+            for view, queries, seconds in snapshot['db']:
+                db_queries[view] += queries
+                db_seconds[view] += seconds
+            # Counters of exited workers still count; their in-flight requests do not.
+            if snapshot['pid'] == os.getpid() or _pid_alive(snapshot['pid']):
+                in_flight += snapshot['in_flight']
+
+        lines = [
+            '# HELP thoneti_http_requests_total Requests handled, by view, method and status.',
+            '# TYPE thoneti_http_requests_total counter',
+        ]
+        for (view, method, status_code), count in sorted(requests.items()):
+            lines.append(f'thoneti_http_requests_total{_labels(view=view, method=method, status=status_code)} {count}')
+
+        lines += [
+            '# HELP thoneti_http_request_duration_seconds Time to produce a response, by view.',
+            '# TYPE thoneti_http_request_duration_seconds histogram',
+        ]
+        for view, (buckets, total) in sorted(durations.items()):
+            cumulative = 0
+            for bound, count in zip([*DURATION_BUCKETS, '+Inf'], buckets):
+                cumulative += count
+                lines.append(f'thoneti_http_request_duration_seconds_bucket{_labels(view=view, le=bound)} {cumulative}')
+            lines.append(f'thoneti_http_request_duration_seconds_sum{_labels(view=view)} {total}')
+            lines.append(f'thoneti_http_request_duration_seconds_count{_labels(view=view)} {cumulative}')
+
+        lines += [
+            '# HELP thoneti_http_errors_total Responses with a 5xx status, by view.',
+            '# TYPE thoneti_http_errors_total counter',
+        ]
+        for view, count in sorted(errors.items()):
+            lines.append(f'thoneti_http_errors_total{_labels(view=view)} {count}')
+
+        lines += [
+            '# HELP thoneti_db_queries_total Database queries run, by view.',
+            '# TYPE thoneti_db_queries_total counter',
+        ]
+        for view, count in sorted(db_queries.items()):
+            lines.append(f'thoneti_db_queries_total{_labels(view=view)} {count}')
+
+        lines += [
+            '# HELP thoneti_db_duration_seconds_total Time spent in database queries, by view.',
+            '# TYPE thoneti_db_duration_seconds_total counter',
+        ]
+        for view, seconds in sorted(db_seconds.items()):
+            lines.append(f'thoneti_db_duration_seconds_total{_labels(view=view)} {seconds}')
+
+        lines += [
+            '# HELP thoneti_http_requests_in_flight Requests currently being handled.',
+            '# TYPE thoneti_http_requests_in_flight gauge',
+            f'thoneti_http_requests_in_flight {in_flight}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+def metrics_access_allowed(request):
+    token = settings.METRICS_TOKEN
+    if token and request.META.get('HTTP_AUTHORIZATION') == f'Bearer {token}':
+        return True
+    # Behind a local proxy every client arrives from 127.0.0.1, so outside
+    # DEBUG only the token grants access.
+    return settings.DEBUG and request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
@@ -0,0 +1,317 @@
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .metrics import REGISTRY
+from .models import IdempotencyKey
+from .profiling import save_profile, should_profile, start_profiler
+
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+
+# A reservation that never received its response (worker crash, timeout)
+# stops blocking retries after this long.
+IN_PROGRESS_TIMEOUT = timedelta(minutes=1)
+
+# Authentication failures and server errors are not pinned to the key,
+# so a retry after logging in again or after an outage runs the view.
+UNSTORED_STATUSES = {401, 403}
+
+
+def _request_hash(request):
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.get_full_path().encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def idempotency_key_cutoff():
+    return timezone.now() - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+
+
+def purge_expired_idempotency_keys():
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=idempotency_key_cutoff()).delete()
+    return deleted
+
+
+def _reserve_key(user, key, request_hash):
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(user=user, key=key, request_hash=request_hash), None
+    except IntegrityError:
+        pass
+
+    existing = IdempotencyKey.objects.get(user=user, key=key)
+    if existing.created_at < idempotency_key_cutoff():
+        # Expired but not purged yet: the key is free for a new request.
+        reused = IdempotencyKey.objects.filter(pk=existing.pk, created_at=existing.created_at).update(
+            request_hash=request_hash, status_code=None, response_body='', content_type='', created_at=now
+        )
+        if reused:
+            existing.refresh_from_db()
+            return existing, None
+        return None, JsonResponse(
+            {'message': 'A request with this Idempotency-Key is still being processed.'}, status=409
+        )
+
+    if existing.request_hash != request_hash:
+        return None, JsonResponse(
+            {'message': 'This Idempotency-Key was already used for a different request.'}, status=422
+        )
+    if existing.status_code is not None:
+        replay = HttpResponse(existing.response_body, status=existing.status_code, content_type=existing.content_type)
+        replay['Idempotent-Replayed'] = 'true'
+        return None, replay
+
+    # Take over a stale reservation only if nobody else has in the meantime.
+    taken_over = IdempotencyKey.objects.filter(
+        pk=existing.pk, status_code__isnull=True, created_at__lt=now - IN_PROGRESS_TIMEOUT
+    ).update(created_at=now)
+    if taken_over:
+        existing.created_at = now
+        return existing, None
+    return None, JsonResponse(
+        {'message': 'A request with this Idempotency-Key is still being processed.'}, status=409
+    )
+
+
+class IdempotencyMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = request.META.get(IDEMPOTENCY_HEADER)
+        if request.method != 'POST' or not key or not request.user.is_authenticated:
+            return self.get_response(request)
+        if len(key) > 255:
+            return JsonResponse({'message': 'Idempotency-Key must be at most 255 characters.'}, status=400)
+
+        record, early_response = _reserve_key(request.user, key, _request_hash(request))
+        if early_response is not None:
+            return early_response
+
+        response = self.get_response(request)
+
+        if response.status_code >= 500 or response.status_code in UNSTORED_STATUSES or response.streaming:
+            record.delete()
+            return response
+
+        record.status_code = response.status_code
+        record.response_body = response.content.decode()
+        record.content_type = response.get('Content-Type', '')
+        record.save(update_fields=['status_code', 'response_body', 'content_type'])
+        return response
+
+
+# Collapses IN (%s, %s, ...) lists so the same query with a different
+# number of ids still counts as one fingerprint.
+IN_LIST_PATTERN = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_fingerprint(sql):
+    return IN_LIST_PATTERN.sub('IN (...)', sql)
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[query_fingerprint(sql)] += 1
+
+    def duplicates(self):
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count > 1]
+
+
+class QueryBudgetMiddleware:
+    """Counts the queries of each request against QUERY_BUDGETS, keyed by URL name."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = request.query_stats = QueryStats()
+        with connection.execute_wrapper(stats):
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        if match is None or not match.url_name:
+            return response
+
+        budget = settings.QUERY_BUDGETS.get(match.url_name, settings.QUERY_BUDGET_DEFAULT)
+        logger.debug(
+            '%s %s: %d queries in %.1fms', request.method, match.url_name, stats.count, stats.duration * 1000
+        )
+        if stats.count <= budget:
+            return response
+
+        duplicates = stats.duplicates()
+        message = (
+            f'{request.method} {match.url_name} ran {stats.count} queries '
+            f'({stats.duration * 1000:.1f}ms), over its budget of {budget}.'
+        )
+        if duplicates:
+            message += ' Repeated: ' + '; '.join(f'{count}x {sql}' for sql, count in duplicates[:5])
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+        return response
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        REGISTRY.request_started()
+        started = time.perf_counter()
+        status_code = 500
+        try:
+            response = self.get_response(request)
+            status_code = response.status_code
+            return response
+        finally:
+            match = request.resolver_match
+            stats = getattr(request, 'query_stats', None)
+            REGISTRY.request_finished(
+                match.url_name if match is not None and match.url_name else 'unresolved',
+                request.method,
+                status_code,
+                time.perf_counter() - started,
+                stats.count if stats else 0,
+                stats.duration if stats else 0.0,
+            )
+
+
+class ProfilingMiddleware:
+    """Profiles a sample of requests, and any request with a valid X-Profile header.
+
+    Without PROFILING_DIR the middleware removes itself from the chain.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_DIR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profiler = start_profiler() if should_profile(request) else None
+        if profiler is None:
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.url_name if match is not None and match.url_name else 'unresolved'
+        try:
+            save_profile(profiler, view, request.method, response.status_code, duration)
+        except OSError:
+            logger.exception('Could not save the profile of %s %s', request.method, view)
+        return response
+
+
+class SlowQueryCapture:
+    """Logs queries slower than SLOW_QUERY_THRESHOLD_MS with their EXPLAIN plan.
+
+    Each capture goes to the log and, with SLOW_QUERY_LOG set, is appended to
+    that file as a JSON line for the slow_query_report command.
+    """
+
+    def __init__(self, request):
+        self.request = request
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (time.perf_counter() - start) * 1000
+        if duration_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+            self.capture(context['connection'], sql, params, many, duration_ms)
+        return result
+
+    def explain(self, db, sql, params):
+        # The backend cursor skips the execute wrappers, so neither the EXPLAIN
+        # nor its savepoint is captured again or counted against the query
+        # budget. The savepoint keeps a failed EXPLAIN from breaking the
+        # surrounding transaction.
+        savepoint = db.in_atomic_block
+        cursor = db.create_cursor()
+        try:
+            with db.wrap_database_errors:
+                if savepoint:
+                    cursor.execute('SAVEPOINT slow_query_explain')
+                try:
+                    cursor.execute(f'{db.ops.explain_query_prefix()} {sql}', params)
+                    return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+                except DatabaseError as error:
+                    if savepoint:
+                        cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+                    return f'EXPLAIN failed: {error}'
+                finally:
+                    if savepoint:
+                        cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+        finally:
+            cursor.close()
+
+    def capture(self, db, sql, params, many, duration_ms):
+        match = self.request.resolver_match
+        is_select = sql.lstrip().upper().startswith(('SELECT', 'WITH'))
+        entry = {
+            'time': timezone.now().isoformat(),
+            'view': match.url_name if match is not None and match.url_name else 'unresolved',
+            'method': self.request.method,
+            'duration_ms': round(duration_ms, 3),
+            'sql': query_fingerprint(sql),
+            'plan': self.explain(db, sql, params) if is_select and not many else None,
+        }
+        logger.warning(
+            'Slow query in %s %s (%.1fms): %s\n%s',
+            entry['method'], entry['view'], duration_ms, entry['sql'], entry['plan'] or '',
+        )
+        if settings.SLOW_QUERY_LOG:
+            try:
+                with open(settings.SLOW_QUERY_LOG, 'a') as log:
+                    log.write(json.dumps(entry) + '\n')
+            except OSError:
+                logger.exception('Could not write to SLOW_QUERY_LOG')
+
+
+class SlowQueryMiddleware:
+    def __init__(self, get_response):
+        if settings.SLOW_QUERY_THRESHOLD_MS is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with connection.execute_wrapper(SlowQueryCapture(request)):
+            return self.get_response(request)
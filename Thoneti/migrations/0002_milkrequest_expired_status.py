@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Thoneti', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='milkrequest',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('on_hold', 'On Hold'), ('received', 'Received'), ('rejected', 'Rejected'), ('expired', 'Expired')], default='pending', max_length=20),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Thoneti', '0002_milkrequest_expired_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sale',
+            name='client_id',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterUniqueTogether(
+            name='sale',
+            unique_together={('seller', 'client_id')},
+        ),
+    ]
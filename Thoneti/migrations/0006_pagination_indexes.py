@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Thoneti', '0005_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='borrowlendrecord',
+            index=models.Index(fields=['borrower_seller', 'created_at', 'record_id'], name='borrowlend_borrower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrowlendrecord',
+            index=models.Index(fields=['lender_seller', 'created_at', 'record_id'], name='borrowlend_lender_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['manager', 'created_at', 'id'], name='employee_manager_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='manager',
+            index=models.Index(fields=['created_at', 'manager_id'], name='manager_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='milkreceived',
+            index=models.Index(fields=['seller', 'date', 'receipt_id'], name='milkreceived_seller_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='milkreceived',
+            index=models.Index(fields=['manager', 'date', 'receipt_id'], name='milkreceived_manager_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='milkrequest',
+            index=models.Index(fields=['from_seller', 'created_at', 'request_id'], name='milkrequest_from_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seller',
+            index=models.Index(fields=['created_at', 'seller_id'], name='seller_created_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Thoneti', '0006_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='borrowlendrecord',
+            index=models.Index(fields=['lender_seller', 'settled', 'borrow_date'], name='borrowlend_lender_settled_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrowlendrecord',
+            index=models.Index(condition=models.Q(('settled', False)), fields=['borrower_seller', 'lender_seller'], name='borrowlend_unsettled_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='milkreceived',
+            index=models.Index(fields=['seller', 'status', 'date'], name='milkreceived_seller_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='milkreceived',
+            index=models.Index(fields=['date', 'source'], name='milkreceived_date_source_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='milkreceived',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['manager', 'date', 'receipt_id'], name='milkreceived_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='milkrequest',
+            index=models.Index(fields=['status', 'created_at'], name='milkrequest_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'timestamp'], name='notification_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['seller', 'date', 'created_at'], name='sale_seller_date_idx'),
+        ),
+    ]
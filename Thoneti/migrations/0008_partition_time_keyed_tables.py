@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.db import migrations
+
+from Thoneti.partitioning import partition_all
+
+
+def partition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql' or not settings.DB_PARTITIONING:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        partition_all(cursor, settings.PARTITION_MONTHS_AHEAD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Thoneti', '0007_hot_filter_indexes'),
+    ]
+
+    operations = [
+        # The partitioned tables match the models, so there is nothing to undo.
+        migrations.RunPython(partition_tables, migrations.RunPython.noop),
+    ]
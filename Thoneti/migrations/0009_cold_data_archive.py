@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:43
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Thoneti', '0008_partition_time_keyed_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMonth',
+            fields=[
+                ('archive_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('model', models.CharField(max_length=50)),
+                ('month', models.DateField()),
+                ('row_count', models.IntegerField(default=0)),
+                ('data', models.BinaryField()),
+                ('archived_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'archived_month',
+                'unique_together': {('model', 'month')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AttendanceMonthlySummary',
+            fields=[
+                ('summary_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('month', models.DateField()),
+                ('present', models.IntegerField(default=0)),
+                ('absent', models.IntegerField(default=0)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_attendance', to='Thoneti.employee')),
+            ],
+            options={
+                'db_table': 'attendance_monthly_summary',
+                'unique_together': {('employee', 'month')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SellerMonthlySummary',
+            fields=[
+                ('summary_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('month', models.DateField()),
+                ('milk_received', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('milk_sold', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('sale_count', models.IntegerField(default=0)),
+                ('sales_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('cash_sales', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('online_sales', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to='Thoneti.seller')),
+            ],
+            options={
+                'db_table': 'seller_monthly_summary',
+                'unique_together': {('seller', 'month')},
+            },
+        ),
+    ]
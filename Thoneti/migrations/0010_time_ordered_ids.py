@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:47
+
+import Thoneti.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Thoneti', '0009_cold_data_archive'),
+    ]
+
+    operations = [
+        # The default is applied in Python, so only the model state changes.
+        # This also keeps SQLite from rebuilding each table.
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='attendance',
+                name='attendance_id',
+                field=models.UUIDField(default=Thoneti.ids.time_ordered_id, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='borrowlendrecord',
+                name='record_id',
+                field=models.UUIDField(default=Thoneti.ids.time_ordered_id, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='dailytotal',
+                name='total_id',
+                field=models.UUIDField(default=Thoneti.ids.time_ordered_id, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='idempotencykey',
+                name='idempotency_id',
+                field=models.UUIDField(default=Thoneti.ids.time_ordered_id, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='milkreceived',
+                name='receipt_id',
+                field=models.UUIDField(default=Thoneti.ids.time_ordered_id, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='milkrequest',
+                name='request_id',
+                field=models.UUIDField(default=Thoneti.ids.time_ordered_id, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='notification',
+                name='notification_id',
+                field=models.UUIDField(default=Thoneti.ids.time_ordered_id, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='sale',
+                name='sale_id',
+                field=models.UUIDField(default=Thoneti.ids.time_ordered_id, editable=False, primary_key=True, serialize=False),
+            ),
+            migrations.AlterField(
+                model_name='tombstone',
+                name='tombstone_id',
+                field=models.UUIDField(default=Thoneti.ids.time_ordered_id, editable=False, primary_key=True, serialize=False),
+            ),
+        ]),
+    ]
@@ -1,10 +1,12 @@
 from django.db import models, IntegrityError
+from django.db.models import Q
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.utils import timezone
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 import uuid
 from decimal import Decimal
+from .ids import time_ordered_id
 
 class UserManager(BaseUserManager):
     def create_user(self, username, password=None, role='employee'):
@@ -77,6 +79,9 @@ class Manager(models.Model):
 
     class Meta:
         db_table = 'manager'
+        indexes = [
+            models.Index(fields=['created_at', 'manager_id'], name='manager_created_idx'),
+        ]
 
 
 class Location(models.Model):
@@ -105,6 +110,9 @@ class Seller(models.Model):
 
     class Meta:
         db_table = 'seller'
+        indexes = [
+            models.Index(fields=['created_at', 'seller_id'], name='seller_created_idx'),
+        ]
 
 
 class Employee(models.Model):
@@ -116,6 +124,7 @@ class Employee(models.Model):
     manager = models.ForeignKey(Manager, on_delete=models.CASCADE, related_name='employees')
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def save(self, *args, **kwargs):
         if not self.employee_id:
@@ -135,6 +144,9 @@ class Employee(models.Model):
 
     class Meta:
         db_table = 'employee'
+        indexes = [
+            models.Index(fields=['manager', 'created_at', 'id'], name='employee_manager_created_idx'),
+        ]
 
 
 class Admin(models.Model):
@@ -172,6 +184,7 @@ class FeedRecord(models.Model):
     cost = models.DecimalField(max_digits=10, decimal_places=2)
     record = models.ForeignKey(DailyOperations, on_delete=models.CASCADE, related_name='feed_records')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.feed_type} - {self.date}"
@@ -187,6 +200,7 @@ class ExpenseRecord(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     record = models.ForeignKey(DailyOperations, on_delete=models.CASCADE, related_name='expense_records')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.category} - ₹{self.amount}"
@@ -202,6 +216,7 @@ class MedicineRecord(models.Model):
     cost = models.DecimalField(max_digits=10, decimal_places=2)
     record = models.ForeignKey(DailyOperations, on_delete=models.CASCADE, related_name='medicine_records')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.medicine_name} - {self.date}"
@@ -218,6 +233,7 @@ class MilkDistribution(models.Model):
     leftover_sales = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     record = models.ForeignKey(DailyOperations, on_delete=models.CASCADE, related_name='milk_distribution')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"Distribution - {self.date}"
@@ -246,11 +262,12 @@ class Attendance(models.Model):
         ('absent', 'Absent'),
     ]
 
-    attendance_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    attendance_id = models.UUIDField(primary_key=True, default=time_ordered_id, editable=False)
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='attendances')
     date = models.DateField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.employee.name} - {self.date} - {self.status}"
@@ -302,7 +319,7 @@ class MilkReceived(models.Model):
         ('received', 'Received'),
         ('not_received', 'Not Received'),
     ]
-    receipt_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    receipt_id = models.UUIDField(primary_key=True, default=time_ordered_id, editable=False)
     seller = models.ForeignKey(Seller, on_delete=models.CASCADE, related_name='milk_received')
     manager = models.ForeignKey(Manager, on_delete=models.SET_NULL, null=True, blank=True, related_name='milk_distributed')
     
@@ -311,34 +328,39 @@ class MilkReceived(models.Model):
     source = models.CharField(max_length=50, default='farm')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     def __str__(self):
         return f"{self.seller.name} - {self.quantity}L on {self.date} ({self.status})"
     class Meta:
         db_table = 'milkreceived'
+        indexes = [
+            models.Index(fields=['seller', 'date', 'receipt_id'], name='milkreceived_seller_date_idx'),
+            models.Index(fields=['manager', 'date', 'receipt_id'], name='milkreceived_manager_date_idx'),
+            models.Index(fields=['seller', 'status', 'date'], name='milkreceived_seller_status_idx'),
+            models.Index(fields=['date', 'source'], name='milkreceived_date_source_idx'),
+            models.Index(
+                fields=['manager', 'date', 'receipt_id'], condition=Q(status='pending'),
+                name='milkreceived_pending_idx'
+            ),
+        ]
 
 
 @receiver(post_save, sender=MilkReceived)
 def update_milk_distribution_totals(sender, instance, created, **kwargs):
     if created:
-        from .models import SystemMilkDistribution
-        from .utils import calculate_total_milk_distributed
-        system_dist, created = SystemMilkDistribution.objects.get_or_create(
-            date=instance.date,
-            defaults={'total_milk': Decimal('0.00')}
-        )
-        total_milk = calculate_total_milk_distributed(instance.date)  
-        system_dist.total_milk = total_milk
-        system_dist.save()
+        from .utils import update_system_milk_distribution
+        update_system_milk_distribution(instance.date)
 
 
 class DailyTotal(models.Model):
-    total_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    total_id = models.UUIDField(primary_key=True, default=time_ordered_id, editable=False)
     seller = models.ForeignKey(Seller, on_delete=models.CASCADE, related_name='daily_totals')
     date = models.DateField()
     cash_sales = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     online_sales = models.DecimalField(max_digits=10, decimal_places=2, default=0) 
     revenue = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.seller.name} - {self.date}"
@@ -349,12 +371,13 @@ class DailyTotal(models.Model):
 
 
 class Sale(models.Model):
-    sale_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    sale_id = models.UUIDField(primary_key=True, default=time_ordered_id, editable=False)
     seller = models.ForeignKey(Seller, on_delete=models.CASCADE, related_name='sales')
     date = models.DateField()
     customer_name = models.CharField(max_length=255, blank=True, null=True) 
     quantity = models.DecimalField(max_digits=10, decimal_places=2)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    client_id = models.UUIDField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -362,6 +385,10 @@ class Sale(models.Model):
 
     class Meta:
         db_table = 'sale'
+        unique_together = ['seller', 'client_id']
+        indexes = [
+            models.Index(fields=['seller', 'date', 'created_at'], name='sale_seller_date_idx'),
+        ]
 
 
 class MilkRequest(models.Model):
@@ -370,25 +397,30 @@ class MilkRequest(models.Model):
         ('on_hold', 'On Hold'),
         ('received', 'Received'),
         ('rejected', 'Rejected'),
+        ('expired', 'Expired'),
     ]
 
-    request_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    request_id = models.UUIDField(primary_key=True, default=time_ordered_id, editable=False)
     from_seller = models.ForeignKey(Seller, on_delete=models.CASCADE, related_name='sent_requests')
     to_seller = models.ForeignKey(Seller, on_delete=models.SET_NULL, null=True, blank=True, related_name='received_requests')
     quantity = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"Request from {self.from_seller.name} - {self.quantity}L"
 
     class Meta:
         db_table = 'milkrequest'
+        indexes = [
+            models.Index(fields=['from_seller', 'created_at', 'request_id'], name='milkrequest_from_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='milkrequest_status_created_idx'),
+        ]
 
 
 class BorrowLendRecord(models.Model):
-    record_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    record_id = models.UUIDField(primary_key=True, default=time_ordered_id, editable=False)
     borrower_seller = models.ForeignKey(Seller, on_delete=models.CASCADE, related_name='borrowed_records')
     lender_seller = models.ForeignKey(Seller, on_delete=models.CASCADE, related_name='lent_records')
     quantity = models.DecimalField(max_digits=10, decimal_places=2)
@@ -396,19 +428,30 @@ class BorrowLendRecord(models.Model):
     settled = models.BooleanField(default=False)
     request = models.ForeignKey(MilkRequest, on_delete=models.CASCADE, related_name='borrow_lend_records')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.borrower_seller.name} borrowed from {self.lender_seller.name}"
 
     class Meta:
         db_table = 'borrowlendrecord'
+        indexes = [
+            models.Index(fields=['borrower_seller', 'created_at', 'record_id'], name='borrowlend_borrower_idx'),
+            models.Index(fields=['lender_seller', 'created_at', 'record_id'], name='borrowlend_lender_idx'),
+            models.Index(fields=['lender_seller', 'settled', 'borrow_date'], name='borrowlend_lender_settled_idx'),
+            models.Index(
+                fields=['borrower_seller', 'lender_seller'], condition=Q(settled=False),
+                name='borrowlend_unsettled_idx'
+            ),
+        ]
 
 
 class Notification(models.Model):
-    notification_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    notification_id = models.UUIDField(primary_key=True, default=time_ordered_id, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
     message = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     is_read = models.BooleanField(default=False)
 
     def __str__(self):
@@ -417,6 +460,94 @@ class Notification(models.Model):
     class Meta:
         db_table = 'notification'
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['user', 'timestamp'], name='notification_user_time_idx'),
+        ]
+
+
+class Tombstone(models.Model):
+    tombstone_id = models.UUIDField(primary_key=True, default=time_ordered_id, editable=False)
+    model = models.CharField(max_length=50)
+    object_id = models.CharField(max_length=64)
+    owner = models.UUIDField(db_index=True)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted"
+
+    class Meta:
+        db_table = 'tombstone'
+
+
+class IdempotencyKey(models.Model):
+    idempotency_id = models.UUIDField(primary_key=True, default=time_ordered_id, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.TextField(blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.key} - {self.status_code or 'in progress'}"
+
+    class Meta:
+        db_table = 'idempotency_key'
+        unique_together = ['user', 'key']
+
+
+class ArchivedMonth(models.Model):
+    archive_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    model = models.CharField(max_length=50)
+    month = models.DateField()  # First day of the month
+    row_count = models.IntegerField(default=0)
+    # gzip-compressed JSON lines, one serialized row per line
+    data = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.model} {self.month:%Y-%m} ({self.row_count} rows)"
+
+    class Meta:
+        db_table = 'archived_month'
+        unique_together = ['model', 'month']
+
+
+class SellerMonthlySummary(models.Model):
+    summary_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    seller = models.ForeignKey(Seller, on_delete=models.CASCADE, related_name='monthly_summaries')
+    month = models.DateField()
+    # Received and pending receipts, as counted in the remaining milk
+    milk_received = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    milk_sold = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    sale_count = models.IntegerField(default=0)
+    sales_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cash_sales = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    online_sales = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.seller.name} - {self.month:%Y-%m}"
+
+    class Meta:
+        db_table = 'seller_monthly_summary'
+        unique_together = ['seller', 'month']
+
+
+class AttendanceMonthlySummary(models.Model):
+    summary_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='monthly_attendance')
+    month = models.DateField()
+    present = models.IntegerField(default=0)
+    absent = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.employee.name} - {self.month:%Y-%m}"
+
+    class Meta:
+        db_table = 'attendance_monthly_summary'
+        unique_together = ['employee', 'month']
 
 
 @receiver(post_save, sender=User)
@@ -0,0 +1,144 @@
+import base64
+import binascii
+import json
+from urllib.parse import urlsplit, urlunsplit
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.urls import reverse
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class EndpointLinkMixin:
+    # Pages embedded in a bootstrap response still link to their own endpoint.
+    url_name = None
+
+    def endpoint_link(self, link):
+        if link is None or self.url_name is None:
+            return link
+        return urlunsplit(urlsplit(link)._replace(path=reverse(self.url_name)))
+
+
+class KeysetPagination(EndpointLinkMixin, BasePagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    ordering = ('-created_at',)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(page_size, self.max_page_size) if page_size > 0 else self.page_size
+
+    def _fields(self):
+        return [name.lstrip('-') for name in self.ordering]
+
+    def decode_cursor(self, cursor, model):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            fields = self._fields()
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            return [model._meta.get_field(name).to_python(value) for name, value in zip(fields, values)]
+        except (ValueError, TypeError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        values = [value.isoformat() if hasattr(value, 'isoformat') else str(value) for value in position]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def _after(self, position):
+        lookup = 'lt' if self.ordering[0].startswith('-') else 'gt'
+        fields = self._fields()
+        condition = Q()
+        for index, name in enumerate(fields):
+            prefix = {field: value for field, value in zip(fields[:index], position[:index])}
+            condition |= Q(**prefix, **{f'{name}__{lookup}': position[index]})
+        return condition
+
+    def _row_key(self, row):
+        if isinstance(row, dict):
+            return tuple(row[name] for name in self._fields())
+        return tuple(getattr(row, name) for name in self._fields())
+
+    def paginate_queryset(self, queryset, request, view=None, key=None):
+        self.request = request
+        limit = self.get_page_size(request)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(cursor, queryset.model)))
+
+        rows = list(queryset.order_by(*self.ordering)[:limit + 1])
+        self.has_next = len(rows) > limit
+        rows = rows[:limit]
+        self.next_position = (key or self._row_key)(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return self.endpoint_link(
+            replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+        )
+
+    def get_paginated_data(self, data):
+        return {'next': self.get_next_link(), 'results': data}
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+
+class BorrowLendHistoryPagination(KeysetPagination):
+    ordering = ('-created_at', '-record_id')
+    url_name = 'borrow-lend-history'
+
+
+class MyRequestsPagination(KeysetPagination):
+    ordering = ('-created_at', '-request_id')
+    url_name = 'list-my-requests'
+
+
+class PendingDistributionPagination(KeysetPagination):
+    ordering = ('-date', '-receipt_id')
+    url_name = 'list-pending-distributions'
+
+
+class ManagerPendingDistributionPagination(PendingDistributionPagination):
+    url_name = 'list-manager-pending-distributions'
+
+
+class EmployeePagination(KeysetPagination):
+    ordering = ('created_at', 'id')
+    url_name = 'list-employees'
+
+
+class SellerPagination(KeysetPagination):
+    ordering = ('created_at', 'seller_id')
+    url_name = 'list-sellers'
+
+
+class ManagerPagination(KeysetPagination):
+    ordering = ('created_at', 'manager_id')
+    url_name = 'list-managers'
+
+
+class IncomingRequestPagination(EndpointLinkMixin, PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    url_name = 'list-incoming-requests'
+
+    def get_next_link(self):
+        return self.endpoint_link(super().get_next_link())
+
+    def get_previous_link(self):
+        return self.endpoint_link(super().get_previous_link())
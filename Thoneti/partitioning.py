@@ -0,0 +1,196 @@
+"""Monthly range partitioning of the time-keyed tables on Postgres.
+
+Each table becomes a partitioned parent with one partition per month and a
+DEFAULT partition for rows outside the created months. Postgres requires the
+partition key in every unique constraint, so the primary key becomes
+(pk, key); the models keep their single-column primary keys and UUIDs stay
+unique. Other unique constraints, such as Sale's (seller, client_id), would
+only hold within one month that way. They move to an unpartitioned guard
+table instead, kept in step by a trigger, so they still hold across months.
+"""
+import re
+from datetime import date
+
+from django.utils import timezone
+
+
+# Table -> (primary key column, partition key column).
+PARTITIONED_TABLES = {
+    'sale': ('sale_id', 'date'),
+    'milkreceived': ('receipt_id', 'date'),
+    'notification': ('notification_id', 'timestamp'),
+}
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y_%m}'
+
+
+def is_partitioned(cursor, table):
+    cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [table])
+    return cursor.fetchone() is not None
+
+
+def list_partitions(cursor, table):
+    """(name, bound expression, estimated rows) for each partition of table."""
+    cursor.execute(
+        'SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint '
+        'FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+        'WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname',
+        [table]
+    )
+    return cursor.fetchall()
+
+
+def create_partition(cursor, table, key, month):
+    """Attach the partition for month, moving its rows out of the DEFAULT partition."""
+    qn = cursor.db.ops.quote_name
+    name = partition_name(table, month)
+    bounds = [month, add_months(month, 1)]
+    cursor.execute(f'CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM {qn(table + "_default")} WHERE {qn(key)} >= %s AND {qn(key)} < %s RETURNING *) '
+        f'INSERT INTO {qn(name)} SELECT * FROM moved',
+        bounds
+    )
+    cursor.execute(f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} FOR VALUES FROM (%s) TO (%s)', bounds)
+    return name
+
+
+def ensure_partitions(cursor, table, key, first_month, last_month):
+    existing = {row[0] for row in list_partitions(cursor, table)}
+    created = []
+    month = first_month
+    while month <= last_month:
+        if partition_name(table, month) not in existing:
+            created.append(create_partition(cursor, table, key, month))
+        month = add_months(month, 1)
+    return created
+
+
+def guard_name(table, columns):
+    return f'{table}_{"_".join(columns)}_guard'
+
+
+def add_unique_guard(cursor, table, columns):
+    """Enforce columns as unique across all partitions of table.
+
+    The guard table holds one row per table row whose columns are all set,
+    so NULLs never conflict, as with a unique constraint. A duplicate fails
+    the guard's primary key with the usual IntegrityError.
+    """
+    qn = cursor.db.ops.quote_name
+    guard = guard_name(table, columns)
+    names = ', '.join(qn(column) for column in columns)
+    set_columns = ' AND '.join(f'{qn(column)} IS NOT NULL' for column in columns)
+
+    cursor.execute(f'CREATE TABLE {qn(guard)} AS SELECT {names} FROM {qn(table)} WHERE {set_columns}')
+    cursor.execute(f'ALTER TABLE {qn(guard)} ADD PRIMARY KEY ({names})')
+    old_values = ', '.join(f'OLD.{qn(column)}' for column in columns)
+    new_values = ', '.join(f'NEW.{qn(column)}' for column in columns)
+    new_set = ' AND '.join(f'NEW.{qn(column)} IS NOT NULL' for column in columns)
+    cursor.execute(f"""
+        CREATE FUNCTION {qn(guard)}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND ROW({old_values}) IS NOT DISTINCT FROM ROW({new_values}) THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM {qn(guard)} WHERE ({names}) = ({old_values});
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND {new_set} THEN
+                INSERT INTO {qn(guard)} ({names}) VALUES ({new_values});
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    cursor.execute(
+        f'CREATE TRIGGER {qn(guard)} AFTER INSERT OR UPDATE OR DELETE ON {qn(table)} '
+        f'FOR EACH ROW EXECUTE FUNCTION {qn(guard)}()'
+    )
+    return guard
+
+
+def convert_table(cursor, table, pk, key, months_ahead):
+    """Rebuild table as a partitioned table holding the same rows, indexes and constraints."""
+    qn = cursor.db.ops.quote_name
+    old = f'{table}_unpartitioned'
+    cursor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(old)}')
+
+    cursor.execute(
+        'SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid '
+        'WHERE x.indrelid = to_regclass(%s) '
+        'AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)',
+        [old]
+    )
+    indexes = cursor.fetchall()
+    cursor.execute(
+        "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u', 'f')",
+        [old]
+    )
+    constraints = cursor.fetchall()
+    cursor.execute(
+        "SELECT array_agg(a.attname ORDER BY k.ord) FROM pg_constraint c "
+        "CROSS JOIN unnest(c.conkey) WITH ORDINALITY k(attnum, ord) "
+        "JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum "
+        "WHERE c.conrelid = to_regclass(%s) AND c.contype = 'u' GROUP BY c.oid",
+        [old]
+    )
+    unique_columns = [columns for columns, in cursor.fetchall()]
+
+    # Index and constraint names are reused on the new table.
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX {qn(name)}')
+    for name, _, _ in constraints:
+        cursor.execute(f'ALTER TABLE {qn(old)} DROP CONSTRAINT {qn(name)}')
+
+    cursor.execute(
+        f'CREATE TABLE {qn(table)} (LIKE {qn(old)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        f'PARTITION BY RANGE ({qn(key)})'
+    )
+    for name, kind, definition in constraints:
+        if kind == 'u':
+            continue  # Guarded below, once the rows are copied.
+        if kind == 'p':
+            definition = f'PRIMARY KEY ({qn(pk)}, {qn(key)})'
+        cursor.execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}')
+    for _, definition in indexes:
+        cursor.execute(re.sub(rf' ON (?:\S+\.)?{re.escape(old)} ', f' ON {qn(table)} ', definition))
+
+    cursor.execute(f'CREATE TABLE {qn(table + "_default")} PARTITION OF {qn(table)} DEFAULT')
+    cursor.execute(f'SELECT min({qn(key)})::date FROM {qn(old)}')
+    oldest = cursor.fetchone()[0]
+    current = timezone.localdate().replace(day=1)
+    first = min(oldest.replace(day=1), current) if oldest else current
+    ensure_partitions(cursor, table, key, first, add_months(current, months_ahead))
+
+    cursor.execute(f'INSERT INTO {qn(table)} SELECT * FROM {qn(old)}')
+    cursor.execute(f'DROP TABLE {qn(old)}')
+    for columns in unique_columns:
+        add_unique_guard(cursor, table, columns)
+
+
+def partition_all(cursor, months_ahead, convert=True):
+    """Partition every table in PARTITIONED_TABLES and create the coming months.
+
+    Returns {table: [created partition names]}. Tables that are not yet
+    partitioned are converted only when convert is True.
+    """
+    current = timezone.localdate().replace(day=1)
+    created = {}
+    for table, (pk, key) in PARTITIONED_TABLES.items():
+        if not is_partitioned(cursor, table):
+            if not convert:
+                continue
+            convert_table(cursor, table, pk, key, months_ahead)
+            created[table] = [name for name, _, _ in list_partitions(cursor, table)]
+        else:
+            created[table] = ensure_partitions(cursor, table, key, current, add_months(current, months_ahead))
+    return created
@@ -0,0 +1,133 @@
+import cProfile
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+TOKEN_SALT = 'thoneti.profiling'
+SAFE_NAME = re.compile(r'^[\w-][\w.-]*$')
+EXTENSIONS = {'cprofile': 'prof', 'sampler': 'collapsed'}
+
+
+def profile_token():
+    """A value for the X-Profile header, valid for PROFILING_TOKEN_MAX_AGE seconds."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign('profile')
+
+
+def token_valid(value):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(value, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def _frame_name(frame):
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+
+class StackSampler:
+    """Samples the stack of the calling thread from a background thread.
+
+    The result is in the collapsed format read by flamegraph.pl and speedscope:
+    one line per distinct stack, root first, followed by its sample count.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self.target = threading.get_ident()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def enable(self):
+        self.thread.start()
+
+    def disable(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def dump_stats(self, path):
+        with open(path, 'w') as output:
+            for stack, count in self.stacks.most_common():
+                output.write(f'{stack} {count}\n')
+
+
+def start_profiler():
+    """A running profiler, or None if another one is already active in this process."""
+    if settings.PROFILING_MODE == 'sampler':
+        profiler = StackSampler(settings.PROFILING_SAMPLE_INTERVAL)
+    else:
+        profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Since Python 3.12 only one cProfile can run at a time, so a
+        # concurrent request in a threaded server goes unprofiled.
+        return None
+    return profiler
+
+
+def save_profile(profiler, view, method, status_code, duration):
+    directory = Path(settings.PROFILING_DIR) / view
+    directory.mkdir(parents=True, exist_ok=True)
+    name = (
+        f"{time.strftime('%Y%m%d-%H%M%S')}-{method}-{status_code}-{duration * 1000:.0f}ms-"
+        f"{uuid.uuid4().hex[:8]}.{EXTENSIONS.get(settings.PROFILING_MODE, 'prof')}"
+    )
+    profiler.dump_stats(directory / name)
+
+    # Keep only the newest files for each view.
+    for old in sorted(directory.iterdir(), key=lambda path: path.stat().st_mtime)[:-settings.PROFILING_KEEP_PER_VIEW]:
+        old.unlink(missing_ok=True)
+    return directory / name
+
+
+def list_profiles():
+    if not settings.PROFILING_DIR or not Path(settings.PROFILING_DIR).is_dir():
+        return []
+    profiles = []
+    for path in Path(settings.PROFILING_DIR).glob('*/*'):
+        stat = path.stat()
+        profiles.append({
+            'view': path.parent.name,
+            'name': path.name,
+            'size': stat.st_size,
+            'modified': datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+        })
+    return sorted(profiles, key=lambda profile: profile['modified'], reverse=True)
+
+
+def profile_path(view, name):
+    """The stored profile for view/name, or None if there is no such file."""
+    if not settings.PROFILING_DIR or not SAFE_NAME.match(view) or not SAFE_NAME.match(name):
+        return None
+    path = Path(settings.PROFILING_DIR) / view / name
+    return path if path.is_file() else None
+
+
+def should_profile(request):
+    header = request.META.get(PROFILE_HEADER)
+    if header and token_valid(header):
+        return True
+    return random.random() < settings.PROFILING_SAMPLE_RATE
@@ -0,0 +1,99 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import models
+from django.utils import timezone
+from rest_framework import serializers
+
+from .serializers import (
+    MilkReceivedSerializer, MilkRequestSerializer, IncomingMilkRequestSerializer,
+    DailyTotalSerializer, AttendanceSerializer, FeedRecordSerializer, ExpenseRecordSerializer,
+    MedicineRecordSerializer, MilkDistributionSerializer
+)
+
+
+def _datetime_string(value):
+    value = timezone.localtime(value).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _decimal_string(decimal_places):
+    exponent = Decimal(1).scaleb(-decimal_places)
+    return lambda value: f'{Decimal(value).quantize(exponent, rounding=ROUND_HALF_UP):f}'
+
+
+def _converter(field, model):
+    # Mirrors the to_representation of each DRF field type we project.
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        target = model._meta.get_field(field.source).target_field
+        return str if isinstance(target, models.UUIDField) else None
+    if isinstance(field, serializers.DecimalField):
+        return _decimal_string(field.decimal_places)
+    if isinstance(field, serializers.DateTimeField):
+        return _datetime_string
+    if isinstance(field, serializers.DateField):
+        return lambda value: value.isoformat()
+    if isinstance(field, serializers.UUIDField):
+        return str
+    if isinstance(field, serializers.BooleanField):
+        return bool
+    if isinstance(field, (serializers.CharField, serializers.ChoiceField, serializers.IntegerField)):
+        return None
+    raise TypeError(f'{type(field).__name__} cannot be projected.')
+
+
+def _null_safe(convert):
+    return lambda value: None if value is None else convert(value)
+
+
+class Projection:
+    """Serializes querysets through values_list() with the JSON shape of a DRF serializer."""
+
+    def __init__(self, serializer_class):
+        fields = [field for field in serializer_class().fields.values() if not field.write_only]
+        self.lookups = [field.source.replace('.', '__') for field in fields]
+
+        namespace = {}
+        items = []
+        omissions = []
+        for index, field in enumerate(fields):
+            convert = _converter(field, serializer_class.Meta.model)
+            if convert is None:
+                items.append(f'{field.field_name!r}: row[{index}]')
+            else:
+                namespace[f'convert_{index}'] = _null_safe(convert)
+                items.append(f'{field.field_name!r}: convert_{index}(row[{index}])')
+            # DRF drops a read-only field whose relation is missing unless it allows null.
+            if '.' in field.source and not field.allow_null:
+                omissions.append(f'    if row[{index}] is None:\n        del data[{field.field_name!r}]\n')
+
+        # One flat dict literal per row instead of a loop over field objects.
+        source = f"def row_to_dict(row):\n    data = {{{', '.join(items)}}}\n{''.join(omissions)}    return data\n"
+        exec(source, namespace)
+        self.row_to_dict = namespace['row_to_dict']
+
+    def key(self, *lookups):
+        indexes = [self.lookups.index(lookup) for lookup in lookups]
+        return lambda row: tuple(row[index] for index in indexes)
+
+    def rows(self, queryset):
+        return queryset.values_list(*self.lookups)
+
+    def serialize(self, rows):
+        row_to_dict = self.row_to_dict
+        return [row_to_dict(row) for row in rows]
+
+    def serialize_queryset(self, queryset):
+        return self.serialize(self.rows(queryset))
+
+
+MILK_RECEIVED_PROJECTION = Projection(MilkReceivedSerializer)
+MILK_REQUEST_PROJECTION = Projection(MilkRequestSerializer)
+INCOMING_MILK_REQUEST_PROJECTION = Projection(IncomingMilkRequestSerializer)
+DAILY_TOTAL_PROJECTION = Projection(DailyTotalSerializer)
+ATTENDANCE_PROJECTION = Projection(AttendanceSerializer)
+FEED_RECORD_PROJECTION = Projection(FeedRecordSerializer)
+EXPENSE_RECORD_PROJECTION = Projection(ExpenseRecordSerializer)
+MEDICINE_RECORD_PROJECTION = Projection(MedicineRecordSerializer)
+MILK_DISTRIBUTION_PROJECTION = Projection(MilkDistributionSerializer)
@@ -0,0 +1,25 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """Selected with ?format=columnar; time-series views then return parallel arrays."""
+    format = 'columnar'
+
+
+TIME_SERIES_RENDERERS = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
+
+
+def wants_columnar(request):
+    return getattr(request, 'accepted_renderer', None) is not None and request.accepted_renderer.format == 'columnar'
+
+
+def to_columnar(rows, label_key, series_keys):
+    labels = []
+    series = {key: [] for key in series_keys}
+    for row in rows:
+        label = row[label_key]
+        labels.append(label.isoformat() if hasattr(label, 'isoformat') else label)
+        for key in series_keys:
+            series[key].append(float(row[key] or 0))
+    return {'labels': labels, 'series': series}
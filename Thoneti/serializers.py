@@ -303,9 +303,50 @@ class SaleSerializer(serializers.ModelSerializer):
         }
 
 class SaleCreateSerializer(serializers.ModelSerializer):
+    client_id = serializers.UUIDField(required=False)
+
     class Meta:
         model = Sale
-        fields = ['customer_name', 'quantity', 'date']
+        fields = ['customer_name', 'quantity', 'date', 'client_id']
+
+
+class SaleBatchItemSerializer(serializers.Serializer):
+    client_id = serializers.UUIDField()
+    customer_name = serializers.CharField(max_length=255, required=False, allow_blank=True, allow_null=True)
+    quantity = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    date = serializers.DateField(required=False)
+
+
+class SaleBatchSerializer(serializers.Serializer):
+    sales = SaleBatchItemSerializer(many=True, allow_empty=False, max_length=500)
+    date = serializers.DateField(required=False)
+
+
+class OutboxOperationSerializer(serializers.Serializer):
+    TYPE_CHOICES = ['sale', 'daily_total', 'receipt_status', 'attendance']
+
+    client_id = serializers.UUIDField()
+    type = serializers.ChoiceField(choices=TYPE_CHOICES)
+    payload = serializers.DictField()
+    user_id = serializers.UUIDField(required=False)
+
+
+class OutboxReplaySerializer(serializers.Serializer):
+    operations = OutboxOperationSerializer(many=True, allow_empty=False, max_length=100)
+
+
+class BatchSubRequestSerializer(serializers.Serializer):
+    METHOD_CHOICES = ['GET', 'POST', 'PUT', 'PATCH', 'DELETE']
+
+    method = serializers.ChoiceField(choices=METHOD_CHOICES)
+    path = serializers.CharField(max_length=500)
+    body = serializers.JSONField(required=False, allow_null=True)
+    idempotency_key = serializers.CharField(max_length=255, required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = BatchSubRequestSerializer(many=True, allow_empty=False, max_length=50)
+    atomic = serializers.BooleanField(default=False)
 
 
 class MilkRequestSerializer(serializers.ModelSerializer):
@@ -320,6 +361,14 @@ class MilkRequestSerializer(serializers.ModelSerializer):
         read_only_fields = ['request_id', 'created_at', 'updated_at']
 
 
+class IncomingMilkRequestSerializer(MilkRequestSerializer):
+    is_local = serializers.BooleanField(read_only=True)
+    can_cover = serializers.BooleanField(read_only=True)
+
+    class Meta(MilkRequestSerializer.Meta):
+        fields = MilkRequestSerializer.Meta.fields + ['is_local', 'can_cover']
+
+
 class BorrowLendRecordSerializer(serializers.ModelSerializer):
     borrower_name = serializers.CharField(source='borrower_seller.name', read_only=True)
     lender_name = serializers.CharField(source='lender_seller.name', read_only=True)
@@ -0,0 +1,159 @@
+import base64
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import pre_delete
+from django.utils import timezone
+
+from .models import (
+    Seller, Manager, Employee, FeedRecord, ExpenseRecord, MedicineRecord,
+    MilkDistribution, Attendance, MilkReceived, DailyTotal, Sale,
+    MilkRequest, BorrowLendRecord, Notification, Tombstone
+)
+from .serializers import (
+    EmployeeSerializer, FeedRecordSerializer, ExpenseRecordSerializer,
+    MedicineRecordSerializer, MilkDistributionSerializer, AttendanceSerializer,
+    MilkReceivedSerializer, DailyTotalSerializer, SaleSerializer,
+    MilkRequestSerializer, BorrowLendRecordSerializer, NotificationSerializer
+)
+
+
+# Rows committed by slower concurrent transactions can carry a timestamp
+# just behind the cursor we hand out, so each cursor overlaps the previous
+# window slightly. Clients upsert by primary key, so repeats are harmless.
+CURSOR_OVERLAP = timedelta(seconds=5)
+
+SyncFeed = namedtuple('SyncFeed', ['key', 'model', 'scope', 'serializer', 'changed_field', 'related'])
+
+SELLER_FEEDS = [
+    SyncFeed('milk_received', MilkReceived, lambda user, seller: Q(seller=seller),
+             MilkReceivedSerializer, 'updated_at', ['seller__location', 'manager']),
+    SyncFeed('sales', Sale, lambda user, seller: Q(seller=seller),
+             SaleSerializer, 'created_at', []),
+    SyncFeed('daily_totals', DailyTotal, lambda user, seller: Q(seller=seller),
+             DailyTotalSerializer, 'updated_at', ['seller__location']),
+    SyncFeed('my_requests', MilkRequest, lambda user, seller: Q(from_seller=seller),
+             MilkRequestSerializer, 'updated_at', ['from_seller__location', 'to_seller']),
+    SyncFeed('borrow_lend', BorrowLendRecord, lambda user, seller: Q(borrower_seller=seller) | Q(lender_seller=seller),
+             BorrowLendRecordSerializer, 'updated_at', ['borrower_seller', 'lender_seller']),
+    SyncFeed('notifications', Notification, lambda user, seller: Q(user=user),
+             NotificationSerializer, 'updated_at', []),
+]
+
+MANAGER_FEEDS = [
+    SyncFeed('milk_received', MilkReceived, lambda user, manager: Q(manager=manager),
+             MilkReceivedSerializer, 'updated_at', ['seller__location', 'manager']),
+    SyncFeed('feed_records', FeedRecord, lambda user, manager: Q(record__manager=manager),
+             FeedRecordSerializer, 'updated_at', []),
+    SyncFeed('expense_records', ExpenseRecord, lambda user, manager: Q(record__manager=manager),
+             ExpenseRecordSerializer, 'updated_at', []),
+    SyncFeed('medicine_records', MedicineRecord, lambda user, manager: Q(record__manager=manager),
+             MedicineRecordSerializer, 'updated_at', []),
+    SyncFeed('milk_distribution', MilkDistribution, lambda user, manager: Q(record__manager=manager),
+             MilkDistributionSerializer, 'updated_at', []),
+    SyncFeed('employees', Employee, lambda user, manager: Q(manager=manager),
+             EmployeeSerializer, 'updated_at', ['user', 'manager']),
+    SyncFeed('attendance', Attendance, lambda user, manager: Q(employee__manager=manager),
+             AttendanceSerializer, 'updated_at', ['employee']),
+    SyncFeed('notifications', Notification, lambda user, manager: Q(user=user),
+             NotificationSerializer, 'updated_at', []),
+]
+
+
+def _manager_user(record):
+    return [record.manager.user_id]
+
+
+TOMBSTONE_OWNERS = {
+    MilkReceived: lambda row: [row.seller.user_id] + ([row.manager.user_id] if row.manager_id else []),
+    Sale: lambda row: [row.seller.user_id],
+    DailyTotal: lambda row: [row.seller.user_id],
+    MilkRequest: lambda row: [row.from_seller.user_id],
+    BorrowLendRecord: lambda row: [row.borrower_seller.user_id, row.lender_seller.user_id],
+    Notification: lambda row: [row.user_id],
+    FeedRecord: lambda row: _manager_user(row.record),
+    ExpenseRecord: lambda row: _manager_user(row.record),
+    MedicineRecord: lambda row: _manager_user(row.record),
+    MilkDistribution: lambda row: _manager_user(row.record),
+    Employee: lambda row: _manager_user(row),
+    Attendance: lambda row: _manager_user(row.employee),
+}
+
+
+def record_tombstone(sender, instance, **kwargs):
+    owners = dict.fromkeys(TOMBSTONE_OWNERS[sender](instance))
+    Tombstone.objects.bulk_create([
+        Tombstone(model=sender._meta.model_name, object_id=str(instance.pk), owner=owner)
+        for owner in owners
+    ])
+
+
+for synced_model in TOMBSTONE_OWNERS:
+    pre_delete.connect(record_tombstone, sender=synced_model, dispatch_uid=f'tombstone-{synced_model.__name__}')
+
+
+def encode_sync_cursor(moment):
+    return base64.urlsafe_b64encode(moment.isoformat().encode()).decode()
+
+
+def decode_sync_cursor(cursor):
+    try:
+        moment = datetime.fromisoformat(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid sync cursor.')
+    if timezone.is_naive(moment):
+        raise ValueError('Invalid sync cursor.')
+    return moment
+
+
+def get_sync_feeds(user):
+    """The feeds of user's role and their profile, or ([], None) without a seller or manager profile."""
+    if user.role == 'seller':
+        profile = Seller.objects.filter(user=user).first()
+        return (SELLER_FEEDS, profile) if profile else ([], None)
+    if user.role == 'manager':
+        profile = Manager.objects.filter(user=user).first()
+        return (MANAGER_FEEDS, profile) if profile else ([], None)
+    return [], None
+
+
+def tombstone_retention_start(now=None):
+    return (now or timezone.now()) - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+
+def purge_expired_tombstones():
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=tombstone_retention_start()).delete()
+    return deleted
+
+
+def collect_changes(user, feeds, profile, since=None):
+    now = timezone.now()
+    # A cursor older than the tombstone window may have missed deletions.
+    full_sync = since is None or since < tombstone_retention_start(now)
+
+    changes = {}
+    for feed in feeds:
+        rows = feed.model.objects.filter(feed.scope(user, profile))
+        if not full_sync:
+            rows = rows.filter(**{f'{feed.changed_field}__gt': since})
+        if feed.related:
+            rows = rows.select_related(*feed.related)
+        changes[feed.key] = feed.serializer(rows, many=True).data
+
+    deleted = []
+    if not full_sync:
+        deleted = [
+            {'model': model, 'id': object_id}
+            for model, object_id in Tombstone.objects.filter(
+                owner=user.user_id, deleted_at__gt=since
+            ).values_list('model', 'object_id')
+        ]
+
+    return {
+        'cursor': encode_sync_cursor(now - CURSOR_OVERLAP),
+        'full_sync': full_sync,
+        'changes': changes,
+        'deleted': deleted
+    }
@@ -1,3 +1,1919 @@
-from django.test import TestCase
+import io
+import json
+import os
+import pstats
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import skipIf
 
-# Create your tests here.
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models import Sum
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.http import Http404
+from django.urls import ResolverMatch, reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from .batch import build_sub_request_handler
+from .archive import MonthNotClosed, archive_month, archived_rows, first_hot_month
+from .ids import time_ordered_id, uuid7, uuid7_time
+from .metrics import MetricsRegistry
+from .middleware import ProfilingMiddleware, QueryBudgetExceeded, _request_hash, query_fingerprint
+from .partitioning import add_months, convert_table, create_partition, is_partitioned, partition_name
+from .profiling import StackSampler, profile_token
+from .projections import MILK_RECEIVED_PROJECTION, MILK_REQUEST_PROJECTION, ATTENDANCE_PROJECTION
+from .urls import urlpatterns
+from .serializers import MilkReceivedSerializer, MilkRequestSerializer, AttendanceSerializer
+from .models import (
+    User, Manager, Location, Seller, MilkRequest, BorrowLendRecord, Notification,
+    MilkReceived, Sale, Employee, Attendance, DailyTotal, IdempotencyKey, SystemMilkDistribution,
+    Deduction, FeedRecord, ExpenseRecord, MedicineRecord, Tombstone, ArchivedMonth, SellerMonthlySummary,
+    AttendanceMonthlySummary
+)
+from .utils import (
+    get_open_borrow_lend_balances, propose_settlement_transfers, settle_open_borrow_lend_records,
+    get_seller_remaining_milk, get_seller_daily_summary, get_location_statistics,
+    get_or_create_daily_operations, calculate_and_update_salary
+)
+
+
+def create_location(name='Village'):
+    return Location.objects.create(location_name=name, address=f'{name} main road')
+
+
+def create_seller(username, location=None):
+    user = User.objects.create_user(username=username, password=None, role='seller')
+    return Seller.objects.create(name=username.title(), location=location or create_location(), user=user)
+
+
+def create_manager(username='manager'):
+    user = User.objects.create_user(username=username, password=None, role='manager')
+    return Manager.objects.create(name=username.title(), user=user)
+
+
+def create_borrow_lend_record(borrower, lender, quantity, settled=False):
+    milk_request = MilkRequest.objects.create(
+        from_seller=borrower, to_seller=lender, quantity=quantity, status='on_hold'
+    )
+    return BorrowLendRecord.objects.create(
+        borrower_seller=borrower,
+        lender_seller=lender,
+        quantity=quantity,
+        borrow_date=timezone.localdate(),
+        settled=settled,
+        request=milk_request
+    )
+
+
+class BorrowLendSettlementTests(TestCase):
+    def setUp(self):
+        location = create_location()
+        self.a = create_seller('anil', location)
+        self.b = create_seller('bala', location)
+        self.c = create_seller('chitra', location)
+
+    def test_balances_net_out_opposite_records(self):
+        create_borrow_lend_record(self.a, self.b, Decimal('10.00'))
+        create_borrow_lend_record(self.b, self.a, Decimal('4.00'))
+        create_borrow_lend_record(self.a, self.c, Decimal('3.00'), settled=True)
+
+        pair_balances, seller_balances = get_open_borrow_lend_balances()
+
+        nonzero_pairs = {pair: balance for pair, balance in pair_balances.items() if balance}
+        self.assertEqual(len(nonzero_pairs), 1)
+        self.assertEqual(seller_balances[self.a.seller_id], Decimal('-6.00'))
+        self.assertEqual(seller_balances[self.b.seller_id], Decimal('6.00'))
+        self.assertNotIn(self.c.seller_id, seller_balances)
+
+    def test_cycle_needs_no_transfers(self):
+        create_borrow_lend_record(self.a, self.b, Decimal('5.00'))
+        create_borrow_lend_record(self.b, self.c, Decimal('5.00'))
+        create_borrow_lend_record(self.c, self.a, Decimal('5.00'))
+
+        _, seller_balances = get_open_borrow_lend_balances()
+        self.assertEqual(propose_settlement_transfers(seller_balances), [])
+
+    def test_chain_collapses_to_single_transfer(self):
+        create_borrow_lend_record(self.a, self.b, Decimal('5.00'))
+        create_borrow_lend_record(self.b, self.c, Decimal('5.00'))
+
+        _, seller_balances = get_open_borrow_lend_balances()
+        transfers = propose_settlement_transfers(seller_balances)
+
+        self.assertEqual(transfers, [{
+            'from_seller': self.a.seller_id,
+            'to_seller': self.c.seller_id,
+            'quantity': Decimal('5.00')
+        }])
+
+    def test_settle_marks_records_and_notifies(self):
+        create_borrow_lend_record(self.a, self.b, Decimal('7.00'))
+        create_borrow_lend_record(self.c, self.b, Decimal('2.00'))
+
+        settled_count, transfers, _ = settle_open_borrow_lend_records()
+
+        self.assertEqual(settled_count, 2)
+        self.assertEqual(len(transfers), 2)
+        self.assertEqual(Notification.objects.count(), 4)
+        self.assertEqual(BorrowLendRecord.objects.filter(settled=True).count(), 2)
+        self.assertEqual(
+            MilkRequest.objects.filter(borrow_lend_records__settled=True, status='received').count(), 2
+        )
+        open_records = BorrowLendRecord.objects.filter(settled=False).select_related('request')
+        self.assertEqual(
+            sorted((r.borrower_seller_id, r.lender_seller_id, r.quantity) for r in open_records),
+            sorted((t['from_seller'], t['to_seller'], t['quantity']) for t in transfers)
+        )
+        self.assertTrue(all(r.request.status == 'on_hold' for r in open_records))
+
+    def test_settle_keeps_debts_and_remaining_milk(self):
+        for seller in (self.a, self.b, self.c):
+            receive_milk(seller, Decimal('20.00'))
+        create_borrow_lend_record(self.a, self.b, Decimal('5.00'))
+        create_borrow_lend_record(self.b, self.c, Decimal('5.00'))
+
+        def nonzero_balances():
+            _, seller_balances = get_open_borrow_lend_balances()
+            return {seller_id: balance for seller_id, balance in seller_balances.items() if balance}
+
+        balances_before = nonzero_balances()
+        remaining_before = [get_seller_remaining_milk(seller) for seller in (self.a, self.b, self.c)]
+        self.assertEqual(remaining_before, [Decimal('20.00'), Decimal('15.00'), Decimal('15.00')])
+
+        settle_open_borrow_lend_records()
+
+        self.assertEqual(nonzero_balances(), balances_before)
+        # Bala lent 5L and was lent 5L; only Chitra is still owed milk.
+        self.assertEqual(
+            [get_seller_remaining_milk(seller) for seller in (self.a, self.b, self.c)],
+            [Decimal('20.00'), Decimal('20.00'), Decimal('15.00')]
+        )
+
+    def test_settlement_endpoints_require_manager(self):
+        create_borrow_lend_record(self.a, self.b, Decimal('7.00'))
+        self.client.force_login(self.a.user)
+        response = self.client.post(reverse('settle-borrow-lend-records'))
+        self.assertEqual(response.status_code, 404)
+
+        manager = create_manager()
+        self.client.force_login(manager.user)
+        preview = self.client.get(reverse('borrow-lend-settlement')).json()
+        self.assertEqual(preview['transfers'][0]['from_seller_name'], 'Anil')
+        self.assertEqual(preview['pair_balances'][0]['quantity'], '7.00')
+
+        response = self.client.post(reverse('settle-borrow-lend-records'))
+        self.assertEqual(response.json()['settled_count'], 1)
+
+
+class BorrowLendSettlementBenchmarkTests(TestCase):
+    seller_count = 50
+    record_count = 5000
+
+    @classmethod
+    def setUpTestData(cls):
+        location = create_location()
+        sellers = [create_seller(f'seller{i:03d}', location) for i in range(cls.seller_count)]
+        requests = MilkRequest.objects.bulk_create([
+            MilkRequest(from_seller=sellers[i % cls.seller_count], quantity=Decimal('1.00'), status='on_hold')
+            for i in range(cls.record_count)
+        ])
+        today = timezone.localdate()
+        BorrowLendRecord.objects.bulk_create([
+            BorrowLendRecord(
+                borrower_seller=sellers[i % cls.seller_count],
+                lender_seller=sellers[(i * 7 + 3) % cls.seller_count],
+                quantity=Decimal(1 + i % 9),
+                borrow_date=today,
+                request=milk_request
+            )
+            for i, milk_request in enumerate(requests)
+            if i % cls.seller_count != (i * 7 + 3) % cls.seller_count
+        ])
+
+    def test_settlement_scales_to_thousands_of_records(self):
+        open_count = BorrowLendRecord.objects.filter(settled=False).count()
+
+        with CaptureQueriesContext(connection) as queries:
+            settled_count, transfers, _ = settle_open_borrow_lend_records()
+
+        self.assertEqual(settled_count, open_count)
+        self.assertLess(len(transfers), self.seller_count)
+        self.assertLessEqual(len(queries), 2 * (open_count // 500) + 10)
+
+
+class BorrowLendHistoryTests(TestCase):
+    def setUp(self):
+        location = create_location()
+        self.seller = create_seller('anil', location)
+        self.b = create_seller('bala', location)
+        self.c = create_seller('chitra', location)
+        self.client.force_login(self.seller.user)
+
+    def test_history_is_paginated_with_counterparty_summary(self):
+        for _ in range(3):
+            create_borrow_lend_record(self.seller, self.b, Decimal('2.00'))
+        create_borrow_lend_record(self.b, self.seller, Decimal('1.00'))
+        create_borrow_lend_record(self.c, self.seller, Decimal('4.00'))
+        create_borrow_lend_record(self.c, self.seller, Decimal('9.00'), settled=True)
+
+        response = self.client.get(reverse('borrow-lend-history'), {'page_size': 4})
+        data = response.json()
+
+        self.assertEqual(len(data['results']), 4)
+        self.assertIsNotNone(data['next'])
+        summary = {row['name']: row for row in data['summary']}
+        self.assertEqual(summary['Bala']['net_balance'], '-5.00')
+        self.assertEqual(summary['Chitra']['net_balance'], '4.00')
+
+        second_page = self.client.get(data['next']).json()
+        self.assertEqual(len(second_page['results']), 2)
+        self.assertIsNone(second_page['next'])
+
+    def test_history_filters(self):
+        create_borrow_lend_record(self.seller, self.b, Decimal('2.00'))
+        create_borrow_lend_record(self.c, self.seller, Decimal('4.00'), settled=True)
+
+        data = self.client.get(reverse('borrow-lend-history'), {'settled': 'true'}).json()
+        self.assertEqual([row['type'] for row in data['results']], ['Lent'])
+        self.assertEqual([row['name'] for row in data['summary']], ['Bala'])
+
+        data = self.client.get(reverse('borrow-lend-history'), {'counterparty': str(self.b.seller_id)}).json()
+        self.assertEqual([row['other_party'] for row in data['results']], ['Bala'])
+
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        data = self.client.get(reverse('borrow-lend-history'), {'date_from': tomorrow.isoformat()}).json()
+        self.assertEqual(data['results'], [])
+
+    def test_invalid_filters_are_rejected(self):
+        for params in ({'date_from': '2026-13-01'}, {'date_to': 'yesterday'}, {'counterparty': 'bala'}):
+            response = self.client.get(reverse('borrow-lend-history'), params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('Invalid', response.json()['message'])
+
+        response = self.client.get(reverse('seller-bootstrap'), {'counterparty': 'bala'})
+        self.assertEqual(response.status_code, 400)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.seller = create_seller('anil')
+        self.client.force_login(self.seller.user)
+
+    def collect(self, url, params):
+        seen = []
+        data = self.client.get(url, params).json()
+        while True:
+            seen.extend(row['request_id'] for row in data['results'])
+            if data['next'] is None:
+                return seen
+            data = self.client.get(data['next']).json()
+
+    def test_pages_have_no_gaps_or_duplicates_with_equal_timestamps(self):
+        created_at = timezone.now()
+        requests = [MilkRequest.objects.create(from_seller=self.seller, quantity=Decimal('1.00')) for _ in range(7)]
+        MilkRequest.objects.filter(from_seller=self.seller).update(created_at=created_at)
+
+        seen = self.collect(reverse('list-my-requests'), {'page_size': 3})
+
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(set(seen), {str(request.request_id) for request in requests})
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(reverse('list-my-requests'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_bootstrap_links_point_at_list_endpoint(self):
+        for _ in range(3):
+            MilkRequest.objects.create(from_seller=self.seller, quantity=Decimal('1.00'))
+
+        data = self.client.get(reverse('seller-bootstrap'), {'page_size': 2}).json()
+
+        self.assertIn(reverse('list-my-requests'), data['my_requests']['next'])
+        next_page = self.client.get(data['my_requests']['next']).json()
+        self.assertEqual(len(next_page['results']), 1)
+
+
+def receive_milk(seller, quantity, status='received'):
+    return MilkReceived.objects.create(
+        seller=seller, quantity=quantity, date=timezone.localdate(), source='From Farm', status=status
+    )
+
+
+class IncomingRequestFeedTests(TestCase):
+    def setUp(self):
+        self.home = create_location('Home')
+        self.away = create_location('Away')
+        self.seller = create_seller('anil', self.home)
+        self.neighbour = create_seller('bala', self.home)
+        self.stranger = create_seller('chitra', self.away)
+        self.client.force_login(self.seller.user)
+
+    def test_remaining_milk_matches_daily_summary(self):
+        receive_milk(self.seller, Decimal('20.00'))
+        receive_milk(self.seller, Decimal('5.00'), status='pending')
+        receive_milk(self.seller, Decimal('8.00'), status='not_received')
+        Sale.objects.create(seller=self.seller, date=timezone.localdate(), quantity=Decimal('3.50'), total_amount=0)
+        create_borrow_lend_record(self.neighbour, self.seller, Decimal('4.00'))
+
+        with self.assertNumQueries(1):
+            remaining = get_seller_remaining_milk(self.seller)
+        self.assertEqual(remaining, Decimal('17.50'))
+        self.assertEqual(remaining, get_seller_daily_summary(self.seller)['remaining_milk'])
+
+    def test_feed_ranks_local_first_and_flags_coverable(self):
+        receive_milk(self.seller, Decimal('10.00'))
+        far = MilkRequest.objects.create(from_seller=self.stranger, quantity=Decimal('5.00'))
+        near = MilkRequest.objects.create(from_seller=self.neighbour, quantity=Decimal('15.00'))
+        MilkRequest.objects.create(from_seller=self.seller, quantity=Decimal('1.00'))
+
+        data = self.client.get(reverse('list-incoming-requests')).json()
+
+        self.assertEqual([row['request_id'] for row in data['results']], [str(near.request_id), str(far.request_id)])
+        self.assertEqual([row['is_local'] for row in data['results']], [True, False])
+        self.assertEqual([row['can_cover'] for row in data['results']], [False, True])
+        self.assertEqual(data['available_milk'], '10.00')
+
+        data = self.client.get(reverse('list-incoming-requests'), {'coverable': 'true'}).json()
+        self.assertEqual([row['request_id'] for row in data['results']], [str(far.request_id)])
+
+    @override_settings(MILK_REQUEST_EXPIRY_HOURS=1)
+    def test_stale_requests_expire(self):
+        stale = MilkRequest.objects.create(from_seller=self.neighbour, quantity=Decimal('2.00'))
+        MilkRequest.objects.filter(pk=stale.pk).update(created_at=timezone.now() - timedelta(hours=2))
+        fresh = MilkRequest.objects.create(from_seller=self.neighbour, quantity=Decimal('2.00'))
+
+        data = self.client.get(reverse('list-incoming-requests')).json()
+
+        self.assertEqual([row['request_id'] for row in data['results']], [str(fresh.request_id)])
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, 'pending')
+
+        out = io.StringIO()
+        call_command('expire_milk_requests', stdout=out)
+        call_command('expire_milk_requests', stdout=out)
+
+        self.assertEqual(out.getvalue().splitlines(), ['Expired 1 milk requests.', 'Expired 0 milk requests.'])
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, 'expired')
+        self.assertEqual(Notification.objects.filter(user=self.neighbour.user, message__contains='expired').count(), 1)
+
+
+# Deferred SQLite transactions deadlock when several readers upgrade to
+# writers at once; only IMMEDIATE mode queues them behind the busy timeout.
+SQLITE_DEFERRED_WRITES = (
+    connection.vendor == 'sqlite'
+    and connection.settings_dict['OPTIONS'].get('transaction_mode') != 'IMMEDIATE'
+)
+# The in-memory test database is a shared cache with table-level locks, so
+# concurrent writers fail at once with "database table is locked".
+SQLITE_IN_MEMORY_TEST_DB = (
+    connection.vendor == 'sqlite'
+    and connection.creation.is_in_memory_db(connection.settings_dict['TEST']['NAME'] or ':memory:')
+)
+
+
+def run_concurrently(worker, count):
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def run(index):
+        try:
+            barrier.wait()
+            results[index] = worker(index)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class AcceptMilkRequestTests(TestCase):
+    def setUp(self):
+        location = create_location()
+        self.requester = create_seller('anil', location)
+        self.lender = create_seller('bala', location)
+        receive_milk(self.lender, Decimal('10.00'))
+        self.milk_request = MilkRequest.objects.create(from_seller=self.requester, quantity=Decimal('4.00'))
+        self.client.force_login(self.lender.user)
+
+    def test_accept_claims_request(self):
+        response = self.client.post(reverse('accept-milk-request', args=[self.milk_request.request_id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.milk_request.refresh_from_db()
+        self.assertEqual(self.milk_request.status, 'on_hold')
+        self.assertEqual(self.milk_request.to_seller, self.lender)
+
+    def test_second_accept_is_rejected_as_taken(self):
+        self.client.post(reverse('accept-milk-request', args=[self.milk_request.request_id]))
+        other = create_seller('chitra')
+        receive_milk(other, Decimal('10.00'))
+        self.client.force_login(other.user)
+
+        response = self.client.post(reverse('accept-milk-request', args=[self.milk_request.request_id]))
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(BorrowLendRecord.objects.count(), 1)
+
+    def test_request_past_expiry_cannot_be_claimed(self):
+        stale = timezone.now() - timedelta(hours=settings.MILK_REQUEST_EXPIRY_HOURS, minutes=1)
+        MilkRequest.objects.filter(pk=self.milk_request.pk).update(created_at=stale)
+
+        response = self.client.post(reverse('accept-milk-request', args=[self.milk_request.request_id]))
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['message'], 'This request is no longer available.')
+        self.milk_request.refresh_from_db()
+        self.assertEqual(self.milk_request.status, 'pending')
+        self.assertFalse(BorrowLendRecord.objects.exists())
+
+
+@skipIf(SQLITE_DEFERRED_WRITES, 'SQLite needs transaction_mode=IMMEDIATE for concurrent writers')
+@skipIf(SQLITE_IN_MEMORY_TEST_DB, 'Concurrent writers need a file-backed SQLite test database')
+class ConcurrentAcceptMilkRequestTests(TransactionTestCase):
+    accept_count = 8
+
+    def test_parallel_accepts_have_exactly_one_winner(self):
+        location = create_location()
+        requester = create_seller('requester', location)
+        lenders = [create_seller(f'lender{i}', location) for i in range(self.accept_count)]
+        for lender in lenders:
+            receive_milk(lender, Decimal('10.00'))
+        milk_request = MilkRequest.objects.create(from_seller=requester, quantity=Decimal('4.00'))
+        url = reverse('accept-milk-request', args=[milk_request.request_id])
+
+        def accept(index):
+            client = Client()
+            client.force_login(lenders[index].user)
+            return client.post(url).status_code
+
+        started = time.perf_counter()
+        statuses = run_concurrently(accept, self.accept_count)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(statuses.count(200), 1, statuses)
+        self.assertEqual(statuses.count(409), self.accept_count - 1, statuses)
+        self.assertEqual(BorrowLendRecord.objects.filter(request=milk_request).count(), 1)
+        self.assertLess(elapsed, 10)
+
+
+class RecordIndividualSaleTests(TestCase):
+    def setUp(self):
+        self.seller = create_seller('anil')
+        receive_milk(self.seller, Decimal('5.00'))
+        self.client.force_login(self.seller.user)
+
+    def test_sale_within_stock_is_recorded(self):
+        response = self.client.post(
+            reverse('record-individual-sale'), {'quantity': '3.00', 'customer_name': 'Ravi', 'date': timezone.localdate().isoformat()}, content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['remaining_milk'], 2.0)
+
+    def test_oversell_is_rejected(self):
+        response = self.client.post(
+            reverse('record-individual-sale'), {'quantity': '5.50', 'date': timezone.localdate().isoformat()}, content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Sale.objects.exists())
+
+
+@skipIf(SQLITE_DEFERRED_WRITES, 'SQLite needs transaction_mode=IMMEDIATE for concurrent writers')
+@skipIf(SQLITE_IN_MEMORY_TEST_DB, 'Concurrent writers need a file-backed SQLite test database')
+class ConcurrentSaleTests(TransactionTestCase):
+    seller_count = 4
+    attempts_per_seller = 6
+
+    def test_parallel_sales_never_oversell(self):
+        location = create_location()
+        sellers = [create_seller(f'seller{i}', location) for i in range(self.seller_count)]
+        for seller in sellers:
+            receive_milk(seller, Decimal('10.00'))
+        url = reverse('record-individual-sale')
+        payload = {'quantity': '3.00', 'date': timezone.localdate().isoformat()}
+
+        def sell(index):
+            client = Client()
+            client.force_login(sellers[index % self.seller_count].user)
+            return client.post(url, payload, content_type='application/json').status_code
+
+        attempts = self.seller_count * self.attempts_per_seller
+        statuses = run_concurrently(sell, attempts)
+
+        self.assertEqual(statuses.count(201), 3 * self.seller_count, statuses)
+        self.assertEqual(statuses.count(400), attempts - 3 * self.seller_count, statuses)
+        for seller in sellers:
+            self.assertEqual(get_seller_remaining_milk(seller), Decimal('1.00'))
+
+    def test_throughput_benchmark_command(self):
+        location = create_location()
+        for i in range(self.seller_count):
+            receive_milk(create_seller(f'seller{i}', location), Decimal('10.00'))
+
+        out = io.StringIO()
+        call_command(
+            'benchmark_concurrent_sales', sellers=[1, self.seller_count], requests=8, threads=4, quantity='1.00',
+            stdout=out
+        )
+
+        rows = [line.split() for line in out.getvalue().splitlines()[2:]]
+        self.assertEqual([(row[0], row[4], row[5], row[6]) for row in rows], [('1', '8', '0', '0'), ('4', '8', '0', '0')])
+        self.assertFalse(Sale.objects.exists())
+
+
+class SaleBatchTests(TestCase):
+    def setUp(self):
+        self.seller = create_seller('anil')
+        receive_milk(self.seller, Decimal('10.00'))
+        self.client.force_login(self.seller.user)
+        self.url = reverse('record-sales-batch')
+
+    def post_batch(self, sales):
+        return self.client.post(self.url, {'sales': sales}, content_type='application/json')
+
+    def test_batch_creates_sales_and_returns_one_summary(self):
+        sales = [{'client_id': str(uuid.uuid4()), 'quantity': '2.00', 'customer_name': f'C{i}'} for i in range(3)]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post_batch(sales)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([row['status'] for row in response.json()['results']], ['created'] * 3)
+        self.assertEqual(response.json()['summary']['remaining_milk'], 4.0)
+        self.assertEqual(Sale.objects.count(), 3)
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('INSERT INTO "sale"')]), 1)
+
+    def test_replayed_client_ids_are_not_duplicated(self):
+        client_id = str(uuid.uuid4())
+        self.post_batch([{'client_id': client_id, 'quantity': '2.00'}])
+
+        response = self.post_batch([
+            {'client_id': client_id, 'quantity': '2.00'},
+            {'client_id': client_id, 'quantity': '2.00'},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['status'] for row in response.json()['results']], ['duplicate', 'duplicate'])
+        self.assertEqual(Sale.objects.count(), 1)
+
+    def test_items_beyond_stock_are_rejected(self):
+        response = self.post_batch([
+            {'client_id': str(uuid.uuid4()), 'quantity': '6.00'},
+            {'client_id': str(uuid.uuid4()), 'quantity': '6.00'},
+            {'client_id': str(uuid.uuid4()), 'quantity': '4.00'},
+        ])
+
+        self.assertEqual([row['status'] for row in response.json()['results']], ['created', 'rejected', 'created'])
+        self.assertEqual(get_seller_remaining_milk(self.seller), Decimal('0.00'))
+
+
+class OutboxReplayTests(TestCase):
+    def setUp(self):
+        self.manager = create_manager()
+        self.seller = create_seller('anil')
+        receive_milk(self.seller, Decimal('10.00'))
+        self.receipt = MilkReceived.objects.create(
+            seller=self.seller, manager=self.manager, quantity=Decimal('5.00'),
+            date=timezone.localdate(), source='From Farm', status='pending'
+        )
+        self.client.force_login(self.seller.user)
+
+    def replay(self, operations):
+        return self.client.post(reverse('replay-outbox'), {'operations': operations}, content_type='application/json')
+
+    def test_replay_applies_operations_once(self):
+        operations = [
+            {'client_id': str(uuid.uuid4()), 'type': 'sale', 'payload': {'quantity': '2.00'}},
+            {'client_id': str(uuid.uuid4()), 'type': 'daily_total', 'payload': {'cashEarned': '50', 'onlineEarned': '25'}},
+            {'client_id': str(uuid.uuid4()), 'type': 'receipt_status',
+             'payload': {'receipt_id': str(self.receipt.receipt_id), 'status': 'received'}},
+        ]
+
+        first = self.replay(operations).json()['results']
+        second = self.replay(operations).json()['results']
+
+        self.assertEqual([row['status'] for row in first], ['applied', 'applied', 'applied'])
+        self.assertEqual(second[0]['status'], 'duplicate')
+        self.assertEqual(Sale.objects.count(), 1)
+        self.assertEqual(self.seller.daily_totals.get().revenue, Decimal('75.00'))
+        self.assertEqual(Notification.objects.filter(user=self.manager.user).count(), 1)
+
+    def test_invalid_operations_are_rejected_individually(self):
+        results = self.replay([
+            {'client_id': str(uuid.uuid4()), 'type': 'attendance', 'payload': {'employeeId': 'EMP001'}},
+            {'client_id': str(uuid.uuid4()), 'type': 'sale', 'payload': {'quantity': 'lots'}},
+            {'client_id': str(uuid.uuid4()), 'type': 'sale', 'payload': {'quantity': '1.00'}},
+        ]).json()['results']
+
+        self.assertEqual([row['status'] for row in results], ['rejected', 'rejected', 'applied'])
+
+    def test_operations_apply_in_queue_order(self):
+        results = self.replay([
+            {'client_id': str(uuid.uuid4()), 'type': 'sale', 'payload': {'quantity': '4.00'}},
+            {'client_id': str(uuid.uuid4()), 'type': 'receipt_status',
+             'payload': {'receipt_id': str(self.receipt.receipt_id), 'status': 'not_received'}},
+            {'client_id': str(uuid.uuid4()), 'type': 'sale', 'payload': {'quantity': '7.00'}},
+        ]).json()['results']
+
+        # The pending 5L is gone by the time of the second sale, leaving 6L.
+        self.assertEqual([row['status'] for row in results], ['applied', 'applied', 'rejected'])
+        self.assertEqual(get_seller_remaining_milk(self.seller), Decimal('6.00'))
+
+    def test_operations_of_another_user_are_rejected(self):
+        other = create_seller('bala')
+        results = self.replay([
+            {'client_id': str(uuid.uuid4()), 'type': 'sale', 'payload': {'quantity': '1.00'},
+             'user_id': str(other.user.pk)},
+            {'client_id': str(uuid.uuid4()), 'type': 'sale', 'payload': {'quantity': '2.00'},
+             'user_id': str(self.seller.user.pk)},
+        ]).json()['results']
+
+        self.assertEqual([row['status'] for row in results], ['rejected', 'applied'])
+        self.assertEqual(list(Sale.objects.values_list('quantity', flat=True)), [Decimal('2.00')])
+
+    def test_single_sale_with_client_id_is_idempotent(self):
+        payload = {'quantity': '2.00', 'date': timezone.localdate().isoformat(), 'client_id': str(uuid.uuid4())}
+        url = reverse('record-individual-sale')
+
+        self.assertEqual(self.client.post(url, payload, content_type='application/json').status_code, 201)
+        self.assertEqual(self.client.post(url, payload, content_type='application/json').status_code, 200)
+        self.assertEqual(Sale.objects.count(), 1)
+
+    def test_service_worker_is_served_from_root(self):
+        response = self.client.get(reverse('service-worker'))
+
+        self.assertEqual(response['Content-Type'], 'application/javascript')
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertContains(response, reverse('replay-outbox'))
+        self.assertContains(response, 'event.data.type === "logout"')
+        # Replays use the page's current CSRF token and only the current user's entries.
+        self.assertContains(response, '"X-CSRFToken": session.csrf')
+        self.assertContains(response, 'operation.user_id === session.userId')
+
+
+class DeltaSyncTests(TestCase):
+    def setUp(self):
+        self.manager = create_manager()
+        self.seller = create_seller('anil')
+        self.client.force_login(self.seller.user)
+        self.url = reverse('sync-changes')
+
+    def test_first_sync_returns_everything(self):
+        receive_milk(self.seller, Decimal('10.00'))
+        Sale.objects.create(seller=self.seller, date=timezone.localdate(), quantity=Decimal('1.00'), total_amount=0)
+
+        data = self.client.get(self.url).json()
+
+        self.assertTrue(data['full_sync'])
+        self.assertEqual(len(data['changes']['milk_received']), 1)
+        self.assertEqual(len(data['changes']['sales']), 1)
+
+    def test_delta_returns_only_changes_and_tombstones(self):
+        receipt = receive_milk(self.seller, Decimal('10.00'), status='pending')
+        sale = Sale.objects.create(seller=self.seller, date=timezone.localdate(), quantity=Decimal('1.00'), total_amount=0)
+        cursor = self.client.get(self.url).json()['cursor']
+
+        # Age the existing rows past the overlap window of the cursor.
+        earlier = timezone.now() - timedelta(minutes=1)
+        MilkReceived.objects.update(updated_at=earlier)
+        Sale.objects.update(created_at=earlier)
+
+        data = self.client.get(self.url, {'since': cursor}).json()
+        self.assertFalse(data['full_sync'])
+        self.assertEqual(data['changes']['milk_received'], [])
+
+        receipt.status = 'received'
+        receipt.save()
+        sale_id = str(sale.sale_id)
+        sale.delete()
+
+        data = self.client.get(self.url, {'since': cursor}).json()
+        self.assertEqual([row['status'] for row in data['changes']['milk_received']], ['received'])
+        self.assertEqual(data['changes']['sales'], [])
+        self.assertEqual(data['deleted'], [{'model': 'sale', 'id': sale_id}])
+
+    def test_manager_feeds_and_bad_cursor(self):
+        self.client.force_login(self.manager.user)
+
+        data = self.client.get(self.url).json()
+        self.assertIn('attendance', data['changes'])
+        self.assertNotIn('sales', data['changes'])
+
+        response = self.client.get(self.url, {'since': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_users_without_profile_are_forbidden(self):
+        self.client.force_login(User.objects.create_user(username='orphan', password=None, role='seller'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    @override_settings(SYNC_TOMBSTONE_RETENTION_DAYS=1)
+    def test_old_tombstones_are_purged_by_command(self):
+        sale = Sale.objects.create(seller=self.seller, date=timezone.localdate(), quantity=Decimal('1.00'), total_amount=0)
+        sale.delete()
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=2))
+
+        self.client.get(self.url)
+        self.assertEqual(Tombstone.objects.count(), 1)
+
+        out = io.StringIO()
+        call_command('purge_tombstones', stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Deleted 1 tombstones.')
+        self.assertFalse(Tombstone.objects.exists())
+
+
+class SellerBootstrapTests(TestCase):
+    def setUp(self):
+        location = create_location()
+        self.manager = create_manager()
+        self.seller = create_seller('anil', location)
+        self.others = [create_seller(f'seller{index}', location) for index in range(3)]
+        self.client.force_login(self.seller.user)
+        self.url = reverse('seller-bootstrap')
+
+    def add_activity(self):
+        receive_milk(self.seller, Decimal('20.00'))
+        MilkReceived.objects.create(
+            seller=self.seller, manager=self.manager, quantity=Decimal('5.00'),
+            date=timezone.localdate(), source='From Farm', status='pending'
+        )
+        Sale.objects.create(seller=self.seller, date=timezone.localdate(), quantity=Decimal('2.00'), total_amount=0)
+        for other in self.others:
+            MilkRequest.objects.create(from_seller=other, quantity=Decimal('1.00'))
+            create_borrow_lend_record(self.seller, other, Decimal('1.00'))
+            create_borrow_lend_record(other, self.seller, Decimal('2.00'))
+            Notification.objects.create(user=self.seller.user, message='hello')
+
+    def test_bootstrap_matches_individual_endpoints(self):
+        self.add_activity()
+        data = self.client.get(self.url).json()
+
+        self.assertEqual(data['seller']['name'], 'Anil')
+        self.assertEqual(data['summary'], self.client.get(reverse('seller-daily-summary')).json())
+        self.assertEqual(data['incoming_requests'], self.client.get(reverse('list-incoming-requests')).json())
+        self.assertEqual(data['my_requests'], self.client.get(reverse('list-my-requests')).json())
+        self.assertEqual(data['notifications'], self.client.get(reverse('list-notifications')).json())
+        self.assertEqual(
+            data['pending_distributions'], self.client.get(reverse('list-pending-distributions')).json()
+        )
+        self.assertEqual(
+            data['borrow_lend_history'], self.client.get(reverse('borrow-lend-history')).json()
+        )
+
+    def test_query_count_does_not_grow_with_rows(self):
+        # Session load and user lookup, the seller, four summary aggregates,
+        # the archived monthly totals, today's sales, one query per list, two
+        # for each paginated feed, and the session save with its savepoint
+        # (three statements, since SESSION_SAVE_EVERY_REQUEST is on).
+        self.add_activity()
+        with self.assertNumQueries(19):
+            self.client.get(self.url)
+
+        self.add_activity()
+        self.add_activity()
+        with self.assertNumQueries(19):
+            self.client.get(self.url)
+
+
+class ManagerBootstrapTests(TestCase):
+    def setUp(self):
+        self.manager = create_manager()
+        get_or_create_daily_operations(self.manager)
+        self.client.force_login(self.manager.user)
+        self.url = reverse('manager-bootstrap')
+        self.added = 0
+
+    def add_farm(self, count):
+        for _ in range(count):
+            self.added += 1
+            location = create_location(f'Village {self.added}')
+            seller = create_seller(f'seller{self.added}', location)
+            user = User.objects.create_user(username=f'employee{self.added}', password=None, role='employee')
+            employee = Employee.objects.create(
+                name=f'Employee {self.added}', base_salary=Decimal('500.00'), user=user, manager=self.manager
+            )
+            Attendance.objects.create(employee=employee, date=timezone.localdate(), status='present')
+            MilkReceived.objects.create(
+                seller=seller, manager=self.manager, quantity=Decimal('10.00'),
+                date=timezone.localdate(), source='From Farm', status='pending'
+            )
+            DailyTotal.objects.create(seller=seller, date=timezone.localdate(), revenue=Decimal('100.00'))
+
+    def test_location_statistics_use_fixed_queries(self):
+        self.add_farm(2)
+        receive_milk(Seller.objects.get(location__location_name='Village 1'), Decimal('2.50'))
+        with self.assertNumQueries(2):
+            stats = get_location_statistics()
+
+        self.assertEqual([row['seller_count'] for row in stats], [1, 1])
+        self.assertEqual(stats[0]['milk_received_today'], Decimal('12.50'))
+        self.assertEqual(stats[0]['farm_milk_today'], Decimal('12.50'))
+        self.assertEqual(stats[1]['inter_seller_milk_today'], Decimal('0.00'))
+
+    def test_query_count_is_independent_of_farm_size(self):
+        # Session load and user lookup, the manager, the daily operations
+        # lookup, one query per list or aggregate (two for locations), and
+        # the session save with its savepoint.
+        self.add_farm(1)
+        with self.assertNumQueries(21):
+            data = self.client.get(self.url).json()
+        self.assertEqual(len(data['employees']['results']), 1)
+
+        self.add_farm(4)
+        with self.assertNumQueries(21):
+            data = self.client.get(self.url).json()
+        self.assertEqual(len(data['employees']['results']), 5)
+        self.assertEqual(len(data['locations']), 5)
+        self.assertEqual(len(data['datewise']['attendance']), 5)
+        self.assertEqual(len(data['pending_distributions']['results']), 5)
+
+    def test_sections_can_be_selected(self):
+        self.add_farm(1)
+        data = self.client.get(self.url, {'sections': 'employees,sales_trend'}).json()
+        self.assertEqual(set(data), {'date', 'employees', 'sales_trend'})
+        self.assertEqual(data['employees'], self.client.get(reverse('list-employees')).json())
+
+        response = self.client.get(self.url, {'sections': 'employees,payroll'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_sales_trend_columnar_format(self):
+        self.add_farm(2)
+        yesterday = timezone.localdate() - timedelta(days=1)
+        DailyTotal.objects.create(
+            seller=Seller.objects.get(location__location_name='Village 1'), date=yesterday, revenue=Decimal('40.25')
+        )
+
+        rows = self.client.get(reverse('get-sales-trend')).json()
+        data = self.client.get(reverse('get-sales-trend'), {'format': 'columnar'}).json()
+
+        self.assertEqual(data, {
+            'labels': [yesterday.isoformat(), timezone.localdate().isoformat()],
+            'series': {'daily_revenue': [40.25, 200.0]},
+        })
+        self.assertEqual(data['labels'], [row['day'] for row in rows])
+
+        data = self.client.get(self.url, {'sections': 'sales_trend', 'format': 'columnar'}).json()
+        self.assertEqual(data['sales_trend']['series']['daily_revenue'], [40.25, 200.0])
+
+
+class BatchRequestTests(TestCase):
+    def setUp(self):
+        self.seller = create_seller('anil')
+        receive_milk(self.seller, Decimal('10.00'))
+        self.client.force_login(self.seller.user)
+        self.url = reverse('batch-requests')
+
+    def post_batch(self, requests, **extra):
+        return self.client.post(self.url, {'requests': requests, **extra}, content_type='application/json')
+
+    def sale(self, quantity):
+        return {
+            'method': 'POST',
+            'path': reverse('record-individual-sale'),
+            'body': {'quantity': quantity, 'date': str(timezone.localdate())}
+        }
+
+    def test_sub_requests_run_through_existing_views(self):
+        response = self.post_batch([
+            self.sale('2.00'),
+            {'method': 'GET', 'path': reverse('seller-daily-summary') + f'?date={timezone.localdate()}'},
+            {'method': 'GET', 'path': '/api/nowhere/'},
+            {'method': 'GET', 'path': reverse('seller-dashboard')},
+            {'method': 'POST', 'path': self.url, 'body': {'requests': []}},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results], [201, 200, 404, 400, 400])
+        self.assertEqual(results[1]['body']['total_milk_sold'], 2.0)
+        self.assertFalse(response.json()['rolled_back'])
+
+    def test_atomic_batch_rolls_back_on_first_failure(self):
+        response = self.post_batch([self.sale('2.00'), self.sale('50.00'), self.sale('1.00')], atomic=True)
+
+        data = response.json()
+        self.assertTrue(data['rolled_back'])
+        self.assertEqual([result['status'] for result in data['results']], [201, 400])
+        self.assertFalse(Sale.objects.exists())
+
+        data = self.post_batch([self.sale('2.00'), self.sale('50.00')]).json()
+        self.assertEqual([result['status'] for result in data['results']], [201, 400])
+        self.assertEqual(Sale.objects.count(), 1)
+
+    def test_sub_requests_run_through_app_middleware(self):
+        def sales_counted():
+            line = 'thoneti_http_requests_total{view="record-individual-sale",method="POST",status="201"} '
+            with override_settings(METRICS_TOKEN='scrape'):
+                body = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape').content.decode()
+            for row in body.splitlines():
+                if row.startswith(line):
+                    return int(row[len(line):])
+            return 0
+
+        counted = sales_counted()
+        sale = {**self.sale('1.00'), 'idempotency_key': 'sale-1'}
+        results = self.post_batch([sale, sale], HTTP_IDEMPOTENCY_KEY='whole-batch').json()['results']
+
+        self.assertEqual([result['status'] for result in results], [201, 201])
+        self.assertEqual(Sale.objects.count(), 1)
+        self.assertTrue(IdempotencyKey.objects.filter(key='sale-1').exists())
+        self.assertEqual(sales_counted(), counted + 2)
+
+    def test_django_exceptions_become_responses(self):
+        def missing(request):
+            raise Http404
+
+        request = RequestFactory().get('/api/missing/')
+        request.user = self.seller.user
+        request.resolver_match = ResolverMatch(missing, (), {}, url_name='missing')
+        self.assertEqual(build_sub_request_handler()(request).status_code, 404)
+
+    def test_batch_is_authenticated_and_csrf_checked(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.seller.user)
+        response = client.post(self.url, {'requests': [self.sale('1.00')]}, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+
+        self.client.logout()
+        self.assertEqual(self.post_batch([self.sale('1.00')]).status_code, 403)
+
+
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        self.seller = create_seller('anil')
+        self.client.force_login(self.seller.user)
+
+    def test_fingerprint_collapses_in_lists(self):
+        self.assertEqual(
+            query_fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s, %s)'),
+            query_fingerprint('SELECT 1 FROM t WHERE id IN (%s)')
+        )
+
+    def test_request_over_budget_fails_in_strict_mode(self):
+        with override_settings(QUERY_BUDGETS={'list-notifications': 2}, QUERY_BUDGET_STRICT=True):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse('list-notifications'))
+
+    def test_request_over_budget_is_logged_with_repeated_queries(self):
+        summary = {'method': 'GET', 'path': reverse('seller-daily-summary')}
+        with override_settings(QUERY_BUDGETS={'batch-requests': 2}, QUERY_BUDGET_STRICT=False):
+            with self.assertLogs('Thoneti.middleware', 'WARNING') as logs:
+                response = self.client.post(
+                    reverse('batch-requests'), {'requests': [summary, summary]}, content_type='application/json'
+                )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('batch-requests ran', logs.output[0])
+        self.assertIn('Repeated: 2x SELECT', logs.output[0])
+
+
+@override_settings(METRICS_TOKEN='scrape')
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.seller = create_seller('anil')
+
+    def test_requests_are_exposed_in_prometheus_format(self):
+        self.client.force_login(self.seller.user)
+        self.client.get(reverse('list-notifications'))
+
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape')
+        body = response.content.decode()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn('thoneti_http_requests_total{view="list-notifications",method="GET",status="200"}', body)
+        self.assertIn('thoneti_http_request_duration_seconds_bucket{view="list-notifications",le="+Inf"}', body)
+        self.assertIn('thoneti_db_queries_total{view="list-notifications"}', body)
+        self.assertIn('thoneti_http_requests_in_flight 1', body)
+
+    def test_endpoint_is_internal(self):
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.5').status_code, 403)
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.5', HTTP_AUTHORIZATION='Bearer scrape')
+        self.assertEqual(response.status_code, 200)
+
+    def test_local_address_needs_the_token_outside_debug(self):
+        # Behind nginx every client arrives as 127.0.0.1.
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1').status_code, 403)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1').status_code, 200)
+
+    def test_concurrent_flushes_do_not_fail_requests(self):
+        registry = MetricsRegistry()
+        errors = []
+
+        def record():
+            try:
+                for _ in range(50):
+                    registry.request_started()
+                    registry.request_finished('list-notifications', 'GET', 200, 0.01)
+                    registry.flush(directory)
+            except Exception as error:
+                errors.append(error)
+
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(METRICS_DIR=directory, METRICS_FLUSH_SECONDS=0):
+            threads = [threading.Thread(target=record) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(os.listdir(directory), [f'{os.getpid()}.json'])
+        self.assertEqual(errors, [])
+
+        with tempfile.NamedTemporaryFile() as not_a_directory, \
+                override_settings(METRICS_DIR=not_a_directory.name, METRICS_FLUSH_SECONDS=0):
+            registry.request_started()
+            with self.assertLogs('Thoneti.metrics', 'ERROR'):
+                registry.request_finished('list-notifications', 'GET', 200, 0.01)
+
+    def test_worker_snapshots_are_merged(self):
+        registry = MetricsRegistry()
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(METRICS_DIR=directory, METRICS_FLUSH_SECONDS=0):
+            registry.request_started()
+            registry.request_finished('seller-bootstrap', 'GET', 200, 0.02, 18, 0.004)
+            registry.request_started()
+            registry.request_finished('seller-bootstrap', 'GET', 500, 0.3)
+            # A worker that has since exited.
+            worker = subprocess.Popen([sys.executable, '-c', ''])
+            worker.wait()
+            with open(f'{directory}/{worker.pid}.json', 'w') as handle:
+                json.dump({
+                    'pid': worker.pid, 'requests': [['seller-bootstrap', 'GET', '200', 3]], 'errors': [],
+                    'durations': [['seller-bootstrap', [0, 0, 3] + [0] * 9, 0.05]],
+                    'db': [['seller-bootstrap', 54, 0.01]], 'in_flight': 2,
+                }, handle)
+            body = registry.render()
+
+        self.assertIn('thoneti_http_requests_total{view="seller-bootstrap",method="GET",status="200"} 4', body)
+        self.assertIn('thoneti_http_errors_total{view="seller-bootstrap"} 1', body)
+        self.assertIn('thoneti_http_request_duration_seconds_bucket{view="seller-bootstrap",le="0.025"} 4', body)
+        self.assertIn('thoneti_http_request_duration_seconds_count{view="seller-bootstrap"} 5', body)
+        self.assertIn('thoneti_db_queries_total{view="seller-bootstrap"} 72', body)
+        self.assertIn('thoneti_http_requests_in_flight 0', body)
+
+    def test_recording_is_cheap(self):
+        registry = MetricsRegistry()
+        started = time.perf_counter()
+        for _ in range(10000):
+            registry.request_started()
+            registry.request_finished('list-notifications', 'GET', 200, 0.01, 5, 0.001)
+        elapsed = time.perf_counter() - started
+        self.assertLess(elapsed, 1)
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.seller = create_seller('anil')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def request_profiles(self, view):
+        path = os.path.join(self.directory, view)
+        return sorted(os.listdir(path)) if os.path.isdir(path) else []
+
+    def test_disabled_without_profiling_dir(self):
+        with override_settings(PROFILING_DIR=None):
+            with self.assertRaises(MiddlewareNotUsed):
+                ProfilingMiddleware(lambda request: None)
+
+    def test_signed_header_profiles_request(self):
+        with override_settings(PROFILING_DIR=self.directory, PROFILING_SAMPLE_RATE=0):
+            client = Client()
+            client.force_login(self.seller.user)
+            client.get(reverse('list-notifications'))
+            client.get(reverse('list-notifications'), HTTP_X_PROFILE='profile:forged')
+            self.assertEqual(self.request_profiles('list-notifications'), [])
+
+            response = client.get(reverse('list-notifications'), HTTP_X_PROFILE=profile_token())
+
+        self.assertEqual(response.status_code, 200)
+        [name] = self.request_profiles('list-notifications')
+        self.assertTrue(name.endswith('.prof'))
+        self.assertIn('-GET-200-', name)
+        stats = pstats.Stats(os.path.join(self.directory, 'list-notifications', name))
+        self.assertTrue(any(function == 'list_notifications' for _, _, function in stats.stats))
+
+    def test_sample_rate_profiles_every_request(self):
+        with override_settings(PROFILING_DIR=self.directory, PROFILING_SAMPLE_RATE=1, PROFILING_KEEP_PER_VIEW=2):
+            client = Client()
+            client.force_login(self.seller.user)
+            for _ in range(3):
+                client.get(reverse('list-notifications'))
+
+        self.assertEqual(len(self.request_profiles('list-notifications')), 2)
+
+    def test_sampler_collapses_stacks(self):
+        def busy_view():
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+
+        sampler = StackSampler(0.001)
+        sampler.enable()
+        busy_view()
+        sampler.disable()
+        path = os.path.join(self.directory, 'sample.collapsed')
+        sampler.dump_stats(path)
+
+        with open(path) as collapsed:
+            lines = collapsed.read().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertTrue(stack.endswith(f'{__name__}:busy_view'))
+        self.assertGreater(int(count), 0)
+
+    def test_admin_page_lists_and_downloads_profiles(self):
+        os.makedirs(os.path.join(self.directory, 'seller-bootstrap'))
+        with open(os.path.join(self.directory, 'seller-bootstrap', 'sample.prof'), 'wb') as profile:
+            profile.write(b'stats')
+        staff = User.objects.create_superuser(username='root', password=None)
+
+        with override_settings(PROFILING_DIR=self.directory):
+            self.client.force_login(self.seller.user)
+            self.assertEqual(self.client.get(reverse('profile-list')).status_code, 302)
+
+            self.client.force_login(staff)
+            listing = self.client.get(reverse('profile-list'))
+            download = self.client.get(reverse('profile-download', args=['seller-bootstrap', 'sample.prof']))
+            escape = self.client.get(reverse('profile-download', args=['..', 'settings.py']))
+
+        self.assertContains(listing, 'sample.prof')
+        self.assertContains(listing, 'X-Profile: ')
+        self.assertEqual(b''.join(download.streaming_content), b'stats')
+        self.assertEqual(escape.status_code, 404)
+
+
+class SlowQueryCaptureTests(TestCase):
+    def setUp(self):
+        self.seller = create_seller('anil')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log_path = os.path.join(directory.name, 'slow.jsonl')
+
+    def get_summary(self, threshold):
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=threshold, SLOW_QUERY_LOG=self.log_path):
+            client = Client()
+            client.force_login(self.seller.user)
+            return client.get(reverse('seller-daily-summary'))
+
+    def test_slow_queries_are_logged_with_plan(self):
+        with self.assertLogs('Thoneti.middleware', 'WARNING') as logs:
+            response = self.get_summary(threshold=0)
+
+        self.assertEqual(response.status_code, 200)
+        with open(self.log_path) as log:
+            entries = [json.loads(line) for line in log]
+        selects = [entry for entry in entries if entry['sql'].startswith('SELECT')]
+        self.assertTrue(selects)
+        self.assertTrue(all(entry['view'] == 'seller-daily-summary' for entry in selects))
+        self.assertTrue(all(entry['plan'] and 'EXPLAIN failed' not in entry['plan'] for entry in selects))
+        self.assertIn('Slow query in GET seller-daily-summary', logs.output[0])
+
+    def test_explain_is_not_counted_or_captured(self):
+        quiet = self.get_summary(threshold=10000)
+        with self.assertLogs('Thoneti.middleware', 'WARNING'):
+            captured = self.get_summary(threshold=0)
+
+        with open(self.log_path) as log:
+            entries = [json.loads(line) for line in log]
+        self.assertEqual(captured.wsgi_request.query_stats.count, quiet.wsgi_request.query_stats.count)
+        self.assertEqual(len(entries), captured.wsgi_request.query_stats.count)
+        self.assertFalse(any(entry['sql'].startswith('EXPLAIN') for entry in entries))
+
+    def test_report_ranks_by_total_time(self):
+        with open(self.log_path, 'w') as log:
+            for view, sql, duration, plan in [
+                ('seller-daily-summary', 'SELECT SUM(quantity) FROM sale', 300, 'SCAN sale'),
+                ('seller-daily-summary', 'SELECT SUM(quantity) FROM sale', 250, 'SCAN sale'),
+                ('manager-bootstrap', 'SELECT * FROM milk_received', 400, 'SCAN milk_received'),
+            ]:
+                log.write(json.dumps({'view': view, 'method': 'GET', 'duration_ms': duration, 'sql': sql, 'plan': plan}) + '\n')
+
+        out = io.StringIO()
+        call_command('slow_query_report', log=self.log_path, stdout=out)
+        report = out.getvalue()
+
+        self.assertLess(report.index('FROM sale'), report.index('FROM milk_received'))
+        self.assertIn('#1  2 runs, 550.0ms total, 275.0ms mean, 300.0ms max', report)
+        self.assertIn('| SCAN sale', report)
+
+        out = io.StringIO()
+        call_command('slow_query_report', log=self.log_path, sort='max', limit=1, stdout=out)
+        self.assertNotIn('FROM sale', out.getvalue())
+
+        with override_settings(SLOW_QUERY_LOG=None), self.assertRaises(CommandError):
+            call_command('slow_query_report')
+
+
+class IndexPlanTests(TestCase):
+    """The hot filters use the indexes from 0007_hot_filter_indexes on a generated farm."""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'generate_farm_data', managers=2, employees=2, locations=3, sellers=8, years=0.25,
+            request_rate=0.3, stdout=io.StringIO()
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.seller = Seller.objects.order_by('created_at').first()
+        cls.manager = Manager.objects.order_by('created_at').first()
+        cls.day = MilkReceived.objects.order_by('-date').values_list('date', flat=True).first()
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # A test-sized table is cheaper to scan; ask which index would serve a large one.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        names = {index_name}
+        if connection.vendor == 'postgresql':
+            # On partitioned tables (DB_PARTITIONING) the plan names each partition's copy.
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+                    'WHERE i.inhparent = to_regclass(%s)',
+                    [index_name]
+                )
+                names.update(name for name, in cursor.fetchall())
+        plan = queryset.explain()
+        self.assertTrue(
+            any(re.search(rf'\b{re.escape(name)}\b', plan) for name in names), f'{index_name} not used:\n{plan}'
+        )
+
+    def test_dataset_covers_the_filters(self):
+        self.assertTrue(MilkReceived.objects.filter(seller=self.seller, status='pending').exists())
+        self.assertTrue(BorrowLendRecord.objects.filter(settled=False).exists())
+        self.assertTrue(MilkRequest.objects.exists())
+        self.assertTrue(Notification.objects.exists())
+
+    def test_seller_pending_receipts(self):
+        self.assertUsesIndex(
+            MilkReceived.objects.filter(seller=self.seller, status='pending').order_by('date'),
+            'milkreceived_seller_status_idx'
+        )
+
+    def test_location_totals_for_a_day(self):
+        self.assertUsesIndex(
+            MilkReceived.objects.filter(date=self.day, source='From Farm'), 'milkreceived_date_source_idx'
+        )
+
+    def test_manager_pending_distributions(self):
+        self.assertUsesIndex(
+            MilkReceived.objects.filter(manager=self.manager, status='pending').order_by('date', 'receipt_id'),
+            'milkreceived_pending_idx'
+        )
+
+    def test_seller_sales_for_a_day(self):
+        self.assertUsesIndex(
+            Sale.objects.filter(seller=self.seller, date=self.day).order_by('-created_at'), 'sale_seller_date_idx'
+        )
+
+    def test_seller_open_lending(self):
+        self.assertUsesIndex(
+            BorrowLendRecord.objects.filter(lender_seller=self.seller, settled=False),
+            'borrowlend_lender_settled_idx'
+        )
+
+    def test_open_balances(self):
+        self.assertUsesIndex(
+            BorrowLendRecord.objects.filter(settled=False).values_list('borrower_seller', 'lender_seller'),
+            'borrowlend_unsettled_idx'
+        )
+
+    def test_stale_pending_requests(self):
+        self.assertUsesIndex(
+            MilkRequest.objects.filter(status='pending', created_at__lt=timezone.now()),
+            'milkrequest_status_created_idx'
+        )
+
+    def test_latest_notifications(self):
+        self.assertUsesIndex(
+            Notification.objects.filter(user=self.seller.user).order_by('-timestamp')[:20],
+            'notification_user_time_idx'
+        )
+
+
+class PartitioningTests(TestCase):
+    def test_month_arithmetic(self):
+        self.assertEqual(add_months(date(2026, 11, 1), 2), date(2027, 1, 1))
+        self.assertEqual(add_months(date(2026, 1, 1), -1), date(2025, 12, 1))
+        self.assertEqual(partition_name('sale', date(2026, 3, 1)), 'sale_p2026_03')
+
+    @skipIf(connection.vendor == 'postgresql', 'Checks the fallback of other backends')
+    def test_commands_fall_back_without_postgres(self):
+        seller = create_seller('anil')
+        Sale.objects.create(seller=seller, date=timezone.localdate(), quantity=2, total_amount=100)
+
+        out = io.StringIO()
+        call_command('manage_partitions', stdout=out)
+        self.assertIn('tables stay unpartitioned', out.getvalue())
+
+        out = io.StringIO()
+        call_command('benchmark_recent_queries', iterations=2, stdout=out)
+        self.assertIn('1 sales', out.getvalue())
+        self.assertIn('latest notifications', out.getvalue())
+
+
+@skipIf(connection.vendor != 'postgresql', 'Range partitioning needs Postgres')
+class PostgresPartitioningTests(TestCase):
+    def setUp(self):
+        # Convert first: Postgres cannot alter a table with deferred foreign key checks pending.
+        with connection.cursor() as cursor:
+            if not is_partitioned(cursor, 'sale'):
+                convert_table(cursor, 'sale', 'sale_id', 'date', months_ahead=1)
+        self.seller = create_seller('anil')
+        self.month = timezone.localdate().replace(day=1)
+
+    def partition_rows(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {connection.ops.quote_name(name)}')
+            return cursor.fetchone()[0]
+
+    def test_recent_queries_prune_to_one_partition(self):
+        Sale.objects.create(seller=self.seller, date=self.month, quantity=1, total_amount=50)
+        Sale.objects.create(seller=self.seller, date=add_months(self.month, -1), quantity=1, total_amount=50)
+
+        plan = Sale.objects.filter(seller=self.seller, date=self.month).explain()
+
+        self.assertIn(partition_name('sale', self.month), plan)
+        self.assertNotIn(partition_name('sale', add_months(self.month, -1)), plan)
+        self.assertNotIn('sale_default', plan)
+
+    def test_new_partition_takes_rows_from_default(self):
+        later = add_months(self.month, 12)
+        Sale.objects.create(seller=self.seller, date=later, quantity=1, total_amount=50)
+        self.assertEqual(self.partition_rows('sale_default'), 1)
+
+        with connection.cursor() as cursor:
+            create_partition(cursor, 'sale', 'date', later)
+
+        self.assertEqual(self.partition_rows('sale_default'), 0)
+        self.assertEqual(self.partition_rows(partition_name('sale', later)), 1)
+        self.assertEqual(Sale.objects.filter(date=later).count(), 1)
+
+    def test_client_id_stays_unique_across_months(self):
+        client_id = uuid.uuid4()
+        sale = Sale.objects.create(
+            seller=self.seller, date=self.month, quantity=1, total_amount=50, client_id=client_id
+        )
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Sale.objects.create(
+                seller=self.seller, date=add_months(self.month, -1), quantity=1, total_amount=50, client_id=client_id
+            )
+
+        Sale.objects.create(seller=self.seller, date=self.month, quantity=1, total_amount=50)
+        Sale.objects.create(seller=self.seller, date=self.month, quantity=1, total_amount=50)
+        sale.delete()
+        Sale.objects.create(
+            seller=self.seller, date=add_months(self.month, -1), quantity=1, total_amount=50, client_id=client_id
+        )
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.manager = create_manager()
+        self.seller = create_seller('anil')
+        user = User.objects.create_user(username='ravi', password=None, role='employee')
+        self.employee = Employee.objects.create(name='Ravi', base_salary=Decimal('400'), user=user, manager=self.manager)
+        self.old_day = first_hot_month() - timedelta(days=10)
+        self.old_month = self.old_day.replace(day=1)
+
+        MilkReceived.objects.create(
+            seller=self.seller, manager=self.manager, quantity=Decimal('10'), date=self.old_day,
+            source='From Farm', status='received'
+        )
+        Sale.objects.create(seller=self.seller, date=self.old_day, quantity=Decimal('4'), total_amount=Decimal('200'))
+        DailyTotal.objects.create(
+            seller=self.seller, date=self.old_day, cash_sales=Decimal('150'), online_sales=Decimal('50'),
+            revenue=Decimal('200')
+        )
+        Attendance.objects.create(employee=self.employee, date=self.old_day, status='present')
+        receive_milk(self.seller, Decimal('5'))
+        Sale.objects.create(seller=self.seller, date=timezone.localdate(), quantity=Decimal('1'), total_amount=Decimal('50'))
+
+    def test_archiving_moves_rows_and_keeps_totals(self):
+        remaining = get_seller_remaining_milk(self.seller)
+        summary = get_seller_daily_summary(self.seller)
+
+        archived = archive_month(self.old_day)
+
+        self.assertEqual(archived, {'milkreceived': 1, 'sale': 1, 'dailytotal': 1, 'attendance': 1})
+        self.assertFalse(Sale.objects.filter(date__lt=first_hot_month()).exists())
+        self.assertFalse(Attendance.objects.exists())
+        self.assertFalse(Tombstone.objects.exists())
+        self.assertEqual(remaining, Decimal('10.00'))
+        self.assertEqual(get_seller_remaining_milk(self.seller), remaining)
+        self.assertEqual(get_seller_daily_summary(self.seller)['remaining_milk'], summary['remaining_milk'])
+        self.assertEqual(calculate_and_update_salary(self.employee, self.old_day).days_worked, 1)
+
+        rollup = SellerMonthlySummary.objects.get(seller=self.seller, month=self.old_month)
+        self.assertEqual(
+            (rollup.milk_received, rollup.milk_sold, rollup.sale_count, rollup.revenue),
+            (Decimal('10'), Decimal('4'), 1, Decimal('200'))
+        )
+
+    def test_archived_rows_stay_queryable(self):
+        archive_month(self.old_day)
+
+        [sale] = archived_rows(Sale, self.old_day)
+        self.assertEqual(sale.quantity, Decimal('4'))
+        self.assertEqual(archived_rows(Sale, self.old_day + timedelta(days=1)), [])
+
+        self.client.force_login(self.manager.user)
+        response = self.client.get(reverse('get-datewise-data'), {'date': self.old_day.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        [receipt] = response.data['milk_received']
+        self.assertEqual((receipt['seller_name'], receipt['manager_name'], receipt['quantity']), ('Anil', 'Manager', '10.00'))
+        self.assertEqual(response.data['daily_totals'][0]['revenue'], '200.00')
+        self.assertEqual(response.data['attendance'][0]['employee_name'], 'Ravi')
+
+    def test_late_rows_are_appended_on_the_next_run(self):
+        archive_month(self.old_day)
+        Sale.objects.create(seller=self.seller, date=self.old_day, quantity=Decimal('2'), total_amount=Decimal('100'))
+        self.assertEqual(get_seller_remaining_milk(self.seller), Decimal('8.00'))
+
+        self.assertEqual(archive_month(self.old_day), {'sale': 1})
+
+        self.assertEqual(ArchivedMonth.objects.get(model='sale', month=self.old_month).row_count, 2)
+        self.assertEqual(len(archived_rows(Sale, self.old_day)), 2)
+        self.assertEqual(SellerMonthlySummary.objects.get(seller=self.seller).milk_sold, Decimal('6'))
+        self.assertEqual(get_seller_remaining_milk(self.seller), Decimal('8.00'))
+
+    def test_writes_into_an_archived_month_are_refused(self):
+        archive_month(self.old_day)
+        old_day = self.old_day.isoformat()
+
+        self.client.force_login(self.manager.user)
+        for url, data in [
+            (reverse('mark-attendance'), {'employeeId': self.employee.employee_id, 'date': old_day, 'status': 'absent'}),
+            (reverse('record-milk-distribution'), {
+                'location_id': str(self.seller.location.location_id), 'date': old_day, 'quantity': '10'
+            }),
+        ]:
+            response = self.client.post(url, data, content_type='application/json')
+            self.assertEqual(response.status_code, 400, url)
+            self.assertIn('is closed and archived', response.json()['message'])
+        [result] = self.client.post(reverse('replay-outbox'), {'operations': [{
+            'client_id': str(uuid.uuid4()), 'type': 'attendance',
+            'payload': {'employeeId': self.employee.employee_id, 'date': old_day, 'status': 'absent'},
+        }]}, content_type='application/json').json()['results']
+        self.assertEqual(result['status'], 'rejected')
+
+        self.client.force_login(self.seller.user)
+        for url, data in [
+            (reverse('record-individual-sale'), {'quantity': '1.00', 'date': old_day}),
+            (reverse('record-daily-totals'), {'date': old_day, 'cashEarned': '10', 'onlineEarned': '0'}),
+        ]:
+            self.assertEqual(self.client.post(url, data, content_type='application/json').status_code, 400, url)
+        [result] = self.client.post(reverse('record-sales-batch'), {'sales': [
+            {'client_id': str(uuid.uuid4()), 'quantity': '1.00', 'date': old_day},
+        ]}, content_type='application/json').json()['results']
+        self.assertEqual(result['status'], 'rejected')
+
+        self.assertEqual(calculate_and_update_salary(self.employee, self.old_day).days_worked, 1)
+        self.assertEqual(archive_month(self.old_day), {})
+        self.assertEqual(SellerMonthlySummary.objects.get(seller=self.seller).revenue, Decimal('200'))
+        self.assertEqual(AttendanceMonthlySummary.objects.get(employee=self.employee).present, 1)
+
+    def test_only_closed_months_are_archived(self):
+        with self.assertRaises(MonthNotClosed):
+            archive_month(timezone.localdate())
+
+        MilkReceived.objects.create(
+            seller=self.seller, quantity=Decimal('3'), date=self.old_day, source='From Farm', status='pending'
+        )
+        with self.assertRaises(MonthNotClosed):
+            archive_month(self.old_day)
+        self.assertTrue(Sale.objects.filter(date=self.old_day).exists())
+
+    def test_command_archives_every_closed_month(self):
+        out = io.StringIO()
+        call_command('archive_closed_months', dry_run=True, stdout=out)
+        self.assertEqual(out.getvalue(), f'{self.old_month:%Y-%m}: would be archived\n')
+        self.assertEqual(MilkReceived.objects.count(), 2)
+
+        out = io.StringIO()
+        call_command('archive_closed_months', stdout=out)
+        self.assertIn('archived 1 milkreceived, 1 sale, 1 dailytotal, 1 attendance', out.getvalue())
+        self.assertEqual(MilkReceived.objects.count(), 1)
+
+        with self.assertRaises(CommandError):
+            call_command('archive_closed_months', month=f'{timezone.localdate():%Y-%m}', stdout=io.StringIO())
+
+
+class TimeOrderedIdTests(TestCase):
+    def test_uuid7_layout(self):
+        value = uuid7()
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, uuid.RFC_4122)
+        self.assertLess(abs((uuid7_time(value) - timezone.now()).total_seconds()), 5)
+
+    def test_uuid7_is_strictly_increasing(self):
+        values = [uuid7() for _ in range(10000)]
+        self.assertEqual(values, sorted(set(values)))
+
+    def test_setting_switches_new_keys(self):
+        self.assertEqual(time_ordered_id().version, 4)
+        seller = create_seller('anil')
+        with override_settings(TIME_ORDERED_IDS=True):
+            self.assertEqual(time_ordered_id().version, 7)
+            sale = Sale.objects.create(seller=seller, date=timezone.localdate(), quantity=2, total_amount=100)
+        self.assertEqual(Sale.objects.get(pk=sale.pk).sale_id.version, 7)
+
+    def test_benchmark_command(self):
+        out = io.StringIO()
+        call_command('benchmark_uuid_keys', rows=50, batch_size=20, stdout=out)
+        self.assertIn('uuid4', out.getvalue())
+        self.assertIn('uuid7', out.getvalue())
+        self.assertNotIn('uuid_benchmark_uuid4', connection.introspection.table_names())
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        location = create_location()
+        self.seller = create_seller('anil', location)
+        self.neighbours = [create_seller(f'seller{index}', location) for index in range(3)]
+        self.client.force_login(self.seller.user)
+        self.url = reverse('create-milk-request')
+
+    def post(self, body, key=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post(self.url, body, content_type='application/json', **headers)
+
+    def test_retry_replays_stored_response(self):
+        first = self.post({'quantity': '5.00'}, key='retry-1')
+        notifications = Notification.objects.count()
+        second = self.post({'quantity': '5.00'}, key='retry-1')
+
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(MilkRequest.objects.count(), 1)
+        self.assertEqual(Notification.objects.count(), notifications)
+
+    def test_key_reused_for_different_request_is_rejected(self):
+        self.post({'quantity': '5.00'}, key='retry-1')
+        response = self.post({'quantity': '6.00'}, key='retry-1')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(MilkRequest.objects.count(), 1)
+
+    def test_requests_without_key_or_after_expiry_run_again(self):
+        self.post({'quantity': '5.00'})
+        self.post({'quantity': '5.00'})
+        self.assertEqual(MilkRequest.objects.count(), 2)
+
+        self.post({'quantity': '5.00'}, key='retry-1')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        response = self.post({'quantity': '6.00'}, key='retry-1')
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(response.has_header('Idempotent-Replayed'))
+        self.assertEqual(MilkRequest.objects.count(), 4)
+        self.assertEqual(self.post({'quantity': '6.00'}, key='retry-1')['Idempotent-Replayed'], 'true')
+
+    def test_expired_keys_are_purged_by_command(self):
+        self.post({'quantity': '5.00'}, key='retry-1')
+        self.post({'quantity': '5.00'}, key='retry-2')
+        IdempotencyKey.objects.filter(key='retry-1').update(created_at=timezone.now() - timedelta(days=2))
+
+        out = io.StringIO()
+        call_command('purge_idempotency_keys', stdout=out)
+
+        self.assertEqual(out.getvalue().strip(), 'Deleted 1 idempotency keys.')
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['retry-2'])
+
+    def test_in_flight_key_conflicts_until_stale(self):
+        IdempotencyKey.objects.create(
+            user=self.seller.user, key='retry-1', request_hash=self.hash_of({'quantity': '5.00'})
+        )
+
+        self.assertEqual(self.post({'quantity': '5.00'}, key='retry-1').status_code, 409)
+
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(self.post({'quantity': '5.00'}, key='retry-1').status_code, 201)
+        self.assertEqual(MilkRequest.objects.count(), 1)
+
+    def hash_of(self, body):
+        request = RequestFactory().post(self.url, body, content_type='application/json')
+        return _request_hash(request)
+
+
+def as_json(data):
+    return json.loads(JSONRenderer().render(data))
+
+
+class ProjectionTests(TestCase):
+    def setUp(self):
+        self.manager = create_manager()
+        self.seller = create_seller('anil')
+        self.other = create_seller('bala')
+
+    def test_projections_match_serializer_output(self):
+        receive_milk(self.seller, Decimal('10.5'))
+        MilkReceived.objects.create(
+            seller=self.other, manager=self.manager, quantity=Decimal('3.25'),
+            date=timezone.localdate(), source='From Farm', status='pending'
+        )
+        MilkRequest.objects.create(from_seller=self.seller, quantity=Decimal('2'))
+        MilkRequest.objects.create(from_seller=self.seller, to_seller=self.other, quantity=Decimal('4'), status='on_hold')
+        user = User.objects.create_user(username='ravi', password=None, role='employee')
+        employee = Employee.objects.create(name='Ravi', base_salary=Decimal('400'), user=user, manager=self.manager)
+        Attendance.objects.create(employee=employee, date=timezone.localdate(), status='present')
+
+        for model, serializer_class, projection in [
+            (MilkReceived, MilkReceivedSerializer, MILK_RECEIVED_PROJECTION),
+            (MilkRequest, MilkRequestSerializer, MILK_REQUEST_PROJECTION),
+            (Attendance, AttendanceSerializer, ATTENDANCE_PROJECTION),
+        ]:
+            queryset = model.objects.order_by('created_at')
+            with self.subTest(model=model.__name__):
+                self.assertEqual(
+                    as_json(projection.serialize_queryset(queryset)),
+                    as_json(serializer_class(queryset, many=True).data)
+                )
+
+    def test_benchmark_command(self):
+        receive_milk(self.seller, Decimal('10.5'))
+        out = io.StringIO()
+        call_command('benchmark_projections', rows=[5], iterations=1, stdout=out)
+        self.assertEqual(out.getvalue().splitlines()[1].split()[0], '1')
+
+
+class GenerateFarmDataTests(TestCase):
+    def generate(self, **options):
+        call_command(
+            'generate_farm_data', managers=1, employees=2, locations=2, sellers=3, years=0.02,
+            stdout=io.StringIO(), **options
+        )
+
+    def test_generates_history_with_historical_timestamps(self):
+        self.generate()
+
+        first_day = timezone.localdate() - timedelta(days=6)
+        farm_receipts = MilkReceived.objects.filter(source='From Farm')
+        self.assertEqual(farm_receipts.count(), 7 * 6)
+        self.assertEqual(Attendance.objects.count(), 7 * 2)
+        self.assertEqual(farm_receipts.filter(status='pending').count(), 6)
+        self.assertTrue(Sale.objects.exists())
+
+        oldest = farm_receipts.order_by('date').first()
+        self.assertEqual(oldest.date, first_day)
+        self.assertEqual(timezone.localtime(oldest.created_at).date(), first_day)
+
+        system_total = SystemMilkDistribution.objects.aggregate(total=Sum('total_milk'))['total']
+        self.assertEqual(system_total, MilkReceived.objects.aggregate(total=Sum('quantity'))['total'])
+
+    def test_prefix_must_be_unused(self):
+        self.generate()
+        with self.assertRaises(CommandError):
+            self.generate()
+        self.generate(prefix='second')
+        self.assertEqual(Manager.objects.count(), 2)
+
+    def test_benchmark_reports_every_endpoint(self):
+        self.generate()
+        output = io.StringIO()
+        with tempfile.NamedTemporaryFile(suffix='.json') as results_file:
+            call_command(
+                'benchmark_endpoints', iterations=2, warmup=0, json_path=results_file.name, stdout=output
+            )
+            with open(results_file.name) as handle:
+                results = json.load(handle)['results']
+
+        self.assertIn('no admin user', output.getvalue())
+        self.assertEqual({row['status'] for row in results}, {200})
+        self.assertIn('seller-bootstrap', [row['endpoint'] for row in results])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+@override_settings(METRICS_TOKEN='scrape')
+class EndpointQueryCountTests(TestCase):
+    """Each route runs the same number of queries before and after the data grows."""
+
+    growth = 5
+
+    def setUp(self):
+        self.location = create_location()
+        self.manager = create_manager()
+        self.seller = create_seller('anil', self.location)
+        self.seller.user.set_password('secret')
+        self.seller.user.save()
+        user = User.objects.create_user(username='ravi', password=None, role='employee')
+        self.employee = Employee.objects.create(
+            name='Ravi', base_salary=Decimal('500.00'), user=user, manager=self.manager
+        )
+        self.admin = User.objects.create_user(username='root', password=None, role='admin')
+        self.daily_ops = get_or_create_daily_operations(self.manager)
+        self.salary = calculate_and_update_salary(self.employee, timezone.localdate())
+        self.added = 0
+        self.grow(1)
+
+    def grow(self, count):
+        today = timezone.localdate()
+        for _ in range(count):
+            self.added += 1
+            neighbour = create_seller(f'neighbour{self.added}', self.location)
+            create_seller(f'distant{self.added}', create_location(f'Town {self.added}'))
+            create_manager(f'manager{self.added}')
+            user = User.objects.create_user(username=f'employee{self.added}', password=None, role='employee')
+            employee = Employee.objects.create(
+                name=f'Employee {self.added}', base_salary=Decimal('400.00'), user=user, manager=self.manager
+            )
+            Attendance.objects.create(employee=employee, date=today, status='present')
+            Attendance.objects.create(
+                employee=self.employee, date=today - timedelta(days=self.added), status='present'
+            )
+            Deduction.objects.create(salary=self.salary, amount=Decimal('1.00'), reason='Late')
+
+            MilkReceived.objects.create(
+                seller=self.seller, manager=self.manager, quantity=Decimal('30.00'),
+                date=today, source='From Farm', status='received'
+            )
+            MilkReceived.objects.create(
+                seller=self.seller, manager=self.manager, quantity=Decimal('5.00'),
+                date=today - timedelta(days=self.added), source='From Farm', status='pending'
+            )
+            Sale.objects.create(seller=self.seller, date=today, quantity=Decimal('1.00'), total_amount=0)
+            DailyTotal.objects.create(seller=neighbour, date=today, revenue=Decimal('50.00'))
+            MilkRequest.objects.create(from_seller=neighbour, quantity=Decimal('1.00'))
+            MilkRequest.objects.create(from_seller=self.seller, quantity=Decimal('1.00'))
+            create_borrow_lend_record(self.seller, neighbour, Decimal('1.00'))
+            create_borrow_lend_record(neighbour, self.seller, Decimal('2.00'))
+
+            FeedRecord.objects.create(
+                date=today, feed_type='Hay', quantity=Decimal('10.00'), cost=Decimal('100.00'), record=self.daily_ops
+            )
+            ExpenseRecord.objects.create(
+                date=today, category='Power', amount=Decimal('80.00'), record=self.daily_ops
+            )
+            MedicineRecord.objects.create(
+                date=today, medicine_name='Calcium', cost=Decimal('40.00'), record=self.daily_ops
+            )
+            for user in (self.seller.user, self.manager.user, self.employee.user):
+                Notification.objects.create(user=user, message='hello')
+
+    def pending_request(self):
+        neighbour = Seller.objects.filter(location=self.location).exclude(pk=self.seller.pk).first()
+        return [MilkRequest.objects.create(from_seller=neighbour, quantity=Decimal('1.00')).request_id]
+
+    def on_hold_request(self):
+        neighbour = Seller.objects.filter(location=self.location).exclude(pk=self.seller.pk).first()
+        milk_request = MilkRequest.objects.create(
+            from_seller=self.seller, to_seller=neighbour, quantity=Decimal('1.00'), status='on_hold'
+        )
+        BorrowLendRecord.objects.create(
+            borrower_seller=self.seller, lender_seller=neighbour, quantity=Decimal('1.00'),
+            borrow_date=timezone.localdate(), request=milk_request
+        )
+        return [milk_request.request_id]
+
+    def unique_name(self, prefix):
+        return f'{prefix}-{uuid.uuid4().hex[:8]}'
+
+    def route_cases(self):
+        today = timezone.localdate().isoformat()
+        return {
+            'login-page': (None, 'get', None, None),
+            'admin-dashboard': ('admin', 'get', None, None),
+            'manager-dashboard': ('manager', 'get', None, None),
+            'seller-dashboard': ('seller', 'get', None, None),
+            'service-worker': (None, 'get', None, None),
+            'api-login': (None, 'post', None, lambda: {'username': 'anil', 'password': 'secret', 'role': 'seller'}),
+            'api-logout': ('seller', 'post', None, None),
+            'create-feed-record': (
+                'manager', 'post', None, lambda: {'date': today, 'feed_type': 'Hay', 'quantity': '5.00', 'cost': '50.00'}
+            ),
+            'create-expense-record': ('manager', 'post', None, lambda: {'date': today, 'category': 'Power', 'amount': '10.00'}),
+            'misc-expenses': ('manager', 'post', None, lambda: {'date': today, 'category': 'Misc', 'amount': '10.00'}),
+            'create-medicine-record': (
+                'manager', 'post', None, lambda: {'date': today, 'medicine_name': 'Calcium', 'cost': '20.00'}
+            ),
+            'record-milk-distribution': (
+                'manager', 'post', None, lambda: {'location_id': str(self.location.location_id), 'quantity': '40'}
+            ),
+            'update-leftover-milk': (
+                'manager', 'post', None, lambda: {'leftoverMilk': '2.00', 'leftoverSales': '80.00'}
+            ),
+            'list-manager-pending-distributions': ('manager', 'get', None, None),
+            'add-employee': ('manager', 'post', None, lambda: {
+                'username': self.unique_name('employee'), 'password': 'secret', 'name': 'New', 'base_salary': '300.00'
+            }),
+            'list-employees': ('manager', 'get', None, None),
+            'mark-attendance': ('manager', 'post', None, lambda: {'employeeId': self.employee.employee_id}),
+            'create-deduction': ('manager', 'post', None, lambda: {
+                'employeeId': self.employee.employee_id, 'amount': '5.00', 'reason': 'Late'
+            }),
+            'add-location-seller': ('manager', 'post', None, lambda: {
+                'username': self.unique_name('seller'), 'password': 'secret', 'location_name': 'Hill',
+                'address': 'Hill road', 'seller_name': 'New'
+            }),
+            'add-seller': ('manager', 'post', None, lambda: {
+                'username': self.unique_name('seller'), 'password': 'secret', 'name': 'New',
+                'location_id': str(self.location.location_id)
+            }),
+            'list-locations': ('manager', 'get', None, None),
+            'list-sellers': ('manager', 'get', None, None),
+            'employee-dashboard': ('employee', 'get', None, None),
+            'get-employee-attendance': ('employee', 'get', None, None),
+            'record-daily-totals': ('seller', 'post', None, lambda: {'cashEarned': '10.00', 'onlineEarned': '5.00'}),
+            'record-individual-sale': ('seller', 'post', None, lambda: {'date': today, 'quantity': '1.00'}),
+            'record-sales-batch': ('seller', 'post', None, lambda: {
+                'sales': [{'client_id': str(uuid.uuid4()), 'quantity': '1.00'} for _ in range(3)]
+            }),
+            'seller-daily-summary': ('seller', 'get', None, None),
+            'seller-bootstrap': ('seller', 'get', None, None),
+            'create-milk-request': ('seller', 'post', None, lambda: {'quantity': '2.00'}),
+            'accept-milk-request': ('seller', 'post', self.pending_request, None),
+            'mark-as-received': ('seller', 'post', self.on_hold_request, None),
+            'list-incoming-requests': ('seller', 'get', None, None),
+            'list-my-requests': ('seller', 'get', None, None),
+            'sync-changes': ('seller', 'get', None, None),
+            'replay-outbox': ('seller', 'post', None, lambda: {'operations': [
+                {'client_id': str(uuid.uuid4()), 'type': 'sale', 'payload': {'quantity': '1.00'}},
+                {'client_id': str(uuid.uuid4()), 'type': 'daily_total', 'payload': {'cashEarned': '5.00'}},
+            ]}),
+            'batch-requests': ('seller', 'post', None, lambda: {'requests': [
+                {'method': 'GET', 'path': reverse('seller-daily-summary')},
+                {'method': 'GET', 'path': reverse('list-notifications')},
+            ]}),
+            'list-notifications': ('seller', 'get', None, None),
+            'mark-notification-read': (
+                'seller', 'post',
+                lambda: [Notification.objects.create(user=self.seller.user, message='hi').notification_id], None
+            ),
+            'borrow-lend-history': ('seller', 'get', None, None),
+            'borrow-lend-settlement': ('manager', 'get', None, None),
+            'settle-borrow-lend-records': ('manager', 'post', None, None),
+            'list-pending-distributions': ('seller', 'get', None, None),
+            'update-milk-received-status': ('seller', 'post', lambda: [
+                MilkReceived.objects.create(
+                    seller=self.seller, manager=self.manager, quantity=Decimal('2.00'),
+                    date=timezone.localdate(), source='From Farm', status='pending'
+                ).receipt_id
+            ], lambda: {'status': 'received'}),
+            'get-datewise-data': ('manager', 'get', None, None),
+            'get-daily-data': ('manager', 'get', None, None),
+            'get-sales-trend': ('manager', 'get', None, None),
+            'manager-bootstrap': ('manager', 'get', None, None),
+            'add-manager': ('admin', 'post', None, lambda: {
+                'username': self.unique_name('manager'), 'password': 'secret', 'name': 'New'
+            }),
+            'list-managers': ('admin', 'get', None, None),
+            'delete-manager': ('admin', 'delete', lambda: [create_manager(self.unique_name('manager')).manager_id], None),
+            'metrics': ('scraper', 'get', None, None),
+        }
+
+    def count_queries(self, url_name, role, method, args, data):
+        client = Client()
+        if role == 'scraper':
+            client.defaults['HTTP_AUTHORIZATION'] = 'Bearer scrape'
+        elif role:
+            users = {
+                'admin': self.admin, 'manager': self.manager.user,
+                'seller': self.seller.user, 'employee': self.employee.user,
+            }
+            client.force_login(users[role])
+        url = reverse(url_name, args=args() if args else None)
+        payload = data() if data else {}
+        with CaptureQueriesContext(connection) as queries:
+            if method == 'get':
+                response = client.get(url)
+            else:
+                response = getattr(client, method)(url, payload, content_type='application/json')
+        self.assertLess(response.status_code, 400, f'{url_name}: {response.content[:300]}')
+        return len(queries)
+
+    def test_query_counts_do_not_grow_with_data(self):
+        cases = self.route_cases()
+        # The first call of some writes creates the row that later calls update.
+        for name, case in cases.items():
+            self.count_queries(name, *case)
+        before = {name: self.count_queries(name, *case) for name, case in cases.items()}
+        self.grow(self.growth)
+        after = {name: self.count_queries(name, *case) for name, case in cases.items()}
+
+        grown = {name: (before[name], after[name]) for name in cases if before[name] != after[name]}
+        self.assertEqual(grown, {})
+
+    def test_every_route_has_a_case(self):
+        self.assertEqual(set(self.route_cases()), {pattern.name for pattern in urlpatterns})
@@ -7,6 +7,7 @@ urlpatterns = [
     path('manager/', views.ManagerDashboardView.as_view(), name='manager-dashboard'),
     path('employee/', views.EmployeeDashboardView.as_view(), name='employee-dashboard'),
     path('seller/', views.SellerDashboardView.as_view(), name='seller-dashboard'),
+    path('sw.js', views.ServiceWorkerView.as_view(), name='service-worker'),
     path('api/login/', views.login_view, name='api-login'),
     path('api/logout/', views.logout_view, name='api-logout'),
     path('api/manager/feed/', views.create_feed_record, name='create-feed-record'),
@@ -28,21 +29,30 @@ urlpatterns = [
     path('api/employee/attendance/', views.get_employee_attendance, name='get-employee-attendance'),
     path('api/seller/daily-totals/', views.record_daily_totals, name='record-daily-totals'), 
     path('api/seller/sale/record/', views.record_individual_sale, name='record-individual-sale'),
+    path('api/seller/sales/batch/', views.record_sales_batch, name='record-sales-batch'),
     path('api/seller/summary/', views.seller_daily_summary, name='seller-daily-summary'),
+    path('api/seller/bootstrap/', views.seller_bootstrap, name='seller-bootstrap'),
     path('api/seller/milk-request/create/', views.create_milk_request, name='create-milk-request'),
     path('api/seller/milk-request/<uuid:request_id>/accept/', views.accept_milk_request, name='accept-milk-request'),
     path('api/seller/milk-request/<uuid:request_id>/received/', views.mark_as_received, name='mark-as-received'),
     path('api/seller/milk-requests/incoming/', views.list_incoming_requests, name='list-incoming-requests'),
     path('api/seller/milk-requests/mine/', views.list_my_requests, name='list-my-requests'),
+    path('api/sync/', views.sync_changes, name='sync-changes'),
+    path('api/sync/outbox/', views.replay_outbox, name='replay-outbox'),
+    path('api/batch/', views.batch_requests, name='batch-requests'),
     path('api/notifications/', views.list_notifications, name='list-notifications'),
     path('api/notifications/<uuid:notification_id>/read/', views.mark_notification_read, name='mark-notification-read'),
     path('api/seller/borrow-lend-history/', views.get_borrow_lend_history, name='borrow-lend-history'),
+    path('api/manager/borrow-lend/settlement/', views.get_borrow_lend_settlement, name='borrow-lend-settlement'),
+    path('api/manager/borrow-lend/settle/', views.settle_borrow_lend_records, name='settle-borrow-lend-records'),
     path('api/seller/pending-distributions/', views.list_pending_distributions, name='list-pending-distributions'),
     path('api/seller/milk-received/<uuid:receipt_id>/update-status/', views.update_milk_received_status, name='update-milk-received-status'),
     path('api/manager/datewise-data/', views.get_datewise_data, name='get-datewise-data'),
     path('api/manager/daily-data/', views.get_daily_data, name='get-daily-data'),
     path('api/manager/sales-trend/', views.get_sales_trend, name='get-sales-trend'),
+    path('api/manager/bootstrap/', views.manager_bootstrap, name='manager-bootstrap'),
     path('api/admin/managers/add/', views.add_manager, name='add-manager'),
     path('api/admin/managers/', views.list_managers, name='list-managers'),
     path('api/admin/managers/<str:manager_id>/delete/', views.delete_manager, name='delete-manager'),
+    path('internal/metrics/', views.metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -1,14 +1,22 @@
-from datetime import datetime, date
-from decimal import Decimal
+import heapq
+from collections import defaultdict
+from datetime import datetime, date, timedelta
+from decimal import Decimal, InvalidOperation
+from itertools import groupby
 from django.db import transaction
-from django.db.models import Sum, Count, Q
-from django.core.exceptions import ValidationError
+from django.db.models import Sum, Count, Q, F, Case, When, Value, CharField, BooleanField, DecimalField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.conf import settings
+from django.core.exceptions import ValidationError, ObjectDoesNotExist
 from django.utils import timezone
 from .models import (
     DailyOperations, Salary, Attendance, MilkReceived, 
     MilkDistribution, Deduction, Notification, Seller, 
-    BorrowLendRecord, Location, Sale, DailyTotal
+    BorrowLendRecord, Location, Sale, DailyTotal, MilkRequest, Manager, Employee,
+    SystemMilkDistribution, SellerMonthlySummary, AttendanceMonthlySummary
 )
+from .serializers import SaleBatchItemSerializer
+from .archive import MonthClosed, check_month_open
 from calendar import monthrange
 
 
@@ -30,6 +38,7 @@ def mark_attendance_and_update(employee, attendance_date, status: str):
         attendance_date = datetime.strptime(attendance_date, "%Y-%m-%d").date()
 
     validate_attendance_date(attendance_date)
+    check_month_open(attendance_date)
 
     attendance, created = Attendance.objects.get_or_create(
         employee=employee,
@@ -72,7 +81,7 @@ def calculate_and_update_salary(employee, attendance_date):
         date__year=attendance_date.year,
         date__month=attendance_date.month,
         status='present'
-    ).count()
+    ).count() + _archived_attendance(employee, attendance_date.year, attendance_date.month)['present']
 
     salary_balance = employee.base_salary * days_worked
     total_deductions = Deduction.objects.filter(salary=salary).aggregate(
@@ -101,6 +110,16 @@ def calculate_total_milk_distributed(date_or_ops=None):
     ).aggregate(total=Sum('quantity'))['total'] or Decimal('0.00')
 
 
+def update_system_milk_distribution(target_date):
+    system_dist, _ = SystemMilkDistribution.objects.get_or_create(
+        date=target_date,
+        defaults={'total_milk': Decimal('0.00')}
+    )
+    system_dist.total_milk = calculate_total_milk_distributed(target_date)
+    system_dist.save()
+    return system_dist
+
+
 def update_milk_distribution_totals(daily_operations):
     total_milk = calculate_total_milk_distributed(daily_operations)
 
@@ -180,8 +199,28 @@ def notify_all_sellers_about_request(milk_request):
         f"Quantity: {milk_request.quantity}L"
     )
 
-    for seller in other_sellers:
-        create_notification(seller.user, message)
+    Notification.objects.bulk_create([
+        Notification(user_id=user_id, message=message)
+        for user_id in other_sellers.values_list('user_id', flat=True)
+    ])
+
+
+def claim_milk_request(milk_request, accepting_seller):
+    # A conditional UPDATE lets exactly one concurrent accept win without
+    # holding a row lock while the balance check runs. Requests past expiry
+    # are off the feed, so they cannot be claimed before the sweep runs either.
+    now = timezone.now()
+    claimed = MilkRequest.objects.filter(
+        request_id=milk_request.request_id,
+        status='pending',
+        created_at__gte=milk_request_expiry_cutoff()
+    ).update(to_seller=accepting_seller, status='on_hold', updated_at=now)
+
+    if claimed:
+        milk_request.to_seller = accepting_seller
+        milk_request.status = 'on_hold'
+        milk_request.updated_at = now
+    return bool(claimed)
 
 
 def create_borrow_lend_record(milk_request, accepting_seller):
@@ -209,14 +248,22 @@ def validate_attendance_date(attendance_date):
     return True
 
 
+def _archived_attendance(employee, year, month):
+    summary = AttendanceMonthlySummary.objects.filter(
+        employee=employee, month=date(year, month, 1)
+    ).values('present', 'absent').first()
+    return summary or {'present': 0, 'absent': 0}
+
+
 def get_monthly_attendance_summary(employee, year, month):
     attendances = Attendance.objects.filter(
         employee=employee,
         date__year=year,
         date__month=month
     )
-    present_count = attendances.filter(status='present').count()
-    absent_count = attendances.filter(status='absent').count()
+    archived = _archived_attendance(employee, year, month)
+    present_count = attendances.filter(status='present').count() + archived['present']
+    absent_count = attendances.filter(status='absent').count() + archived['absent']
     total_days = monthrange(year, month)[1]
 
     return {
@@ -230,102 +277,513 @@ def get_seller_daily_summary(seller, summary_date=None):
     if summary_date is None:
         summary_date = timezone.localdate()
 
-    milk_received_records = MilkReceived.objects.filter(
+    received = MilkReceived.objects.filter(
         seller=seller,
-        date=summary_date,
         status__in=['received', 'pending']  
+    ).aggregate(
+        all_time=Sum('quantity'),
+        today=Sum('quantity', filter=Q(date=summary_date)),
+        farm=Sum('quantity', filter=Q(date=summary_date, source__iexact='From Farm')),
+        inter_seller=Sum('quantity', filter=Q(date=summary_date, source__iexact='Inter Seller'))
     )
-    total_received_today = milk_received_records.aggregate(total=Sum('quantity'))['total'] or Decimal('0.00')
 
-    farm_milk = milk_received_records.filter(
-                source__iexact='From Farm'  
-            ).aggregate(total=Sum('quantity'))['total'] or Decimal('0.00')
-
-    inter_seller_milk = milk_received_records.filter(
-                source__iexact='Inter Seller' 
-            ).aggregate(total=Sum('quantity'))['total'] or Decimal('0.00')
-    total_sold_today = Sale.objects.filter(
-        seller=seller,
-        date=summary_date
-    ).aggregate(total=Sum('quantity'))['total'] or Decimal('0.00')
-    
-    individual_sales = Sale.objects.filter(
-        seller=seller,
-        date=summary_date
-    ).order_by('-created_at')
+    sold = Sale.objects.filter(seller=seller).aggregate(
+        all_time=Sum('quantity'),
+        today=Sum('quantity', filter=Q(date=summary_date))
+    )
 
-    total_lent_today = BorrowLendRecord.objects.filter(
+    lent = BorrowLendRecord.objects.filter(
         lender_seller=seller,
-        borrow_date=summary_date,
         settled=False
-    ).aggregate(total=Sum('quantity'))['total'] or Decimal('0.00')
+    ).aggregate(
+        all_time=Sum('quantity'),
+        today=Sum('quantity', filter=Q(borrow_date=summary_date))
+    )
+
+    archived = SellerMonthlySummary.objects.filter(seller=seller).aggregate(
+        received=Sum('milk_received'),
+        sold=Sum('milk_sold')
+    )
 
-    total_in_all_time = (MilkReceived.objects.filter(
+    individual_sales = Sale.objects.filter(
         seller=seller,
-        status__in=['received', 'pending']  
-    ).aggregate(total=Sum('quantity'))['total'] or Decimal('0.00'))
-    
-    total_sold_all_time = (Sale.objects.filter(
-        seller=seller
-    ).aggregate(total=Sum('quantity'))['total'] or Decimal('0.00'))
-    
-    total_lent_all_time = (BorrowLendRecord.objects.filter(
-        lender_seller=seller,
-        settled=False  
-    ).aggregate(total=Sum('quantity'))['total'] or Decimal('0.00'))
+        date=summary_date
+    ).order_by('-created_at')
 
-    remaining_milk = total_in_all_time - total_sold_all_time - total_lent_all_time
+    remaining_milk = (
+        (received['all_time'] or Decimal('0.00'))
+        + (archived['received'] or Decimal('0.00'))
+        - (sold['all_time'] or Decimal('0.00'))
+        - (archived['sold'] or Decimal('0.00'))
+        - (lent['all_time'] or Decimal('0.00'))
+    )
 
     daily_total = DailyTotal.objects.filter(seller=seller, date=summary_date).first()
 
     return {
         'date': summary_date,
-        'total_milk_received': total_received_today,   
-        'farm_milk': farm_milk,                         
-        'inter_seller_milk': inter_seller_milk,         
-        'total_milk_sold': total_sold_today,            
-        'total_milk_lent': total_lent_today,           
-        'remaining_milk': remaining_milk,               
+        'total_milk_received': received['today'] or Decimal('0.00'),
+        'farm_milk': received['farm'] or Decimal('0.00'),
+        'inter_seller_milk': received['inter_seller'] or Decimal('0.00'),
+        'total_milk_sold': sold['today'] or Decimal('0.00'),
+        'total_milk_lent': lent['today'] or Decimal('0.00'),
+        'remaining_milk': remaining_milk,
         'revenue': daily_total.revenue if daily_total else Decimal('0.00'),
         'cash_sales': daily_total.cash_sales if daily_total else Decimal('0.00'),
         'online_sales': daily_total.online_sales if daily_total else Decimal('0.00'),
-        'individual_sales': individual_sales           
+        'individual_sales': individual_sales
     }
 
 def get_location_statistics(selected_date=None):
-    stats = []
-    
     if selected_date is None:
         selected_date = timezone.localdate()
 
-    for location in Location.objects.all():
-        sellers = Seller.objects.filter(location=location, is_active=True)
-
-        total_milk_today = MilkReceived.objects.filter(
-            seller__location=location,
-            date=selected_date
-        ).aggregate(total=Sum('quantity'))['total'] or Decimal('0.00')
-
-        farm_milk_today = MilkReceived.objects.filter(
-            seller__location=location,
-            date=selected_date,
-            source='From Farm'
-        ).aggregate(total=Sum('quantity'))['total'] or Decimal('0.00')
-
-        inter_seller_milk_today = MilkReceived.objects.filter(
-            seller__location=location,
-            date=selected_date,
-            source='Inter Seller'
-        ).aggregate(total=Sum('quantity'))['total'] or Decimal('0.00')
+    locations = Location.objects.annotate(
+        seller_count=Count('sellers', filter=Q(sellers__is_active=True))
+    ).order_by('created_at')
+
+    milk_totals = {
+        row['seller__location']: row
+        for row in MilkReceived.objects.filter(date=selected_date).values('seller__location').annotate(
+            total=Sum('quantity'),
+            farm=Sum('quantity', filter=Q(source='From Farm')),
+            inter_seller=Sum('quantity', filter=Q(source='Inter Seller'))
+        ).order_by()
+    }
 
+    stats = []
+    for location in locations:
+        totals = milk_totals.get(location.location_id, {})
         stats.append({
             'location_id': str(location.location_id),
             'location_name': location.location_name,
             'address': location.address,
-            'seller_count': sellers.count(),
-            'milk_received_today': total_milk_today,
-            'farm_milk_today': farm_milk_today,
-            'inter_seller_milk_today': inter_seller_milk_today
+            'seller_count': location.seller_count,
+            'milk_received_today': totals.get('total') or Decimal('0.00'),
+            'farm_milk_today': totals.get('farm') or Decimal('0.00'),
+            'inter_seller_milk_today': totals.get('inter_seller') or Decimal('0.00')
+        })
+
+    return stats
+
+
+def _net_borrow_lend_balances(rows):
+    pair_balances = defaultdict(Decimal)
+    seller_balances = defaultdict(Decimal)
+
+    for borrower_id, lender_id, quantity in rows:
+        if borrower_id == lender_id:
+            continue
+        # Pairs are keyed in a stable order; a positive balance means the
+        # first seller owes the second.
+        if str(borrower_id) < str(lender_id):
+            pair_balances[(borrower_id, lender_id)] += quantity
+        else:
+            pair_balances[(lender_id, borrower_id)] -= quantity
+        seller_balances[borrower_id] -= quantity
+        seller_balances[lender_id] += quantity
+
+    return pair_balances, seller_balances
+
+
+def get_open_borrow_lend_balances():
+    rows = BorrowLendRecord.objects.filter(settled=False).values_list(
+        'borrower_seller', 'lender_seller'
+    ).annotate(total=Sum('quantity')).order_by()
+    return _net_borrow_lend_balances(rows)
+
+
+def propose_settlement_transfers(seller_balances):
+    debtors = [(balance, str(seller_id), seller_id) for seller_id, balance in seller_balances.items() if balance < 0]
+    creditors = [(-balance, str(seller_id), seller_id) for seller_id, balance in seller_balances.items() if balance > 0]
+    heapq.heapify(debtors)
+    heapq.heapify(creditors)
+
+    transfers = []
+    while debtors and creditors:
+        debt, debtor_key, debtor_id = heapq.heappop(debtors)
+        credit, creditor_key, creditor_id = heapq.heappop(creditors)
+        quantity = min(-debt, -credit)
+
+        transfers.append({
+            'from_seller': debtor_id,
+            'to_seller': creditor_id,
+            'quantity': quantity
+        })
+
+        if -debt > quantity:
+            heapq.heappush(debtors, (debt + quantity, debtor_key, debtor_id))
+        if -credit > quantity:
+            heapq.heappush(creditors, (credit + quantity, creditor_key, creditor_id))
+
+    return transfers
+
+
+@transaction.atomic
+def settle_open_borrow_lend_records(batch_size=500):
+    """Replace the open records with one open record per net transfer.
+
+    Every seller's net balance is unchanged. Milk a seller lent and got back
+    through the netting no longer counts as lent in their remaining milk.
+    """
+    open_records = list(
+        BorrowLendRecord.objects.select_for_update().filter(settled=False).values_list(
+            'record_id', 'borrower_seller', 'lender_seller', 'quantity', 'request'
+        )
+    )
+    _, seller_balances = _net_borrow_lend_balances(row[1:4] for row in open_records)
+    transfers = propose_settlement_transfers(seller_balances)
+
+    now = timezone.now()
+    record_ids = [row[0] for row in open_records]
+    request_ids = list({row[4] for row in open_records})
+    for start in range(0, len(record_ids), batch_size):
+        BorrowLendRecord.objects.filter(
+            record_id__in=record_ids[start:start + batch_size]
+        ).update(settled=True, updated_at=now)
+    for start in range(0, len(request_ids), batch_size):
+        MilkRequest.objects.filter(
+            request_id__in=request_ids[start:start + batch_size], status='on_hold'
+        ).update(status='received', updated_at=now)
+
+    # The debtor confirms the net transfer like any accepted request.
+    net_requests = MilkRequest.objects.bulk_create([
+        MilkRequest(
+            from_seller_id=transfer['from_seller'], to_seller_id=transfer['to_seller'],
+            quantity=transfer['quantity'], status='on_hold'
+        )
+        for transfer in transfers
+    ])
+    BorrowLendRecord.objects.bulk_create([
+        BorrowLendRecord(
+            borrower_seller_id=milk_request.from_seller_id, lender_seller_id=milk_request.to_seller_id,
+            quantity=milk_request.quantity, borrow_date=timezone.localdate(), request=milk_request
+        )
+        for milk_request in net_requests
+    ])
+
+    sellers = Seller.objects.select_related('user').in_bulk(list(seller_balances))
+    notifications = []
+    for transfer in transfers:
+        debtor = sellers[transfer['from_seller']]
+        creditor = sellers[transfer['to_seller']]
+        notifications.append(Notification(
+            user=debtor.user,
+            message=f"Borrow/lend balances have been settled. You owe {creditor.name} {transfer['quantity']}L."
+        ))
+        notifications.append(Notification(
+            user=creditor.user,
+            message=f"Borrow/lend balances have been settled. {debtor.name} owes you {transfer['quantity']}L."
+        ))
+    Notification.objects.bulk_create(notifications)
+
+    return len(record_ids), transfers, sellers
+
+
+def get_borrow_lend_history_queryset(seller, date_from=None, date_to=None, settled=None, counterparty_id=None):
+    records = BorrowLendRecord.objects.filter(Q(borrower_seller=seller) | Q(lender_seller=seller))
+
+    if date_from:
+        records = records.filter(borrow_date__gte=date_from)
+    if date_to:
+        records = records.filter(borrow_date__lte=date_to)
+    if settled is not None:
+        records = records.filter(settled=settled)
+    if counterparty_id:
+        records = records.filter(
+            Q(borrower_seller=seller, lender_seller_id=counterparty_id) |
+            Q(lender_seller=seller, borrower_seller_id=counterparty_id)
+        )
+
+    return records.annotate(
+        counterparty_id=Case(
+            When(borrower_seller=seller, then=F('lender_seller_id')),
+            default=F('borrower_seller_id')
+        ),
+        counterparty_name=Case(
+            When(borrower_seller=seller, then=F('lender_seller__name')),
+            default=F('borrower_seller__name')
+        ),
+        transaction_type=Case(
+            When(borrower_seller=seller, then=Value('Borrowed')),
+            default=Value('Lent'),
+            output_field=CharField()
+        )
+    )
+
+
+def get_counterparty_balances(seller, records):
+    rows = records.filter(settled=False).values(
+        'counterparty_id', 'counterparty_name'
+    ).annotate(
+        borrowed=Sum('quantity', filter=Q(borrower_seller=seller)),
+        lent=Sum('quantity', filter=Q(lender_seller=seller))
+    ).order_by('counterparty_name')
+
+    balances = []
+    for row in rows:
+        borrowed = row['borrowed'] or Decimal('0.00')
+        lent = row['lent'] or Decimal('0.00')
+        balances.append({
+            'seller_id': str(row['counterparty_id']),
+            'name': row['counterparty_name'],
+            'borrowed': str(borrowed.quantize(Decimal('0.00'))),
+            'lent': str(lent.quantize(Decimal('0.00'))),
+            'net_balance': str((lent - borrowed).quantize(Decimal('0.00')))
         })
+    return balances
+
+
+def _seller_total_subquery(queryset, seller_field, amount='quantity'):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{seller_field: OuterRef('pk')}).order_by().values(seller_field).annotate(
+                total=Sum(amount)
+            ).values('total'),
+            output_field=DecimalField(max_digits=12, decimal_places=2)
+        ),
+        Value(Decimal('0.00')),
+        output_field=DecimalField(max_digits=12, decimal_places=2)
+    )
+
+
+def get_seller_remaining_milk(seller):
+    totals = Seller.objects.filter(pk=seller.pk).annotate(
+        total_in=_seller_total_subquery(
+            MilkReceived.objects.filter(status__in=['received', 'pending']), 'seller'
+        ),
+        total_sold=_seller_total_subquery(Sale.objects.all(), 'seller'),
+        total_lent=_seller_total_subquery(BorrowLendRecord.objects.filter(settled=False), 'lender_seller'),
+        # Net milk of archived months, see Thoneti/archive.py
+        total_archived=_seller_total_subquery(
+            SellerMonthlySummary.objects.all(), 'seller', F('milk_received') - F('milk_sold')
+        )
+    ).values('total_in', 'total_sold', 'total_lent', 'total_archived').get()
+
+    remaining = totals['total_in'] - totals['total_sold'] - totals['total_lent'] + totals['total_archived']
+    return remaining.quantize(Decimal('0.00'))
+
+
+def milk_request_expiry_cutoff():
+    return timezone.now() - timedelta(hours=settings.MILK_REQUEST_EXPIRY_HOURS)
+
+
+@transaction.atomic
+def expire_stale_milk_requests():
+    # Rows locked by a concurrent sweep are skipped, so each request is
+    # expired, and its sender notified, exactly once.
+    stale_requests = list(
+        MilkRequest.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+            status='pending', created_at__lt=milk_request_expiry_cutoff()
+        ).values_list('request_id', 'from_seller__user', 'quantity')
+    )
+    if not stale_requests:
+        return 0
+
+    MilkRequest.objects.filter(
+        request_id__in=[request_id for request_id, _, _ in stale_requests]
+    ).update(status='expired', updated_at=timezone.now())
+
+    Notification.objects.bulk_create([
+        Notification(
+            user_id=user_id,
+            message=f"Your milk request for {quantity}L expired without being accepted."
+        )
+        for _, user_id, quantity in stale_requests
+    ])
+    return len(stale_requests)
+
+
+def get_incoming_requests_feed(seller, available_milk):
+    # Stale requests stay pending until expire_milk_requests runs, but are
+    # no longer offered.
+    return MilkRequest.objects.filter(
+        status='pending', created_at__gte=milk_request_expiry_cutoff()
+    ).exclude(from_seller=seller).select_related(
+        'from_seller', 'from_seller__location'
+    ).annotate(
+        is_local=Case(
+            When(from_seller__location_id=seller.location_id, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField()
+        ),
+        can_cover=Case(
+            When(quantity__lte=available_milk, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField()
+        )
+    ).order_by('-is_local', '-created_at')
+
+
+def create_sales_batch(seller, items, available_milk):
+    client_ids = [item['client_id'] for item in items]
+    seen = set(
+        Sale.objects.filter(seller=seller, client_id__in=client_ids).values_list('client_id', flat=True)
+    )
+
+    results = []
+    new_sales = []
+    today = timezone.localdate()
+    for item in items:
+        client_id = item['client_id']
+        if client_id in seen:
+            results.append({'client_id': str(client_id), 'status': 'duplicate'})
+            continue
+        seen.add(client_id)
+
+        sale_date = item.get('date') or today
+        try:
+            check_month_open(sale_date)
+        except MonthClosed as e:
+            results.append({'client_id': str(client_id), 'status': 'rejected', 'message': str(e)})
+            continue
+
+        quantity = item['quantity']
+        if quantity > available_milk:
+            results.append({
+                'client_id': str(client_id),
+                'status': 'rejected',
+                'message': f'Cannot sell {quantity}L. Only {available_milk}L remaining.'
+            })
+            continue
+
+        available_milk -= quantity
+        new_sales.append(Sale(
+            seller=seller,
+            date=sale_date,
+            customer_name=item.get('customer_name'),
+            quantity=quantity,
+            total_amount=Decimal('0.00'),
+            client_id=client_id
+        ))
+        results.append({'client_id': str(client_id), 'status': 'created'})
+
+    Sale.objects.bulk_create(new_sales)
+    return results, len(new_sales)
+
+
+def save_daily_totals(seller, sales_date, cash, online):
+    check_month_open(sales_date)
+    daily_total, _ = DailyTotal.objects.update_or_create(
+        seller=seller,
+        date=sales_date,
+        defaults={'revenue': cash + online, 'cash_sales': cash, 'online_sales': online}
+    )
+    return daily_total
+
+
+def update_receipt_status(seller, record, new_status):
+    if record.status == new_status:
+        return False
+
+    record.status = new_status
+    record.save()
+
+    if new_status == 'received':
+        message = f"Seller {seller.name} has confirmed receipt of {record.quantity}L for {record.date}."
+    else:
+        message = f"Seller {seller.name} has marked the distribution of {record.quantity}L for {record.date} as 'Not Received'."
+
+    if record.manager:
+        create_notification(record.manager.user, message)
+    return True
+
+
+def _outbox_date(payload):
+    if payload.get('date'):
+        return datetime.strptime(payload['date'], '%Y-%m-%d').date()
+    return timezone.localdate()
+
+
+def _replay_daily_total(user, payload):
+    seller = Seller.objects.get(user=user)
+    save_daily_totals(
+        seller,
+        _outbox_date(payload),
+        Decimal(str(payload.get('cashEarned') or 0)),
+        Decimal(str(payload.get('onlineEarned') or 0))
+    )
+
+
+def _replay_receipt_status(user, payload):
+    if payload.get('status') not in ['received', 'not_received']:
+        raise ValidationError('Invalid status.')
+    seller = Seller.objects.get(user=user)
+    record = MilkReceived.objects.select_related('manager__user').get(
+        receipt_id=payload['receipt_id'], seller=seller
+    )
+    update_receipt_status(seller, record, payload['status'])
+
+
+def _replay_attendance(user, payload):
+    if payload.get('status', 'present') not in ['present', 'absent']:
+        raise ValidationError('Invalid status.')
+    manager = Manager.objects.get(user=user)
+    employee = Employee.objects.get(employee_id=payload['employeeId'], manager=manager)
+    mark_attendance_and_update(employee, _outbox_date(payload), payload.get('status', 'present'))
+
+
+OUTBOX_HANDLERS = {
+    'daily_total': _replay_daily_total,
+    'receipt_status': _replay_receipt_status,
+    'attendance': _replay_attendance,
+}
+
+
+def _replay_sales(user, indexed_operations, results):
+    items = []
+    for index, operation in indexed_operations:
+        item = SaleBatchItemSerializer(data={**operation['payload'], 'client_id': operation['client_id']})
+        if item.is_valid():
+            items.append((index, item.validated_data))
+        else:
+            results[index] = {'client_id': str(operation['client_id']), 'status': 'rejected', 'message': item.errors}
+
+    if not items:
+        return
+
+    with transaction.atomic():
+        seller = Seller.objects.select_for_update().filter(user=user).first()
+        if seller is None:
+            for index, data in items:
+                results[index] = {'client_id': str(data['client_id']), 'status': 'rejected', 'message': 'Seller not found.'}
+            return
+
+        sale_results, _ = create_sales_batch(seller, [data for _, data in items], get_seller_remaining_milk(seller))
+
+    for (index, _), result in zip(items, sale_results):
+        if result['status'] == 'created':
+            result['status'] = 'applied'
+        results[index] = result
+
+
+def apply_outbox_operations(user, operations):
+    # Operations apply in queue order, since a sale may rely on an earlier
+    # receipt confirmation. Only consecutive sales are batched together.
+    results = [None] * len(operations)
+    queued = []
+    for index, operation in enumerate(operations):
+        if operation.get('user_id', user.pk) != user.pk:
+            results[index] = {
+                'client_id': str(operation['client_id']), 'status': 'rejected',
+                'message': 'Queued by another user.'
+            }
+        else:
+            queued.append((index, operation))
+
+    for is_sale, group in groupby(queued, key=lambda item: item[1]['type'] == 'sale'):
+        if is_sale:
+            _replay_sales(user, list(group), results)
+            continue
+        for index, operation in group:
+            result = {'client_id': str(operation['client_id']), 'status': 'applied'}
+            try:
+                with transaction.atomic():
+                    OUTBOX_HANDLERS[operation['type']](user, operation['payload'])
+            except (ObjectDoesNotExist, ValidationError, KeyError, ValueError, InvalidOperation) as e:
+                result['status'] = 'rejected'
+                result['message'] = str(e)
+            results[index] = result
+
+    return results
 
-    return stats
\ No newline at end of file
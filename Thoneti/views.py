@@ -1,12 +1,15 @@
 from rest_framework import status, viewsets
-from rest_framework.decorators import api_view, action, permission_classes
+from rest_framework.decorators import api_view, action, permission_classes, renderer_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.contrib.auth import login, logout, get_user_model
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.cache import never_cache
+from django.http import HttpResponse
 from django.db import transaction
-from django.db.models import Q , Sum
+from django.db.models import Q , Sum, F
 from django.shortcuts import get_object_or_404
+import uuid
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 from django.utils import timezone
@@ -15,7 +18,6 @@ from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from datetime import date, timedelta
 from django.db.models import Sum
-from django.db.models.functions import TruncDate
 
 from .models import (
     User, Manager, Employee, Seller, Location, DailyOperations,
@@ -32,15 +34,35 @@ from .serializers import (
     MedicineRecordSerializer, MilkReceivedSerializer, MilkDistributionSerializer,
     AttendanceSerializer, SalarySerializer, EmployeeDashboardSerializer,
     DailyTotalSerializer, MilkRequestSerializer, BorrowLendRecordSerializer,
-    NotificationSerializer, DeductionSerializer, SaleSerializer, SaleCreateSerializer
+    NotificationSerializer, DeductionSerializer, SaleSerializer, SaleCreateSerializer,
+    SaleBatchSerializer, OutboxReplaySerializer, BatchSerializer
 )
 
 from .utils import (
     get_or_create_daily_operations, calculate_and_update_salary,
-    update_milk_distribution_totals, get_employee_dashboard_data,
+    update_milk_distribution_totals, update_system_milk_distribution, get_employee_dashboard_data,
     notify_all_sellers_about_request, create_borrow_lend_record,
     get_seller_daily_summary, validate_attendance_date, get_location_statistics,
-    create_notification
+    create_notification, get_open_borrow_lend_balances, propose_settlement_transfers,
+    settle_open_borrow_lend_records, get_borrow_lend_history_queryset, get_counterparty_balances,
+    get_seller_remaining_milk, get_incoming_requests_feed,
+    claim_milk_request, create_sales_batch, save_daily_totals, update_receipt_status,
+    apply_outbox_operations
+)
+
+from .pagination import (
+    BorrowLendHistoryPagination, IncomingRequestPagination, MyRequestsPagination, PendingDistributionPagination,
+    ManagerPendingDistributionPagination, EmployeePagination, SellerPagination, ManagerPagination
+)
+from .sync import collect_changes, decode_sync_cursor, get_sync_feeds
+from .batch import dispatch_batch
+from .renderers import TIME_SERIES_RENDERERS, wants_columnar, to_columnar
+from .metrics import REGISTRY, metrics_access_allowed
+from .archive import MonthClosed, archived_data, check_month_open, first_hot_month
+from .projections import (
+    MILK_RECEIVED_PROJECTION, MILK_REQUEST_PROJECTION, INCOMING_MILK_REQUEST_PROJECTION,
+    DAILY_TOTAL_PROJECTION, ATTENDANCE_PROJECTION, FEED_RECORD_PROJECTION, EXPENSE_RECORD_PROJECTION,
+    MEDICINE_RECORD_PROJECTION, MILK_DISTRIBUTION_PROJECTION
 )
 
 
@@ -74,6 +96,12 @@ class SellerDashboardView(TemplateView):
     template_name = 'seller.html'
 
 
+@method_decorator(never_cache, name='dispatch')
+class ServiceWorkerView(TemplateView):
+    template_name = 'sw.js'
+    content_type = 'application/javascript'
+
+
 
 
 
@@ -109,7 +137,6 @@ def login_view(request):
             'manager_id': str(manager.manager_id),
             'name': manager.name
         }
-        print(role_data)
 
     elif user.role == 'employee':
         employee = get_object_or_404(Employee, user=user)
@@ -243,11 +270,17 @@ def record_milk_distribution(request):
 
     if not location_id:
         return Response({'message': 'Location ID is required.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        check_month_open(milk_date)
+    except MonthClosed as e:
+        return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     location = get_object_or_404(Location, location_id=location_id)
-    active_sellers = Seller.objects.filter(location=location, is_active=True)
+    active_sellers = list(
+        Seller.objects.filter(location=location, is_active=True).values_list('seller_id', 'user_id')
+    )
     
-    seller_count = active_sellers.count()
+    seller_count = len(active_sellers)
     if seller_count == 0:
         return Response({'message': 'No active sellers in this location.'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -255,16 +288,22 @@ def record_milk_distribution(request):
     
     notification_message = f"You have a pending milk delivery of {quantity_per_seller:.2f}L from your manager for {milk_date}."
 
-    for seller in active_sellers:
-        MilkReceived.objects.create(
-            seller=seller,
+    MilkReceived.objects.bulk_create([
+        MilkReceived(
+            seller_id=seller_id,
             manager=manager,
             quantity=quantity_per_seller,
             date=milk_date,
             source='From Farm',
-            status='pending' 
+            status='pending'
         )
-        create_notification(seller.user, notification_message)
+        for seller_id, _ in active_sellers
+    ])
+    Notification.objects.bulk_create([
+        Notification(user_id=user_id, message=notification_message) for _, user_id in active_sellers
+    ])
+    # bulk_create skips the post_save handler that keeps the system-wide total.
+    update_system_milk_distribution(milk_date)
 
     daily_ops = get_or_create_daily_operations(manager, milk_date)
     update_milk_distribution_totals(daily_ops)
@@ -274,13 +313,20 @@ def record_milk_distribution(request):
 @permission_classes([IsAuthenticated])
 def list_pending_distributions(request):
     seller = get_object_or_404(Seller, user=request.user)
-    
+    return Response(_pending_distributions_data(request, seller))
+
+
+def _pending_distributions_data(request, seller):
     records = MilkReceived.objects.filter(
         seller=seller,
         status__in=['pending', 'not_received']
-    ).select_related('manager').order_by('-date')
-    
-    return Response(MilkReceivedSerializer(records, many=True).data)
+    )
+
+    paginator = PendingDistributionPagination()
+    page = paginator.paginate_queryset(
+        MILK_RECEIVED_PROJECTION.rows(records), request, key=MILK_RECEIVED_PROJECTION.key('date', 'receipt_id')
+    )
+    return paginator.get_paginated_data(MILK_RECEIVED_PROJECTION.serialize(page))
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -293,19 +339,7 @@ def update_milk_received_status(request, receipt_id):
     if new_status not in ['received', 'not_received']:
         return Response({'message': 'Invalid status.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    record.status = new_status
-    record.save()
-    
-    if new_status == 'received':
-        message = f"Seller {seller.name} has confirmed receipt of {record.quantity}L for {record.date}."
-    else:
-        message = f"Seller {seller.name} has marked the distribution of {record.quantity}L for {record.date} as 'Not Received'."
-
-    if record.manager:
-        create_notification(record.manager.user, message)
-
-        if new_status == 'received':
-            pass # Removed redundant calculation
+    update_receipt_status(seller, record, new_status)
 
     return Response({'message': f'Status updated to {new_status}.'}, status=status.HTTP_200_OK)
 
@@ -313,13 +347,20 @@ def update_milk_received_status(request, receipt_id):
 @permission_classes([IsAuthenticated])
 def list_manager_pending_distributions(request):
     manager = get_object_or_404(Manager, user=request.user)
-    
+    return Response(_manager_pending_distributions_data(request, manager))
+
+
+def _manager_pending_distributions_data(request, manager):
     records = MilkReceived.objects.filter(
         manager=manager,
         status='pending'
-    ).select_related('seller', 'seller__location').order_by('-date')
-    
-    return Response(MilkReceivedSerializer(records, many=True).data)
+    )
+
+    paginator = ManagerPendingDistributionPagination()
+    page = paginator.paginate_queryset(
+        MILK_RECEIVED_PROJECTION.rows(records), request, key=MILK_RECEIVED_PROJECTION.key('date', 'receipt_id')
+    )
+    return paginator.get_paginated_data(MILK_RECEIVED_PROJECTION.serialize(page))
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -342,20 +383,21 @@ def get_daily_data(request):
     selected_date = _parse_date(request.query_params.get('date'))
 
     daily_ops = get_or_create_daily_operations(manager, selected_date)
+    return Response(_daily_records_data(daily_ops), status=status.HTTP_200_OK)
 
-    feed_records = FeedRecord.objects.filter(record=daily_ops).select_related('record')
-    expense_records = ExpenseRecord.objects.filter(record=daily_ops).select_related('record')
-    medicine_records = MedicineRecord.objects.filter(record=daily_ops).select_related('record')
-    milk_distribution = MilkDistribution.objects.filter(record=daily_ops).select_related('record')
 
-    data = {
-        'feed_records': FeedRecordSerializer(feed_records, many=True).data,
-        'expense_records': ExpenseRecordSerializer(expense_records, many=True).data,
-        'medicine_records': MedicineRecordSerializer(medicine_records, many=True).data,
-        'milk_distribution': MilkDistributionSerializer(milk_distribution, many=True).data,
-    }
+def _daily_records_data(daily_ops):
+    feed_records = FeedRecord.objects.filter(record=daily_ops)
+    expense_records = ExpenseRecord.objects.filter(record=daily_ops)
+    medicine_records = MedicineRecord.objects.filter(record=daily_ops)
+    milk_distribution = MilkDistribution.objects.filter(record=daily_ops)
 
-    return Response(data, status=status.HTTP_200_OK)
+    return {
+        'feed_records': FEED_RECORD_PROJECTION.serialize_queryset(feed_records),
+        'expense_records': EXPENSE_RECORD_PROJECTION.serialize_queryset(expense_records),
+        'medicine_records': MEDICINE_RECORD_PROJECTION.serialize_queryset(medicine_records),
+        'milk_distribution': MILK_DISTRIBUTION_PROJECTION.serialize_queryset(milk_distribution),
+    }
 
 
 @api_view(['POST'])
@@ -375,8 +417,15 @@ def add_employee(request):
 @api_view(['GET'])
 def list_employees(request):
     manager = get_object_or_404(Manager, user=request.user)
-    employees = Employee.objects.filter(manager=manager, is_active=True)
-    return Response(EmployeeSerializer(employees, many=True).data, status=status.HTTP_200_OK)
+    return Response(_employees_data(request, manager), status=status.HTTP_200_OK)
+
+
+def _employees_data(request, manager):
+    employees = Employee.objects.filter(manager=manager, is_active=True).select_related('user', 'manager')
+
+    paginator = EmployeePagination()
+    page = paginator.paginate_queryset(employees, request)
+    return paginator.get_paginated_data(EmployeeSerializer(page, many=True).data)
 
 
 @api_view(['POST'])
@@ -386,6 +435,10 @@ def mark_attendance(request):
     status_val = request.data.get('status', 'present')
 
     validate_attendance_date(attendance_date)
+    try:
+        check_month_open(attendance_date)
+    except MonthClosed as e:
+        return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     employee = get_object_or_404(Employee, employee_id=employee_id)
     Attendance.objects.update_or_create(
         employee=employee,
@@ -472,16 +525,22 @@ def list_locations(request):
 
 @api_view(['GET'])
 def list_sellers(request):
+    return Response(_sellers_data(request), status=status.HTTP_200_OK)
+
+
+def _sellers_data(request):
     sellers = Seller.objects.filter(is_active=True).select_related('location')
+
+    paginator = SellerPagination()
     data = []
-    for seller in sellers:
+    for seller in paginator.paginate_queryset(sellers, request):
         data.append({
             'seller_id': str(seller.seller_id),
             'name': seller.name,
             'location_name': seller.location.location_name,
             'location_id': str(seller.location.location_id)
         })
-    return Response(data, status=status.HTTP_200_OK)
+    return paginator.get_paginated_data(data)
 
 
 @api_view(['GET'])
@@ -513,7 +572,6 @@ def get_employee_attendance(request):
 @api_view(['POST'])
 @transaction.atomic
 def record_individual_sale(request):
-    seller = get_object_or_404(Seller, user=request.user)
     serializer = SaleCreateSerializer(data=request.data)
     
     if not serializer.is_valid():
@@ -524,9 +582,21 @@ def record_individual_sale(request):
 
     if quantity_sold < 0:
         return Response({'message': 'Quantity cannot be negative.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        check_month_open(sales_date)
+    except MonthClosed as e:
+        return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Locking the seller row serialises stock checks for this seller only.
+    seller = get_object_or_404(Seller.objects.select_for_update(), user=request.user)
 
-    summary = get_seller_daily_summary(seller, sales_date)
-    available_milk = summary.get('remaining_milk', Decimal('0.00'))
+    client_id = serializer.validated_data.get('client_id')
+    if client_id and Sale.objects.filter(seller=seller, client_id=client_id).exists():
+        summary = get_seller_daily_summary(seller, sales_date)
+        summary['individual_sales'] = SaleSerializer(summary['individual_sales'], many=True).data
+        return Response(summary, status=status.HTTP_200_OK)
+
+    available_milk = get_seller_remaining_milk(seller)
 
     if quantity_sold > available_milk:
         return Response(
@@ -539,7 +609,8 @@ def record_individual_sale(request):
         date=sales_date,
         customer_name=serializer.validated_data.get('customer_name'),
         quantity=quantity_sold,
-        total_amount=Decimal('0.00') 
+        total_amount=Decimal('0.00'),
+        client_id=client_id
     )
 
     new_summary = get_seller_daily_summary(seller, sales_date)
@@ -548,19 +619,77 @@ def record_individual_sale(request):
     return Response(new_summary, status=status.HTTP_201_CREATED)
 
 
+@api_view(['POST'])
+@transaction.atomic
+def record_sales_batch(request):
+    serializer = SaleBatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    seller = get_object_or_404(Seller.objects.select_for_update(), user=request.user)
+    results, created_count = create_sales_batch(
+        seller, serializer.validated_data['sales'], get_seller_remaining_milk(seller)
+    )
+
+    summary = get_seller_daily_summary(seller, serializer.validated_data.get('date', timezone.localdate()))
+    summary['individual_sales'] = SaleSerializer(summary['individual_sales'], many=True).data
+
+    return Response(
+        {'results': results, 'summary': summary},
+        status=status.HTTP_201_CREATED if created_count else status.HTTP_200_OK
+    )
+
+
+@api_view(['GET'])
+def sync_changes(request):
+    since = request.query_params.get('since')
+    if since:
+        try:
+            since = decode_sync_cursor(since)
+        except ValueError as e:
+            return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    feeds, profile = get_sync_feeds(request.user)
+    if profile is None:
+        return Response(
+            {'message': 'Sync is only available to sellers and managers.'}, status=status.HTTP_403_FORBIDDEN
+        )
+    return Response(collect_changes(request.user, feeds, profile, since), status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+def replay_outbox(request):
+    serializer = OutboxReplaySerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    results = apply_outbox_operations(request.user, serializer.validated_data['operations'])
+    return Response({'results': results}, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+def batch_requests(request):
+    serializer = BatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    results, rolled_back = dispatch_batch(
+        request, serializer.validated_data['requests'], atomic=serializer.validated_data['atomic']
+    )
+    return Response({'results': results, 'rolled_back': rolled_back}, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 def record_daily_totals(request):
     seller = get_object_or_404(Seller, user=request.user)
     sales_date = _parse_date(request.data.get('date'))
     cash = Decimal(request.data.get('cashEarned', 0))
     online = Decimal(request.data.get('onlineEarned', 0))
-    revenue = cash + online
 
-    daily_total, _ = DailyTotal.objects.update_or_create(
-        seller=seller,
-        date=sales_date,
-        defaults={'revenue': revenue, 'cash_sales': cash, 'online_sales': online}
-    )
+    try:
+        daily_total = save_daily_totals(seller, sales_date, cash, online)
+    except MonthClosed as e:
+        return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     return Response(DailyTotalSerializer(daily_total).data, status=status.HTTP_201_CREATED)
 
 
@@ -568,11 +697,39 @@ def record_daily_totals(request):
 def seller_daily_summary(request):
     seller = get_object_or_404(Seller, user=request.user)
     summary_date = _parse_date(request.query_params.get('date'))
-    
+    return Response(_seller_summary_data(seller, summary_date), status=status.HTTP_200_OK)
+
+
+def _seller_summary_data(seller, summary_date):
     summary = get_seller_daily_summary(seller, summary_date)
     summary['individual_sales'] = SaleSerializer(summary['individual_sales'], many=True).data
-    
-    return Response(summary, status=status.HTTP_200_OK)
+    return summary
+
+
+@api_view(['GET'])
+def seller_bootstrap(request):
+    seller = get_object_or_404(Seller.objects.select_related('location'), user=request.user)
+    try:
+        borrow_lend_history = _borrow_lend_history_data(request, seller)
+    except ValueError as e:
+        return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    summary = _seller_summary_data(seller, _parse_date(request.query_params.get('date')))
+
+    return Response({
+        'seller': {
+            'seller_id': str(seller.seller_id),
+            'name': seller.name,
+            'location_name': seller.location.location_name
+        },
+        'summary': summary,
+        'pending_distributions': _pending_distributions_data(request, seller),
+        'incoming_requests': _incoming_requests_data(
+            request, seller, summary['remaining_milk'].quantize(Decimal('0.00'))
+        ),
+        'my_requests': _my_requests_data(request, seller),
+        'notifications': _notifications_data(request.user),
+        'borrow_lend_history': borrow_lend_history
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -590,14 +747,17 @@ def create_milk_request(request):
 @api_view(['POST'])
 @transaction.atomic
 def accept_milk_request(request, request_id):
-    seller = get_object_or_404(Seller, user=request.user)
-    milk_request = get_object_or_404(MilkRequest, request_id=request_id, status='pending')
-    
-    today = timezone.localdate()
-    requested_quantity = milk_request.quantity
+    seller = get_object_or_404(
+        Seller.objects.select_related('location').select_for_update(of=('self',)), user=request.user
+    )
+    milk_request = get_object_or_404(
+        MilkRequest.objects.select_related('from_seller', 'from_seller__user'), request_id=request_id
+    )
+    if milk_request.status != 'pending':
+        return Response({'message': 'This request is no longer available.'}, status=status.HTTP_409_CONFLICT)
 
-    summary = get_seller_daily_summary(seller, today)
-    available_milk = summary.get('remaining_milk', Decimal('0.00'))
+    requested_quantity = milk_request.quantity
+    available_milk = get_seller_remaining_milk(seller)
 
     if available_milk < requested_quantity:
         return Response(
@@ -605,9 +765,9 @@ def accept_milk_request(request, request_id):
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    milk_request.to_seller = seller
-    milk_request.status = 'on_hold'
-    milk_request.save()
+    claimed = claim_milk_request(milk_request, seller)
+    if not claimed:
+        return Response({'message': 'This request is no longer available.'}, status=status.HTTP_409_CONFLICT)
 
     record = create_borrow_lend_record(milk_request, seller)
 
@@ -624,15 +784,37 @@ def accept_milk_request(request, request_id):
 @api_view(['GET'])
 def list_incoming_requests(request):
     seller = get_object_or_404(Seller, user=request.user)
-    requests = MilkRequest.objects.filter(status='pending').select_related('from_seller', 'from_seller__location').exclude(from_seller=seller)
-    return Response(MilkRequestSerializer(requests, many=True).data, status=status.HTTP_200_OK)
+    return Response(
+        _incoming_requests_data(request, seller, get_seller_remaining_milk(seller)), status=status.HTTP_200_OK
+    )
+
+
+def _incoming_requests_data(request, seller, available_milk):
+    requests = get_incoming_requests_feed(seller, available_milk)
+    if request.query_params.get('coverable', '').lower() in ('true', '1', 'yes'):
+        requests = requests.filter(quantity__lte=available_milk)
+
+    paginator = IncomingRequestPagination()
+    page = paginator.paginate_queryset(INCOMING_MILK_REQUEST_PROJECTION.rows(requests), request)
+    data = paginator.get_paginated_response(INCOMING_MILK_REQUEST_PROJECTION.serialize(page)).data
+    data['available_milk'] = str(available_milk)
+    return data
 
 
 @api_view(['GET'])
 def list_my_requests(request):
     seller = get_object_or_404(Seller, user=request.user)
-    requests = MilkRequest.objects.filter(from_seller=seller).order_by('-created_at')
-    return Response(MilkRequestSerializer(requests, many=True).data, status=status.HTTP_200_OK)
+    return Response(_my_requests_data(request, seller), status=status.HTTP_200_OK)
+
+
+def _my_requests_data(request, seller):
+    requests = MilkRequest.objects.filter(from_seller=seller)
+
+    paginator = MyRequestsPagination()
+    page = paginator.paginate_queryset(
+        MILK_REQUEST_PROJECTION.rows(requests), request, key=MILK_REQUEST_PROJECTION.key('created_at', 'request_id')
+    )
+    return paginator.get_paginated_data(MILK_REQUEST_PROJECTION.serialize(page))
 
 
 @api_view(['POST'])
@@ -649,7 +831,9 @@ def mark_as_received(request, request_id):
     
     receipt_date = timezone.localdate()
     if borrow_lend_record:
-        receipt_date = borrow_lend_record.borrow_date 
+        # A borrow from a month that has since closed is received today instead.
+        if borrow_lend_record.borrow_date >= first_hot_month():
+            receipt_date = borrow_lend_record.borrow_date
         borrow_lend_record.settled = True
         borrow_lend_record.save()
 
@@ -672,35 +856,132 @@ def mark_as_received(request, request_id):
 
 @api_view(['GET'])
 def list_notifications(request):
-    notifications = Notification.objects.filter(user=request.user).order_by('-timestamp')[:20]
-    return Response(NotificationSerializer(notifications, many=True).data, status=status.HTTP_200_OK)
+    return Response(_notifications_data(request.user), status=status.HTTP_200_OK)
+
+
+def _notifications_data(user):
+    notifications = Notification.objects.filter(user=user).order_by('-timestamp')[:20]
+    return NotificationSerializer(notifications, many=True).data
 
 
 @api_view(['GET'])
 def get_borrow_lend_history(request):
     seller = get_object_or_404(Seller, user=request.user)
-    borrow_lend_records = BorrowLendRecord.objects.filter(
-        Q(borrower_seller=seller) | Q(lender_seller=seller)
-    ).select_related('borrower_seller', 'lender_seller').order_by('-borrow_date')
+    try:
+        data = _borrow_lend_history_data(request, seller)
+    except ValueError as e:
+        return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(data, status=status.HTTP_200_OK)
 
-    data = []
-    for record in borrow_lend_records:
-        if record.borrower_seller == seller:
-            other_party = record.lender_seller.name
-            transaction_type = "Borrowed"
-        else:
-            other_party = record.borrower_seller.name
-            transaction_type = "Lent"
 
-        data.append({
-            'date': record.borrow_date.strftime('%Y-%m-%d'),
-            'type': transaction_type,
-            'other_party': other_party,
-            'quantity': str(record.quantity),
-            'status': 'Settled' if record.settled else 'Pending'
+def _borrow_lend_history_filters(params):
+    """Filters for get_borrow_lend_history_queryset; ValueError names the bad parameter."""
+    filters = {}
+    for name in ('date_from', 'date_to'):
+        if params.get(name):
+            try:
+                filters[name] = _parse_date(params[name])
+            except ValueError:
+                raise ValueError(f'Invalid {name}, expected YYYY-MM-DD.')
+    if params.get('counterparty'):
+        try:
+            filters['counterparty_id'] = uuid.UUID(params['counterparty'])
+        except ValueError:
+            raise ValueError('Invalid counterparty.')
+    if params.get('settled') is not None:
+        filters['settled'] = params['settled'].lower() in ('true', '1', 'yes')
+    return filters
+
+
+def _borrow_lend_history_data(request, seller):
+    records = get_borrow_lend_history_queryset(seller, **_borrow_lend_history_filters(request.query_params))
+
+    paginator = BorrowLendHistoryPagination()
+    page = paginator.paginate_queryset(
+        records.values(
+            'record_id', 'borrow_date', 'transaction_type', 'counterparty_id',
+            'counterparty_name', 'quantity', 'settled', 'created_at'
+        ),
+        request
+    )
+
+    data = [
+        {
+            'record_id': str(row['record_id']),
+            'date': row['borrow_date'].strftime('%Y-%m-%d'),
+            'type': row['transaction_type'],
+            'other_party': row['counterparty_name'],
+            'other_party_id': str(row['counterparty_id']),
+            'quantity': str(row['quantity']),
+            'status': 'Settled' if row['settled'] else 'Pending'
+        }
+        for row in page
+    ]
+
+    data = paginator.get_paginated_data(data)
+    # The summary covers all of the seller's open records, whatever the filters.
+    data['summary'] = get_counterparty_balances(seller, get_borrow_lend_history_queryset(seller))
+    return data
+
+
+def _transfer_data(transfers, sellers):
+    return [
+        {
+            'from_seller_id': str(transfer['from_seller']),
+            'from_seller_name': sellers[transfer['from_seller']].name,
+            'to_seller_id': str(transfer['to_seller']),
+            'to_seller_name': sellers[transfer['to_seller']].name,
+            'quantity': str(transfer['quantity'].quantize(Decimal('0.00')))
+        }
+        for transfer in transfers
+    ]
+
+
+@api_view(['GET'])
+def get_borrow_lend_settlement(request):
+    get_object_or_404(Manager, user=request.user)
+    pair_balances, seller_balances = get_open_borrow_lend_balances()
+    transfers = propose_settlement_transfers(seller_balances)
+    sellers = Seller.objects.in_bulk(list(seller_balances))
+
+    pairs = []
+    for (first_id, second_id), balance in pair_balances.items():
+        if balance == 0:
+            continue
+        debtor_id, creditor_id = (first_id, second_id) if balance > 0 else (second_id, first_id)
+        pairs.append({
+            'debtor_id': str(debtor_id),
+            'debtor_name': sellers[debtor_id].name,
+            'creditor_id': str(creditor_id),
+            'creditor_name': sellers[creditor_id].name,
+            'quantity': str(abs(balance).quantize(Decimal('0.00')))
         })
 
-    return Response(data, status=status.HTTP_200_OK)
+    balances = [
+        {
+            'seller_id': str(seller_id),
+            'name': sellers[seller_id].name,
+            'net_balance': str(balance.quantize(Decimal('0.00')))
+        }
+        for seller_id, balance in seller_balances.items() if balance != 0
+    ]
+
+    return Response({
+        'pair_balances': pairs,
+        'seller_balances': balances,
+        'transfers': _transfer_data(transfers, sellers)
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+def settle_borrow_lend_records(request):
+    get_object_or_404(Manager, user=request.user)
+    settled_count, transfers, sellers = settle_open_borrow_lend_records()
+    return Response({
+        'message': f'{settled_count} borrow/lend records settled.',
+        'settled_count': settled_count,
+        'transfers': _transfer_data(transfers, sellers)
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -716,27 +997,26 @@ def get_datewise_data(request):
     manager = get_object_or_404(Manager, user=request.user)
     selected_date = _parse_date(request.query_params.get('date'))
 
+    return Response(_datewise_data(manager, selected_date), status=status.HTTP_200_OK)
+
+
+def _datewise_data(manager, selected_date):
     daily_ops = get_or_create_daily_operations(manager, selected_date)
 
-    feed_records = FeedRecord.objects.filter(record=daily_ops).select_related('record')
-    expense_records = ExpenseRecord.objects.filter(record=daily_ops).select_related('record')
-    medicine_records = MedicineRecord.objects.filter(record=daily_ops).select_related('record')
-    milk_distribution = MilkDistribution.objects.filter(record=daily_ops).select_related('record')
-    milk_received = MilkReceived.objects.filter(date=selected_date).select_related('seller')
-    daily_totals = DailyTotal.objects.filter(date=selected_date).select_related('seller')
-    attendance = Attendance.objects.filter(date=selected_date).select_related('employee')
-
-    data = {
-        'feed_records': FeedRecordSerializer(feed_records, many=True).data,
-        'expense_records': ExpenseRecordSerializer(expense_records, many=True).data,
-        'medicine_records': MedicineRecordSerializer(medicine_records, many=True).data,
-        'milk_distribution': MilkDistributionSerializer(milk_distribution, many=True).data,
-        'milk_received': MilkReceivedSerializer(milk_received, many=True).data,
-        'daily_totals': DailyTotalSerializer(daily_totals, many=True).data,
-        'attendance': AttendanceSerializer(attendance, many=True).data,
-    }
+    milk_received = MilkReceived.objects.filter(date=selected_date)
+    daily_totals = DailyTotal.objects.filter(date=selected_date)
+    attendance = Attendance.objects.filter(date=selected_date)
 
-    return Response(data, status=status.HTTP_200_OK)
+    data = _daily_records_data(daily_ops)
+    data.update({
+        'milk_received': MILK_RECEIVED_PROJECTION.serialize_queryset(milk_received)
+        + archived_data(MilkReceivedSerializer, selected_date, ['seller__location', 'manager']),
+        'daily_totals': DAILY_TOTAL_PROJECTION.serialize_queryset(daily_totals)
+        + archived_data(DailyTotalSerializer, selected_date, ['seller__location']),
+        'attendance': ATTENDANCE_PROJECTION.serialize_queryset(attendance)
+        + archived_data(AttendanceSerializer, selected_date, ['employee']),
+    })
+    return data
 
 
 @api_view(['POST'])
@@ -751,8 +1031,11 @@ def add_manager(request):
 
 @api_view(['GET'])
 def list_managers(request):
-    managers = Manager.objects.filter(user__is_active=True)
-    return Response(ManagerSerializer(managers, many=True).data, status=status.HTTP_200_OK)
+    managers = Manager.objects.filter(user__is_active=True).select_related('user')
+
+    paginator = ManagerPagination()
+    page = paginator.paginate_queryset(managers, request)
+    return paginator.get_paginated_response(ManagerSerializer(page, many=True).data)
 
 
 @api_view(['DELETE'])
@@ -780,6 +1063,7 @@ def _parse_date(input_date):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(TIME_SERIES_RENDERERS)
 def manager_dashboard_stats(request):
     try:
         manager = get_object_or_404(Manager, user=request.user)
@@ -821,32 +1105,42 @@ def manager_dashboard_stats(request):
         sales_data = {item['date'].strftime('%Y-%m-%d'): item['leftover_sales'] or 0 for item in milk_dist}
         expense_data = {item['date'].strftime('%Y-%m-%d'): item['total_expense'] or 0 for item in expenses}
 
-        chart_data = {
-            'labels': labels,
-            'datasets': [
-                {
-                    'label': 'Total Milk (L)',
-                    'data': [float(milk_data.get(label, 0)) for label in labels],
-                    'borderColor': '#667eea',
-                    'fill': False,
-                    'tension': 0.1
-                },
-                {
-                    'label': 'Leftover Sales (₹)',
-                    'data': [float(sales_data.get(label, 0)) for label in labels],
-                    'borderColor': '#27ae60',
-                    'fill': False,
-                    'tension': 0.1
-                },
-                {
-                    'label': 'Total Expenses (₹)',
-                    'data': [float(expense_data.get(label, 0)) for label in labels],
-                    'borderColor': '#e74c3c',
-                    'fill': False,
-                    'tension': 0.1
+        if wants_columnar(request):
+            chart_data = {
+                'labels': labels,
+                'series': {
+                    'total_milk': [float(milk_data.get(label, 0)) for label in labels],
+                    'leftover_sales': [float(sales_data.get(label, 0)) for label in labels],
+                    'total_expenses': [float(expense_data.get(label, 0)) for label in labels]
                 }
-            ]
-        }
+            }
+        else:
+            chart_data = {
+                'labels': labels,
+                'datasets': [
+                    {
+                        'label': 'Total Milk (L)',
+                        'data': [float(milk_data.get(label, 0)) for label in labels],
+                        'borderColor': '#667eea',
+                        'fill': False,
+                        'tension': 0.1
+                    },
+                    {
+                        'label': 'Leftover Sales (₹)',
+                        'data': [float(sales_data.get(label, 0)) for label in labels],
+                        'borderColor': '#27ae60',
+                        'fill': False,
+                        'tension': 0.1
+                    },
+                    {
+                        'label': 'Total Expenses (₹)',
+                        'data': [float(expense_data.get(label, 0)) for label in labels],
+                        'borderColor': '#e74c3c',
+                        'fill': False,
+                        'tension': 0.1
+                    }
+                ]
+            }
 
         total_employees = Employee.objects.filter(manager=manager, is_active=True).count()
         total_locations = Location.objects.count()
@@ -868,19 +1162,65 @@ def manager_dashboard_stats(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(TIME_SERIES_RENDERERS)
 def get_sales_trend(request):
-    manager = get_object_or_404(Manager, user=request.user)
-    
+    get_object_or_404(Manager, user=request.user)
+    return Response(_sales_trend_data(wants_columnar(request)))
+
+
+def _sales_trend_data(columnar=False):
     thirty_days_ago = timezone.localdate() - timedelta(days=30)
     
     sales_data = DailyTotal.objects.filter(
         date__gte=thirty_days_ago
-    ).annotate(
-        day=TruncDate('date')
     ).values(
-        'day'
+        day=F('date')
     ).annotate(
         daily_revenue=Sum('revenue')
     ).order_by('day')
-    
-    return Response(sales_data)
\ No newline at end of file
+
+    if columnar:
+        return to_columnar(sales_data, 'day', ['daily_revenue'])
+    return list(sales_data)
+
+
+MANAGER_BOOTSTRAP_SECTIONS = {
+    'datewise': lambda request, manager, selected_date: _datewise_data(manager, selected_date),
+    'employees': lambda request, manager, selected_date: _employees_data(request, manager),
+    'locations': lambda request, manager, selected_date: get_location_statistics(selected_date),
+    'sellers': lambda request, manager, selected_date: _sellers_data(request),
+    'pending_distributions': lambda request, manager, selected_date: _manager_pending_distributions_data(
+        request, manager
+    ),
+    'sales_trend': lambda request, manager, selected_date: _sales_trend_data(wants_columnar(request)),
+    'notifications': lambda request, manager, selected_date: _notifications_data(request.user),
+}
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@renderer_classes(TIME_SERIES_RENDERERS)
+def manager_bootstrap(request):
+    manager = get_object_or_404(Manager, user=request.user)
+    selected_date = _parse_date(request.query_params.get('date'))
+
+    sections = request.query_params.get('sections')
+    if sections:
+        sections = [section.strip() for section in sections.split(',') if section.strip()]
+    else:
+        sections = list(MANAGER_BOOTSTRAP_SECTIONS)
+    unknown = [section for section in sections if section not in MANAGER_BOOTSTRAP_SECTIONS]
+    if unknown:
+        return Response({'message': f"Unknown sections: {', '.join(unknown)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = {'date': selected_date}
+    for section in sections:
+        data[section] = MANAGER_BOOTSTRAP_SECTIONS[section](request, manager, selected_date)
+    return Response(data, status=status.HTTP_200_OK)
+
+
+@never_cache
+def metrics(request):
+    if not metrics_access_allowed(request):
+        return HttpResponse(status=403)
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
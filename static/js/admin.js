@@ -45,6 +45,9 @@ async function apiFetch(url, options = {}) {
 
 
 function logout() {
+    if ("serviceWorker" in navigator && navigator.serviceWorker.controller) {
+        navigator.serviceWorker.controller.postMessage({ type: "logout" });
+    }
     fetch("/logout/", { method: "POST" }).then(() => {
         sessionStorage.clear();
         window.location.href = "/";
@@ -195,7 +198,12 @@ function updateStats(managers) {
 
 async function loadManagers() {
     try {
-        const managers = await apiFetch(`${BASE_URL}/admin/managers/`);
+        let page = await apiFetch(`${BASE_URL}/admin/managers/`);
+        const managers = [...page.results];
+        while (page.next) {
+            page = await apiFetch(page.next);
+            managers.push(...page.results);
+        }
         populateManagersTable(managers);
     } catch (error) {
         console.error('Failed to load managers:', error);
@@ -48,6 +48,9 @@ function getSelectedDate() {
 }
 
 function logout() {
+    if ("serviceWorker" in navigator && navigator.serviceWorker.controller) {
+        navigator.serviceWorker.controller.postMessage({ type: "logout" });
+    }
     fetch("/logout/", { method: "POST" }).then(() => {
         sessionStorage.clear();
         window.location.href = "/"; 
@@ -66,13 +69,54 @@ function getCSRFToken() {
     return "";
 }
 
+const POST_RETRIES = 2;
+const RETRYABLE_STATUSES = [502, 503, 504];
+
+// A POST keeps its Idempotency-Key until it gets a final answer, so retries
+// and resubmitting the same form after a failure are deduplicated by the server.
+function idempotencyKeyFor(url, body) {
+    const slot = `idempotency:${url}:${body || ""}`;
+    let key = sessionStorage.getItem(slot);
+    if (!key && window.crypto?.randomUUID) {
+        key = window.crypto.randomUUID();
+        sessionStorage.setItem(slot, key);
+    }
+    return { key, release: () => sessionStorage.removeItem(slot) };
+}
+
+async function fetchWithRetries(url, options, idempotency) {
+    for (let attempt = 0; ; attempt++) {
+        try {
+            const res = await fetch(url, options);
+            const unanswered = res.status >= 500 || res.status === 409;
+            if (RETRYABLE_STATUSES.includes(res.status) && idempotency && attempt < POST_RETRIES) {
+                await new Promise(resolve => setTimeout(resolve, 500 * 2 ** attempt));
+                continue;
+            }
+            if (idempotency && !unanswered) idempotency.release();
+            return res;
+        } catch (error) {
+            if (!idempotency || attempt >= POST_RETRIES) throw error;
+            await new Promise(resolve => setTimeout(resolve, 500 * 2 ** attempt));
+        }
+    }
+}
+
 async function apiFetch(url, options = {}) {
     const headers = options.headers || {};
     headers["Content-Type"] = "application/json";
     headers["X-CSRFToken"] = getCSRFToken();
+    // Read by the service worker to tie offline entries to this user; not sent on.
+    headers["X-Outbox-User"] = sessionStorage.getItem("user_id") || "";
+    let idempotency = null;
+    if ((options.method || "GET").toUpperCase() === "POST" && !headers["Idempotency-Key"]) {
+        idempotency = idempotencyKeyFor(url, options.body);
+        if (idempotency.key) headers["Idempotency-Key"] = idempotency.key;
+        else idempotency = null;
+    }
     options.headers = headers;
 
-    const res = await fetch(url, options);
+    const res = await fetchWithRetries(url, options, idempotency);
 
     if (res.status === 204) {
         return null;
@@ -104,9 +148,65 @@ async function apiFetch(url, options = {}) {
     return data;
 }
 
+async function collectPages(page) {
+    const results = [...page.results];
+    let next = page.next;
+    while (next) {
+        const more = await apiFetch(next);
+        results.push(...more.results);
+        next = more.next;
+    }
+    return results;
+}
+
+
+
+function initOfflineSync() {
+    if (!("serviceWorker" in navigator)) return;
+
+    const requestReplay = () => {
+        const userId = sessionStorage.getItem("user_id");
+        if (navigator.serviceWorker.controller && userId) {
+            navigator.serviceWorker.controller.postMessage({
+                type: "replay-outbox", csrf: getCSRFToken(), user_id: userId,
+            });
+        }
+    };
+
+    navigator.serviceWorker.register("/sw.js").then(() => {
+        if (navigator.onLine) requestReplay();
+    }).catch(error => console.error("Service worker registration failed:", error));
+
+    window.addEventListener("online", requestReplay);
+
+    navigator.serviceWorker.addEventListener("message", event => {
+        if (!event.data) return;
+        if (event.data.type === "replay-requested") {
+            requestReplay();
+            return;
+        }
+        if (event.data.type === "outbox-held") {
+            showModal("errorModal", `${event.data.count} offline ${event.data.count === 1 ? 'entry is' : 'entries are'} waiting to sync. Please log in again.`);
+            return;
+        }
+        if (event.data.type !== "outbox-replayed") return;
+        const rejected = event.data.results.filter(result => result.status === "rejected");
+        if (rejected.length > 0) {
+            showModal("errorModal", `${rejected.length} offline ${rejected.length === 1 ? 'entry was' : 'entries were'} rejected by the server.`);
+        }
+        if (document.getElementById('dateSelector')) {
+            loadSellerSummary();
+            loadPendingDistributions();
+        }
+        if (document.getElementById('globalDateSelector')) {
+            loadDatewiseData(getSelectedDate());
+        }
+    });
+}
 
 
 document.addEventListener("DOMContentLoaded", () => {
+    initOfflineSync();
     
     if (document.getElementById("loginForm")) {
         initLoginPage();
@@ -264,20 +364,9 @@ function initManagerPage() {
     const dateSelector = document.getElementById("globalDateSelector");
     dateSelector.value = getCurrentDate();
     
-    const loadAllManagerData = (date) => {
-        loadManagerDashboardStats(date);
-        loadDatewiseData(date); 
-        loadDailyDataForDate(date); 
-    };
-
-    dateSelector.addEventListener("change", () => loadAllManagerData(dateSelector.value));
+    dateSelector.addEventListener("change", () => loadManagerBootstrap(dateSelector.value, ["datewise", "employees", "locations"]));
 
-    loadEmployees();
-    loadLocations();
-    loadLocationsForMilkDistribution();
-    loadManagerPendingDistributions();
-    loadAllManagerData(dateSelector.value); 
-    loadSalesTrendChart(); 
+    loadManagerBootstrap(dateSelector.value); 
 }
 
 function initSellerPage() {
@@ -291,10 +380,22 @@ function initSellerPage() {
     
     dateSelector.addEventListener('change', loadAllSellerData);
 
-    loadAllSellerData();
-    loadIncomingRequests();
-    loadMyRequests();
-    loadBorrowLendHistory();
+    loadSellerBootstrap();
+}
+
+async function loadSellerBootstrap() {
+    try {
+        const data = await apiFetch(`${BASE_URL}/seller/bootstrap/?date=${getSelectedDate()}`);
+        updateSellerSummaryUI(data.summary);
+        populateSellerPendingDistributions(await collectPages(data.pending_distributions));
+        populateIncomingRequests(data.incoming_requests);
+        populateMyRequests(data.my_requests);
+        populateBorrowLendTable(data.borrow_lend_history.results);
+        populateBorrowLendBalances(data.borrow_lend_history.summary);
+        updateBorrowLendLoadMore(data.borrow_lend_history.next);
+    } catch (error) {
+        console.error("Failed to load seller dashboard:", error);
+    }
 }
 
 function initEmployeePage() {
@@ -331,7 +432,7 @@ function initGlobalFormListeners() {
         updateSellerSummaryUI(newSummary);
     }, true, setFormDate);
     attachFormListener("dailyTotalsForm", `${BASE_URL}/seller/daily-totals/`, "Daily financial totals recorded!", loadSellerSummary, false, setFormDate);
-    attachFormListener("milkRequestForm", `${BASE_URL}/seller/milk-request/create/`, "Milk request sent!", loadMyRequests);
+    attachFormListener("milkRequestForm", `${BASE_URL}/seller/milk-request/create/`, "Milk request sent!", () => loadMyRequests());
 
     const dailyTotalsForm = document.getElementById("dailyTotalsForm");
     if (dailyTotalsForm) {
@@ -373,6 +474,12 @@ function attachFormListener(formId, url, successMessage, callback, apiReturnsDat
             if(data.leftoverSales) { data.leftoverSales = data.leftoverSales; }
 
             const response = await apiFetch(url, { method: "POST", body: JSON.stringify(data) });
+
+            if (response && response.queued) {
+                showModal("successModal", response.message);
+                e.target.reset();
+                return;
+            }
             
             showModal("successModal", successMessage);
             e.target.reset();
@@ -393,88 +500,99 @@ function attachFormListener(formId, url, successMessage, callback, apiReturnsDat
 
 
 
-async function loadManagerDashboardStats(selectedDate) {
+async function loadManagerBootstrap(selectedDate, sections = null) {
     try {
-        const data = await apiFetch(`${BASE_URL}/manager/datewise-data/?date=${selectedDate}`);
-        
-        const [employees, locations] = await Promise.all([
-            apiFetch(`${BASE_URL}/manager/employees/`),
-            apiFetch(`${BASE_URL}/manager/locations/`)
-        ]);
-        
-        document.getElementById("dashTotalEmployees").textContent = employees.length;
-        document.getElementById("dashTotalLocations").textContent = locations.length;
-
-        let totalMilk = 0;
-        if (data.milk_distribution && data.milk_distribution.length > 0) {
-            totalMilk = data.milk_distribution.reduce((acc, dist) => acc + parseFloat(dist.total_milk), 0);
+        const query = sections ? `&sections=${sections.join(",")}` : "";
+        const data = await apiFetch(`${BASE_URL}/manager/bootstrap/?date=${selectedDate}${query}&format=columnar`);
+
+        const employees = data.employees ? await collectPages(data.employees) : null;
+        if (employees) {
+            populateEmployeeTable(employees);
+            populateAttendanceGrid(employees);
+            populateEmployeeSelect(employees);
         }
-        document.getElementById("dashTodayMilk").textContent = totalMilk.toFixed(2);
-
-        let totalExpenses = 0;
-        if (data.feed_records) totalExpenses += data.feed_records.reduce((acc, feed) => acc + parseFloat(feed.cost), 0);
-        if (data.expense_records) totalExpenses += data.expense_records.reduce((acc, exp) => acc + parseFloat(exp.amount), 0);
-        if (data.medicine_records) totalExpenses += data.medicine_records.reduce((acc, med) => acc + parseFloat(med.cost), 0);
-        document.getElementById("dashTodayExpenses").textContent = totalExpenses.toFixed(2);
-        
-        initLocationSalesChart(data.daily_totals);
-        initExpensePieChart(data.feed_records, data.expense_records, data.medicine_records);
-        initMilkUsageChart(data.milk_distribution);
-
+        if (data.locations) {
+            populateLocationGrid(data.locations);
+            populateSellerLocationSelect(data.locations);
+            populateMilkDistributionLocations(data.locations);
+        }
+        if (data.datewise) {
+            updateManagerDashboardStats(data.datewise, employees, data.locations);
+            populateDatewiseTables(data.datewise);
+            populateDailyForms(data.datewise, selectedDate);
+        }
+        if (data.pending_distributions) {
+            populateManagerPendingDistributions(await collectPages(data.pending_distributions));
+        }
+        if (data.sales_trend) renderSalesTrendChart(data.sales_trend);
     } catch (error) {
-        console.error("Failed to load manager dashboard stats:", error);
+        console.error("Failed to load manager dashboard:", error);
     }
 }
 
-async function loadSalesTrendChart() {
-    try {
-        const trendData = await apiFetch(`${BASE_URL}/manager/sales-trend/`);
-        const ctx = document.getElementById('salesTrendChart')?.getContext('2d');
-        if (!ctx) return;
-
-        const labels = trendData.map(item => item.day);
-        const data = trendData.map(item => item.daily_revenue);
-
-        if (salesTrendChart) salesTrendChart.destroy();
-        salesTrendChart = new Chart(ctx, {
-            type: 'line',
-            data: {
-                labels: labels,
-                datasets: [{
-                    label: 'Revenue (₹)',
-                    data: data,
-                    borderColor: 'var(--primary)',
-                    backgroundColor: 'var(--primary-light)',
-                    fill: true,
-                    tension: 0.1
-                }]
-            },
-            options: { responsive: true, maintainAspectRatio: false }
-        });
-    } catch (error)
-    {
-        console.error("Failed to load sales trend:", error);
+function updateManagerDashboardStats(data, employees, locations) {
+    if (employees) document.getElementById("dashTotalEmployees").textContent = employees.length;
+    if (locations) document.getElementById("dashTotalLocations").textContent = locations.length;
+
+    let totalMilk = 0;
+    if (data.milk_distribution && data.milk_distribution.length > 0) {
+        totalMilk = data.milk_distribution.reduce((acc, dist) => acc + parseFloat(dist.total_milk), 0);
     }
+    document.getElementById("dashTodayMilk").textContent = totalMilk.toFixed(2);
+
+    let totalExpenses = 0;
+    if (data.feed_records) totalExpenses += data.feed_records.reduce((acc, feed) => acc + parseFloat(feed.cost), 0);
+    if (data.expense_records) totalExpenses += data.expense_records.reduce((acc, exp) => acc + parseFloat(exp.amount), 0);
+    if (data.medicine_records) totalExpenses += data.medicine_records.reduce((acc, med) => acc + parseFloat(med.cost), 0);
+    document.getElementById("dashTodayExpenses").textContent = totalExpenses.toFixed(2);
+    
+    initLocationSalesChart(data.daily_totals);
+    initExpensePieChart(data.feed_records, data.expense_records, data.medicine_records);
+    initMilkUsageChart(data.milk_distribution);
+}
+
+function renderSalesTrendChart(trendData) {
+    const ctx = document.getElementById('salesTrendChart')?.getContext('2d');
+    if (!ctx) return;
+
+    if (salesTrendChart) salesTrendChart.destroy();
+    salesTrendChart = new Chart(ctx, {
+        type: 'line',
+        data: {
+            labels: trendData.labels,
+            datasets: [{
+                label: 'Revenue (₹)',
+                data: trendData.series.daily_revenue,
+                borderColor: 'var(--primary)',
+                backgroundColor: 'var(--primary-light)',
+                fill: true,
+                tension: 0.1
+            }]
+        },
+        options: { responsive: true, maintainAspectRatio: false }
+    });
 }
 
 async function loadDatewiseData(selectedDate) {
     try {
         const data = await apiFetch(`${BASE_URL}/manager/datewise-data/?date=${selectedDate}`);
-        
-        populateTable('feedRecordsTable', data.feed_records, ['feed_type', 'quantity', 'cost'], ['Feed Type', 'Quantity (kg)', 'Cost (₹)']);
-        populateTable('expensesTable', data.expense_records, ['category', 'amount'], ['Category', 'Amount (₹)']);
-        populateTable('medicineTable', data.medicine_records, ['medicine_name', 'cost'], ['Medicine Name', 'Cost (₹)']);
-        populateTable('milkDistributionTable', data.milk_distribution, ['total_milk', 'leftover_milk', 'leftover_sales'], ['Total Milk (L)', 'Leftover Milk (L)', 'Leftover Sales (₹)']);
-        populateTable('milkReceivedTable', data.milk_received, ['seller_name', 'quantity', 'source', 'status'], ['Seller Name', 'Quantity (L)', 'Source', 'Status']);
-        populateTable('dailyTotalsTable', data.daily_totals, ['seller_name', 'cash_sales', 'online_sales', 'revenue'], ['Seller Name', 'Cash Sales (₹)', 'Online Sales (₹)', 'Total Revenue (₹)']); 
-        populateTable('attendanceTable', data.attendance, ['employee_name', 'status'], ['Employee Name', 'Status']);
-
+        populateDatewiseTables(data);
     } catch (error) {
         console.error("Failed to load datewise data:", error);
         showModal("errorModal", "Failed to load data for the selected date: " + error.message);
     }
 }
 
+function populateDatewiseTables(data) {
+    populateTable('feedRecordsTable', data.feed_records, ['feed_type', 'quantity', 'cost'], ['Feed Type', 'Quantity (kg)', 'Cost (₹)']);
+    populateTable('expensesTable', data.expense_records, ['category', 'amount'], ['Category', 'Amount (₹)']);
+    populateTable('medicineTable', data.medicine_records, ['medicine_name', 'cost'], ['Medicine Name', 'Cost (₹)']);
+    populateTable('milkDistributionTable', data.milk_distribution, ['total_milk', 'leftover_milk', 'leftover_sales'], ['Total Milk (L)', 'Leftover Milk (L)', 'Leftover Sales (₹)']);
+    populateTable('milkReceivedTable', data.milk_received, ['seller_name', 'quantity', 'source', 'status'], ['Seller Name', 'Quantity (L)', 'Source', 'Status']);
+    populateTable('dailyTotalsTable', data.daily_totals, ['seller_name', 'cash_sales', 'online_sales', 'revenue'], ['Seller Name', 'Cash Sales (₹)', 'Online Sales (₹)', 'Total Revenue (₹)']); 
+    populateTable('attendanceTable', data.attendance, ['employee_name', 'status'], ['Employee Name', 'Status']);
+}
+
 function populateTable(tableId, data, fields, headers) {
     const tbody = document.querySelector(`#${tableId} tbody`);
     if (!tbody) {
@@ -520,55 +638,48 @@ function populateTable(tableId, data, fields, headers) {
 }
 
 
-async function loadDailyDataForDate(selectedDate) {
-    try {
-        const data = await apiFetch(`${BASE_URL}/manager/daily-data/?date=${selectedDate}`);
-
-        const resetAndSetDate = (formEl) => {
-            if (formEl) {
-                formEl.reset();
-                const recordIdInput = formEl.querySelector('input[type="hidden"][name="recordId"]');
-                if (recordIdInput) recordIdInput.value = '';
-                const dateInput = formEl.querySelector('input[type="hidden"][name="date"]');
-                if(dateInput) dateInput.value = selectedDate;
-            }
-        };
+function populateDailyForms(data, selectedDate) {
+    const resetAndSetDate = (formEl) => {
+        if (formEl) {
+            formEl.reset();
+            const recordIdInput = formEl.querySelector('input[type="hidden"][name="recordId"]');
+            if (recordIdInput) recordIdInput.value = '';
+            const dateInput = formEl.querySelector('input[type="hidden"][name="date"]');
+            if(dateInput) dateInput.value = selectedDate;
+        }
+    };
 
-        const populateForm = (formEl, record, idField) => {
-            if (formEl && record) {
-                const recordIdInput = formEl.querySelector(`input[type="hidden"][name="recordId"]`);
-                if(recordIdInput) recordIdInput.value = record[idField];
-                
-                for (const key in record) {
-                    const input = formEl.querySelector(`[data-field="${key}"]`);
-                    if (input) {
-                        input.value = record[key];
-                    }
+    const populateForm = (formEl, record, idField) => {
+        if (formEl && record) {
+            const recordIdInput = formEl.querySelector(`input[type="hidden"][name="recordId"]`);
+            if(recordIdInput) recordIdInput.value = record[idField];
+            
+            for (const key in record) {
+                const input = formEl.querySelector(`[data-field="${key}"]`);
+                if (input) {
+                    input.value = record[key];
                 }
-            } else {
-                resetAndSetDate(formEl);
             }
-        };
-        
-        populateForm(document.getElementById("feedEntryForm"), data.feed_records?.[0], 'feed_id');
-        populateForm(document.getElementById("dailyExpenseForm"), data.expense_records?.[0], 'expense_id'); 
-        populateForm(document.getElementById("medicineForm"), data.medicine_records?.[0], 'medicine_id');
-        populateForm(document.getElementById("leftoverMilkForm"), data.milk_distribution?.[0], 'distribution_id');
-        
-        resetAndSetDate(document.getElementById("miscExpenseForm"));
-        resetAndSetDate(document.getElementById("milkDistributionForm"));
-        
-        const attDate = document.getElementById("attendanceDate");
-        if(attDate) attDate.value = selectedDate;
-
-    } catch (error) {
-        console.error("Failed to load daily form data:", error);
-    }
+        } else {
+            resetAndSetDate(formEl);
+        }
+    };
+    
+    populateForm(document.getElementById("feedEntryForm"), data.feed_records?.[0], 'feed_id');
+    populateForm(document.getElementById("dailyExpenseForm"), data.expense_records?.[0], 'expense_id'); 
+    populateForm(document.getElementById("medicineForm"), data.medicine_records?.[0], 'medicine_id');
+    populateForm(document.getElementById("leftoverMilkForm"), data.milk_distribution?.[0], 'distribution_id');
+    
+    resetAndSetDate(document.getElementById("miscExpenseForm"));
+    resetAndSetDate(document.getElementById("milkDistributionForm"));
+    
+    const attDate = document.getElementById("attendanceDate");
+    if(attDate) attDate.value = selectedDate;
 }
 
 async function loadEmployees() {
     try {
-        const employees = await apiFetch(`${BASE_URL}/manager/employees/`);
+        const employees = await collectPages(await apiFetch(`${BASE_URL}/manager/employees/`));
         populateEmployeeTable(employees);
         populateAttendanceGrid(employees);
         populateEmployeeSelect(employees);
@@ -640,7 +751,7 @@ window.markAttendance = async function (employeeId, status) {
         const data = { employeeId, date, status };
         const response = await apiFetch(`${BASE_URL}/manager/attendance/`, { method: "POST", body: JSON.stringify(data) });
         showModal("successModal", response.message || `Attendance marked ${status}`);
-        loadDatewiseData(date);
+        if (!response.queued) loadDatewiseData(date);
     } catch (error) {
         showModal("errorModal", error.message);
     }
@@ -705,51 +816,59 @@ function populateSellerLocationSelect(locations) {
 async function loadLocationsForMilkDistribution() {
     try {
         const locations = await apiFetch(`${BASE_URL}/manager/locations/`);
-        const select = document.querySelector('#milkDistributionForm select[data-field="locationId"]');
-        if (!select) return;
-        select.innerHTML = '<option value="">Choose location...</option>';
-        locations.forEach(location => {
-            const option = document.createElement("option");
-            option.value = location.location_id;
-            option.textContent = location.location_name;
-            select.appendChild(option);
-        });
+        populateMilkDistributionLocations(locations);
     } catch (error) {
         console.error("Failed to load locations for milk form:", error);
     }
 }
 
+function populateMilkDistributionLocations(locations) {
+    const select = document.querySelector('#milkDistributionForm select[data-field="locationId"]');
+    if (!select) return;
+    select.innerHTML = '<option value="">Choose location...</option>';
+    locations.forEach(location => {
+        const option = document.createElement("option");
+        option.value = location.location_id;
+        option.textContent = location.location_name;
+        select.appendChild(option);
+    });
+}
+
 async function loadManagerPendingDistributions() {
     try {
-        const records = await apiFetch(`${BASE_URL}/manager/pending-distributions/`);
-        const container = document.getElementById("managerPendingDistributionsList");
-        if (!container) return;
-        
-        container.innerHTML = "";
-        if (records.length === 0) {
-            container.innerHTML = '<p style="text-align: center; color: var(--text-muted); padding: 20px;">No pending distributions.</p>';
-            return;
-        }
-
-        records.forEach(record => {
-            const card = document.createElement("div");
-            card.className = "request-card";
-            const locationName = record.seller_location_name || 'Unknown Location';
-            card.innerHTML = `
-                <div class="request-info">
-                    <h4>To: ${record.seller_name} (${locationName})</h4>
-                    <p><strong>Quantity:</strong> ${record.quantity} Liters</p>
-                    <p><strong>Date:</strong> ${record.date}</p>
-                </div>
-                <div><span class="badge badge-pending">Pending</span></div>
-            `;
-            container.appendChild(card);
-        });
+        const records = await collectPages(await apiFetch(`${BASE_URL}/manager/pending-distributions/`));
+        populateManagerPendingDistributions(records);
     } catch (error) {
         console.error("Failed to load manager pending distributions:", error);
     }
 }
 
+function populateManagerPendingDistributions(records) {
+    const container = document.getElementById("managerPendingDistributionsList");
+    if (!container) return;
+    
+    container.innerHTML = "";
+    if (records.length === 0) {
+        container.innerHTML = '<p style="text-align: center; color: var(--text-muted); padding: 20px;">No pending distributions.</p>';
+        return;
+    }
+
+    records.forEach(record => {
+        const card = document.createElement("div");
+        card.className = "request-card";
+        const locationName = record.seller_location_name || 'Unknown Location';
+        card.innerHTML = `
+            <div class="request-info">
+                <h4>To: ${record.seller_name} (${locationName})</h4>
+                <p><strong>Quantity:</strong> ${record.quantity} Liters</p>
+                <p><strong>Date:</strong> ${record.date}</p>
+            </div>
+            <div><span class="badge badge-pending">Pending</span></div>
+        `;
+        container.appendChild(card);
+    });
+}
+
 
 function updateSellerSummaryUI(summary) {
     document.getElementById("todayRemainingMilk").textContent = summary.remaining_milk;
@@ -794,7 +913,7 @@ function populateTodaySalesTable(sales) {
 
 async function loadPendingDistributions() {
     try {
-        const records = await apiFetch(`${BASE_URL}/seller/pending-distributions/`);
+        const records = await collectPages(await apiFetch(`${BASE_URL}/seller/pending-distributions/`));
         populateSellerPendingDistributions(records);
     } catch (error) {
         console.error("Failed to load pending distributions:", error);
@@ -843,10 +962,14 @@ function populateSellerPendingDistributions(records) {
 
 window.handleStatusUpdate = async function(receiptId, newStatus) {
     try {
-        await apiFetch(`${BASE_URL}/seller/milk-received/${receiptId}/update-status/`, {
+        const response = await apiFetch(`${BASE_URL}/seller/milk-received/${receiptId}/update-status/`, {
             method: 'POST',
             body: JSON.stringify({ status: newStatus })
         });
+        if (response && response.queued) {
+            showModal("successModal", response.message);
+            return;
+        }
         showModal("successModal", `Successfully marked as ${newStatus}!`);
         loadPendingDistributions(); 
         loadSellerSummary(); 
@@ -855,37 +978,59 @@ window.handleStatusUpdate = async function(receiptId, newStatus) {
     }
 }
 
-async function loadIncomingRequests() {
+let incomingRequestsNextUrl = null;
+
+async function loadIncomingRequests(append = false) {
     try {
-        const requests = await apiFetch(`${BASE_URL}/seller/milk-requests/incoming/`);
-        const container = document.getElementById("incomingRequests");
-        if (!container) return;
-        container.innerHTML = "";
-        if (requests.length === 0) {
-            container.innerHTML = '<p style="text-align: center; color: var(--text-muted); padding: 20px;">No incoming requests</p>';
-            return;
-        }
-        requests.forEach(request => {
-            const card = document.createElement("div");
-            card.className = "request-card";
-            card.innerHTML = `
-                <div class="request-info">
-                <h4>Request from ${request.from_seller_name} (${request.from_seller_location})</h4>
-                <p><strong>Quantity:</strong> ${request.quantity} Liters</p>
-                <p><strong>Date:</strong> ${new Date(request.created_at).toLocaleDateString()}</p>
-                </div>
-                <div>
-                <span class="badge badge-pending">Pending</span>
-                <button class="btn-secondary btn-success btn-small" style="margin-left: 10px;" onclick="acceptRequest('${request.request_id}')">Accept</button>
-                </div>
-            `;
-            container.appendChild(card);
-        });
+        const url = append && incomingRequestsNextUrl ? incomingRequestsNextUrl : `${BASE_URL}/seller/milk-requests/incoming/`;
+        const data = await apiFetch(url);
+        populateIncomingRequests(data, append);
     } catch (error) {
         console.error("Failed to load incoming requests:", error);
     }
 }
 
+function populateIncomingRequests(data, append = false) {
+    const requests = data.results;
+    incomingRequestsNextUrl = data.next;
+    const container = document.getElementById("incomingRequests");
+    if (!container) return;
+    if (!append) container.innerHTML = "";
+    const existingMore = document.getElementById("incomingRequestsMore");
+    if (existingMore) existingMore.remove();
+    if (!append && requests.length === 0) {
+        container.innerHTML = '<p style="text-align: center; color: var(--text-muted); padding: 20px;">No incoming requests</p>';
+        return;
+    }
+    requests.forEach(request => {
+        const card = document.createElement("div");
+        card.className = "request-card";
+        const acceptButton = request.can_cover
+            ? `<button class="btn-secondary btn-success btn-small" style="margin-left: 10px;" onclick="acceptRequest('${request.request_id}')">Accept</button>`
+            : `<button class="btn-secondary btn-small" style="margin-left: 10px;" disabled title="You only have ${data.available_milk}L available">Not enough milk</button>`;
+        card.innerHTML = `
+            <div class="request-info">
+            <h4>Request from ${request.from_seller_name} (${request.from_seller_location})</h4>
+            <p><strong>Quantity:</strong> ${request.quantity} Liters</p>
+            <p><strong>Date:</strong> ${new Date(request.created_at).toLocaleDateString()}</p>
+            </div>
+            <div>
+            ${request.is_local ? '<span class="badge badge-accepted">Nearby</span>' : ''}
+            <span class="badge badge-pending">Pending</span>
+            ${acceptButton}
+            </div>
+        `;
+        container.appendChild(card);
+    });
+    if (incomingRequestsNextUrl) {
+        const more = document.createElement("div");
+        more.id = "incomingRequestsMore";
+        more.style.textAlign = "center";
+        more.innerHTML = '<button class="btn-secondary btn-small" onclick="loadIncomingRequests(true)">Load More</button>';
+        container.appendChild(more);
+    }
+}
+
 window.acceptRequest = async function (requestId) {
     try {
         await apiFetch(`${BASE_URL}/seller/milk-request/${requestId}/accept/`, {
@@ -900,52 +1045,71 @@ window.acceptRequest = async function (requestId) {
     }
 };
 
-async function loadMyRequests() {
-    try {
-        const requests = await apiFetch(`${BASE_URL}/seller/milk-requests/mine/`);
-        const container = document.getElementById("myRequestsList");
-        if (!container) return;
-        container.innerHTML = "";
-        if (requests.length === 0) {
-            container.innerHTML = '<p style="text-align: center; color: var(--text-muted); padding: 20px;">No requests made yet</p>';
-            return;
-        }
-        requests.forEach(request => {
-            const card = document.createElement("div");
-            card.className = "request-card";
-            let statusBadge = "";
-            let actionButton = "";
-
-            if (request.status === "pending") {
-                statusBadge = '<span class="badge badge-pending">Pending</span>';
-            } else if (request.status === "on_hold") {
-                statusBadge = '<span class="badge" style="background-color: #ffeeba; color: #85640b;">On Hold</span>';
-                actionButton = `<button class="btn-secondary btn-success btn-small" onclick="markAsReceived('${request.request_id}')">Mark as Received</button>`;
-            } else if (request.status === "received") {
-                statusBadge = '<span class="badge badge-accepted">Received</span>';
-            } else if (request.status === "rejected") {
-                statusBadge = '<span class="badge badge-danger">Rejected</span>';
-            }
+let myRequestsNextUrl = null;
 
-            card.innerHTML = `
-                <div class="request-info">
-                <h4>Request #${request.request_id.slice(0, 8)}</h4>
-                <p><strong>Quantity:</strong> ${request.quantity} Liters</p>
-                <p><strong>Date:</strong> ${new Date(request.created_at).toLocaleDateString()}</p>
-                ${request.to_seller_name ? `<p><strong>Accepted by:</strong> ${request.to_seller_name}</p>` : ''}
-                </div>
-                <div style="display: flex; flex-direction: column; align-items: flex-end; gap: 10px;">
-                ${statusBadge}
-                ${actionButton}
-                </div>
-            `;
-            container.appendChild(card);
-        });
+async function loadMyRequests(append = false) {
+    try {
+        const url = append && myRequestsNextUrl ? myRequestsNextUrl : `${BASE_URL}/seller/milk-requests/mine/`;
+        populateMyRequests(await apiFetch(url), append);
     } catch (error) {
         console.error("Failed to load my requests:", error);
     }
 }
 
+function populateMyRequests(data, append = false) {
+    const requests = data.results;
+    myRequestsNextUrl = data.next;
+    const container = document.getElementById("myRequestsList");
+    if (!container) return;
+    if (!append) container.innerHTML = "";
+    const existingMore = document.getElementById("myRequestsMore");
+    if (existingMore) existingMore.remove();
+    if (!append && requests.length === 0) {
+        container.innerHTML = '<p style="text-align: center; color: var(--text-muted); padding: 20px;">No requests made yet</p>';
+        return;
+    }
+    requests.forEach(request => {
+        const card = document.createElement("div");
+        card.className = "request-card";
+        let statusBadge = "";
+        let actionButton = "";
+
+        if (request.status === "pending") {
+            statusBadge = '<span class="badge badge-pending">Pending</span>';
+        } else if (request.status === "on_hold") {
+            statusBadge = '<span class="badge" style="background-color: #ffeeba; color: #85640b;">On Hold</span>';
+            actionButton = `<button class="btn-secondary btn-success btn-small" onclick="markAsReceived('${request.request_id}')">Mark as Received</button>`;
+        } else if (request.status === "received") {
+            statusBadge = '<span class="badge badge-accepted">Received</span>';
+        } else if (request.status === "rejected") {
+            statusBadge = '<span class="badge badge-danger">Rejected</span>';
+        } else if (request.status === "expired") {
+            statusBadge = '<span class="badge badge-danger">Expired</span>';
+        }
+
+        card.innerHTML = `
+            <div class="request-info">
+            <h4>Request #${request.request_id.slice(0, 8)}</h4>
+            <p><strong>Quantity:</strong> ${request.quantity} Liters</p>
+            <p><strong>Date:</strong> ${new Date(request.created_at).toLocaleDateString()}</p>
+            ${request.to_seller_name ? `<p><strong>Accepted by:</strong> ${request.to_seller_name}</p>` : ''}
+            </div>
+            <div style="display: flex; flex-direction: column; align-items: flex-end; gap: 10px;">
+            ${statusBadge}
+            ${actionButton}
+            </div>
+        `;
+        container.appendChild(card);
+    });
+    if (myRequestsNextUrl) {
+        const more = document.createElement("div");
+        more.id = "myRequestsMore";
+        more.style.textAlign = "center";
+        more.innerHTML = '<button class="btn-secondary btn-small" onclick="loadMyRequests(true)">Load More</button>';
+        container.appendChild(more);
+    }
+}
+
 window.markAsReceived = async function (requestId) {
     try {
         await apiFetch(`${BASE_URL}/seller/milk-request/${requestId}/received/`, {
@@ -961,20 +1125,41 @@ window.markAsReceived = async function (requestId) {
     }
 };
 
+let borrowLendNextUrl = null;
+
 async function loadBorrowLendHistory() {
     try {
         const history = await apiFetch(`${BASE_URL}/seller/borrow-lend-history/`);
-        populateBorrowLendTable(history);
+        populateBorrowLendTable(history.results);
+        populateBorrowLendBalances(history.summary);
+        updateBorrowLendLoadMore(history.next);
     } catch (error) {
         console.error("Failed to load borrow/lend history:", error);
     }
 }
 
-function populateBorrowLendTable(history) {
+window.loadMoreBorrowLendHistory = async function () {
+    if (!borrowLendNextUrl) return;
+    try {
+        const history = await apiFetch(borrowLendNextUrl);
+        populateBorrowLendTable(history.results, true);
+        updateBorrowLendLoadMore(history.next);
+    } catch (error) {
+        console.error("Failed to load more borrow/lend history:", error);
+    }
+};
+
+function updateBorrowLendLoadMore(nextUrl) {
+    borrowLendNextUrl = nextUrl;
+    const button = document.getElementById("borrowLendLoadMore");
+    if (button) button.style.display = nextUrl ? "inline-block" : "none";
+}
+
+function populateBorrowLendTable(history, append = false) {
     const tbody = document.querySelector("#borrowLendTable tbody");
     if (!tbody) return;
-    tbody.innerHTML = "";
-    if (history.length === 0) {
+    if (!append) tbody.innerHTML = "";
+    if (!append && history.length === 0) {
         tbody.innerHTML = '<tr><td colspan="5" style="text-align: center; color: var(--text-muted);">No borrow/lend records</td></tr>';
         return;
     }
@@ -992,6 +1177,21 @@ function populateBorrowLendTable(history) {
     });
 }
 
+function populateBorrowLendBalances(balances) {
+    const container = document.getElementById("borrowLendBalances");
+    if (!container) return;
+    container.innerHTML = "";
+    (balances || []).forEach(balance => {
+        const net = parseFloat(balance.net_balance);
+        if (net === 0) return;
+        const line = document.createElement("p");
+        line.innerHTML = net > 0
+            ? `<strong>${balance.name}</strong> owes you ${balance.net_balance} L`
+            : `You owe <strong>${balance.name}</strong> ${Math.abs(net).toFixed(2)} L`;
+        container.appendChild(line);
+    });
+}
+
 
 
 async function loadEmployeeDashboard() {
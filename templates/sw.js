@@ -0,0 +1,234 @@
+{% load static %}const SHELL_CACHE = "thoneti-shell-" + "{% static 'js/scripts.js' %}".split("/").pop();
+const RUNTIME_CACHE = "thoneti-runtime";
+const STATIC_PREFIX = "{% get_static_prefix %}";
+const SHELL_ASSETS = [
+    "{% static 'css/styles.css' %}",
+    "{% static 'js/scripts.js' %}",
+    "{% static 'manifest.json' %}",
+    "{% static 'icons/thoneti-icon-192.png' %}",
+    "{% static 'icons/thoneti-icon-512.png' %}",
+    "{% static 'icons/apple-touch-icon.png' %}",
+];
+
+const OUTBOX_DB = "thoneti-outbox";
+const OUTBOX_STORE = "operations";
+const REPLAY_URL = "{% url 'replay-outbox' %}";
+const REPLAY_BATCH_SIZE = 50;
+const USER_HEADER = "X-Outbox-User";
+const HASHED_ASSET = /\.[0-9a-f]{12}\.[a-z0-9]+$/;
+
+const QUEUEABLE_WRITES = [
+    { type: "sale", pattern: /^\/api\/seller\/sale\/record\/$/ },
+    { type: "daily_total", pattern: /^\/api\/seller\/daily-totals\/$/ },
+    { type: "receipt_status", pattern: /^\/api\/seller\/milk-received\/([0-9a-f-]+)\/update-status\/$/, param: "receipt_id" },
+    { type: "attendance", pattern: /^\/api\/manager\/attendance\/$/ },
+];
+
+
+self.addEventListener("install", event => {
+    event.waitUntil(
+        caches.open(SHELL_CACHE).then(cache => cache.addAll(SHELL_ASSETS)).then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener("activate", event => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(
+                keys.filter(key => key !== SHELL_CACHE && key !== RUNTIME_CACHE).map(key => caches.delete(key))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener("fetch", event => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) return;
+
+    if (request.method === "POST") {
+        const write = QUEUEABLE_WRITES.find(candidate => candidate.pattern.test(url.pathname));
+        if (write) event.respondWith(sendOrQueue(request, url, write));
+        return;
+    }
+
+    if (request.method !== "GET") return;
+
+    if (url.pathname.startsWith(STATIC_PREFIX)) {
+        event.respondWith(HASHED_ASSET.test(url.pathname) ? cacheFirst(request) : networkFirst(request));
+    } else if (request.mode === "navigate") {
+        event.respondWith(networkFirst(request));
+    }
+});
+
+// Replays need the page's current CSRF token and user, so a background sync
+// only asks the open pages to start one.
+self.addEventListener("sync", event => {
+    if (event.tag === "replay-outbox") {
+        event.waitUntil(notifyPages({ type: "replay-requested" }));
+    }
+});
+
+self.addEventListener("message", event => {
+    if (event.data && event.data.type === "replay-outbox") {
+        const session = { csrf: event.data.csrf || "", userId: event.data.user_id };
+        event.waitUntil(replayOutbox(session).catch(error => console.warn("Outbox replay deferred:", error)));
+    }
+    // Cached navigations are the logged-in user's pages; drop them on logout.
+    if (event.data && event.data.type === "logout") {
+        event.waitUntil(caches.delete(RUNTIME_CACHE));
+    }
+});
+
+
+async function cacheFirst(request) {
+    const cached = await caches.match(request);
+    if (cached) return cached;
+    const response = await fetch(request);
+    if (response.ok) {
+        const cache = await caches.open(SHELL_CACHE);
+        cache.put(request, response.clone());
+    }
+    return response;
+}
+
+async function networkFirst(request) {
+    try {
+        const response = await fetch(request);
+        if (response.ok) {
+            const cache = await caches.open(RUNTIME_CACHE);
+            cache.put(request, response.clone());
+        }
+        return response;
+    } catch (error) {
+        const cached = await caches.match(request);
+        if (cached) return cached;
+        throw error;
+    }
+}
+
+async function sendOrQueue(request, url, write) {
+    const payload = await request.clone().json().catch(() => ({}));
+    const clientId = payload.client_id || self.crypto.randomUUID();
+    if (write.type === "sale") payload.client_id = clientId;
+    if (write.param) payload[write.param] = url.pathname.match(write.pattern)[1];
+
+    const headers = new Headers(request.headers);
+    const userId = headers.get(USER_HEADER);
+    headers.delete(USER_HEADER);
+    try {
+        return await fetch(request.url, {
+            method: "POST",
+            headers,
+            body: JSON.stringify(payload),
+            credentials: "same-origin",
+        });
+    } catch (error) {
+        // Without the user the entry could be replayed into someone else's account.
+        if (!userId) throw error;
+        await addToOutbox({
+            client_id: clientId,
+            type: write.type,
+            payload,
+            user_id: userId,
+            queued_at: Date.now(),
+        });
+        if (self.registration.sync) {
+            self.registration.sync.register("replay-outbox").catch(() => {});
+        }
+        return new Response(JSON.stringify({
+            queued: true,
+            message: "You are offline. This entry was saved and will sync automatically.",
+        }), { status: 202, headers: { "Content-Type": "application/json" } });
+    }
+}
+
+
+function openOutbox() {
+    return new Promise((resolve, reject) => {
+        const open = indexedDB.open(OUTBOX_DB, 1);
+        open.onupgradeneeded = () => open.result.createObjectStore(OUTBOX_STORE, { keyPath: "seq", autoIncrement: true });
+        open.onsuccess = () => resolve(open.result);
+        open.onerror = () => reject(open.error);
+    });
+}
+
+async function withOutbox(mode, work) {
+    const db = await openOutbox();
+    return new Promise((resolve, reject) => {
+        const tx = db.transaction(OUTBOX_STORE, mode);
+        const pending = work(tx.objectStore(OUTBOX_STORE));
+        tx.oncomplete = () => resolve(pending ? pending.result : undefined);
+        tx.onerror = () => reject(tx.error);
+    });
+}
+
+function addToOutbox(operation) {
+    return withOutbox("readwrite", store => store.add(operation));
+}
+
+function readOutbox() {
+    return withOutbox("readonly", store => store.getAll());
+}
+
+function removeFromOutbox(seqs) {
+    return withOutbox("readwrite", store => {
+        seqs.forEach(seq => store.delete(seq));
+    });
+}
+
+async function notifyPages(message) {
+    const clients = await self.clients.matchAll({ type: "window" });
+    clients.forEach(client => client.postMessage(message));
+}
+
+let activeReplay = null;
+
+function replayOutbox(session) {
+    if (!activeReplay) {
+        activeReplay = drainOutbox(session).finally(() => { activeReplay = null; });
+    }
+    return activeReplay;
+}
+
+// Entries queued by another user stay in the outbox until that user logs in
+// on this device again.
+async function drainOutbox(session) {
+    if (!session.userId) return;
+    const queued = (await readOutbox()).filter(operation => operation.user_id === session.userId);
+    for (let start = 0; start < queued.length; start += REPLAY_BATCH_SIZE) {
+        const batch = queued.slice(start, start + REPLAY_BATCH_SIZE);
+        const response = await fetch(REPLAY_URL, {
+            method: "POST",
+            credentials: "same-origin",
+            headers: { "Content-Type": "application/json", "X-CSRFToken": session.csrf },
+            body: JSON.stringify({
+                operations: batch.map(({ client_id, type, payload, user_id }) => ({ client_id, type, payload, user_id })),
+            }),
+        });
+
+        // Signed out or a stale session: keep the entries for the next login.
+        if (response.status === 401 || response.status === 403) {
+            await notifyPages({ type: "outbox-held", count: queued.length - start });
+            return;
+        }
+        // Any other 4xx will fail the same way every time, so report and drop the batch.
+        if (response.status >= 400 && response.status < 500) {
+            await removeFromOutbox(batch.map(operation => operation.seq));
+            await notifyPages({
+                type: "outbox-replayed",
+                results: batch.map(({ client_id }) => ({
+                    client_id, status: "rejected", message: `Replay refused with status ${response.status}`,
+                })),
+            });
+            continue;
+        }
+        if (!response.ok) {
+            throw new Error(`Outbox replay failed with status ${response.status}`);
+        }
+
+        const { results } = await response.json();
+        await removeFromOutbox(batch.map(operation => operation.seq));
+        await notifyPages({ type: "outbox-replayed", results });
+    }
+}